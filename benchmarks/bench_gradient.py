@@ -0,0 +1,57 @@
+"""
+Micro-benchmark: textstyle.gradient_text vs the old per-call implementation.
+
+    python benchmarks/bench_gradient.py
+
+Reports µs per call for short and long texts, uncached (first render) and
+cached (repeated string).
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import textstyle  # noqa: E402
+
+
+def legacy_gradient_text(text: str, gradient_type: str = "rainbow") -> str:
+    """The implementation textstyle replaced, kept here as the baseline."""
+    gradients = {name: list(colors) for name, colors in textstyle.GRADIENTS.items()}
+    colors = gradients.get(gradient_type, gradients["rainbow"])
+    result = ""
+    color_index = 0
+    for char in text:
+        if char != " ":
+            result += f"<#{colors[color_index % len(colors)]}>{char}"
+            color_index += 1
+        else:
+            result += " "
+    return result
+
+
+CASES = {
+    "short": "⚡ WORD CHALLENGE! ⚡",
+    "long": "VIP Greeting t7fad l @someone_with_a_long_name! " * 8,
+}
+
+
+def bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    for label, text in CASES.items():
+        assert legacy_gradient_text(text, "fire") == textstyle.gradient_text(text, "fire")
+        number = 20000 if label == "short" else 2000
+        old = bench(lambda: legacy_gradient_text(text, "fire"), number)
+        uncached = bench(lambda: textstyle._render.__wrapped__(text, "fire"), number)
+        cached = bench(lambda: textstyle.gradient_text(text, "fire"), number)
+        print(f"{label:5} ({len(text):3} chars)  old {old:8.2f} µs   "
+              f"new {uncached:8.2f} µs ({old / uncached:4.1f}×)   "
+              f"cached {cached:6.2f} µs ({old / cached:6.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Load benchmark: MyBot's event handlers against a simulated room.
+
+    python benchmarks/bench_room.py
+    python benchmarks/bench_room.py --sizes 50 200 --events 5000 --latency 0.05 --jitter 0.05
+
+For each room size the room is first filled with joins, then a mixed stream
+of chat / emote / move / join / leave / tip events is dispatched the way the
+SDK does it — one task per event, up to --concurrency in flight — with
+bot.highrise replaced by benchmarks/fake_highrise.FakeHighrise. Reported per
+size:
+
+  ev/s          events handled per second of wall time
+  p50 / p99     handler latency in ms (includes the injected API latency)
+  api/ev        direct API calls per event (send_emote, get_wallet, ...)
+  out/ev        messages queued on the outbox per event (chat, whisper,
+                react — the outbox drains them at its own rate)
+  mem           traced memory growth over the event stream, from a second
+                run under tracemalloc (so it does not slow the timed run)
+
+The bot runs in a temporary directory with a copy of the content files, so
+the benchmark never touches chikha_data.json. The outbox, persistence and
+emote-loop drivers run as they do live; the scheduler's periodic jobs do not.
+"""
+
+import argparse
+import asyncio
+import atexit
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from highrise.models import CurrencyItem, Position, User  # noqa: E402
+
+from fake_highrise import FakeHighrise  # noqa: E402
+
+CONTENT_FILES = ("tahadi.json", "nokat.json", "swalouat.json")
+
+# Event mix — relative weights
+MIX = {"chat": 45, "move": 25, "emote": 15, "join": 6, "leave": 6, "tip": 3}
+
+CHAT_LINES = (
+    "salam", "labas?", "hhhhh", "fin kayn dj", "mrhba bik", "zwin had room",
+    "!help", "!joke", "!truth", "!dare", "!riddle", "!rank", "!stats", "!top",
+    "!roll", "!flip", "!vipstatus", "random", "0", "stop", "12", "loop 7",
+)
+DANCES = ("dance-macarena", "dance-tiktok2", "emote-wave", "emote-laughing", "idle-dance-casual")
+
+
+class Room:
+    """Users in / out of the simulated room, mirrored into the fake client."""
+
+    def __init__(self, api: FakeHighrise):
+        self.api = api
+        self.seq = 0
+        self.inside = []              # [User]
+
+    def new_user(self) -> User:
+        self.seq += 1
+        return User(id=f"u{self.seq:023d}", username=f"bench_user{self.seq}")
+
+    def position(self) -> Position:
+        return Position(random.uniform(0, 20), 0.0, random.uniform(0, 20))
+
+    def enter(self, user: User, pos: Position):
+        self.inside.append(user)
+        self.api.room[user.id] = (user, pos)
+
+    def exit(self, user: User):
+        self.inside.remove(user)
+        self.api.room.pop(user.id, None)
+
+
+def make_bot(api: FakeHighrise):
+    import main
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = main.MyBot()
+    atexit.unregister(bot.persist.flush_sync)   # Would write to whatever the cwd is at exit
+    bot.highrise = api
+    bot.is_connected = True
+    return bot
+
+
+def next_event(bot, room: Room, size: int):
+    """(kind, coroutine) for one random event, keeping the room near `size`."""
+    kind = random.choices(list(MIX), weights=list(MIX.values()))[0]
+    if kind == "join" and len(room.inside) >= size * 1.1:
+        kind = "leave"
+    if kind == "leave" and len(room.inside) <= max(1, size * 0.9):
+        kind = "join"
+    if kind == "join":
+        user, pos = room.new_user(), room.position()
+        room.enter(user, pos)
+        return kind, bot.on_user_join(user, pos)
+    if kind == "leave":
+        user = random.choice(room.inside)
+        room.exit(user)
+        return kind, bot.on_user_leave(user)
+    user = random.choice(room.inside)
+    if kind == "chat":
+        return kind, bot.on_chat(user, random.choice(CHAT_LINES))
+    if kind == "move":
+        pos = room.position()
+        room.api.room[user.id] = (user, pos)
+        return kind, bot.on_user_move(user, pos)
+    if kind == "emote":
+        return kind, bot.on_emote(user, random.choice(DANCES), None)
+    bot_user = User(id=bot.highrise.my_id, username="_chikhatrax_")
+    return kind, bot.on_tip(user, bot_user, CurrencyItem("gold", random.choice((1, 5, 10))))
+
+
+async def run_room(size: int, events: int, concurrency: int, latency: float, jitter: float,
+                   trace: bool = False) -> dict:
+    api = FakeHighrise(latency=latency, jitter=jitter)
+    bot = make_bot(api)
+    queued = [0]
+    put = bot.outbox._put
+
+    def counting_put(*args, **kwargs):
+        queued[0] += 1
+        return put(*args, **kwargs)
+    bot.outbox._put = counting_put
+
+    drivers = [asyncio.create_task(bot.outbox.run()),
+               asyncio.create_task(bot.persist.run()),
+               asyncio.create_task(bot.emote_loops.run())]
+    room = Room(api)
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def dispatch(coro):
+        async with sem:
+            start = time.perf_counter()
+            await coro
+            latencies.append(time.perf_counter() - start)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Fill the room first — not part of the measured stream
+        for _ in range(size):
+            user, pos = room.new_user(), room.position()
+            room.enter(user, pos)
+            await bot.on_user_join(user, pos)
+        latencies.clear()
+        api.calls.clear()
+        queued[0] = 0
+        if trace:
+            tracemalloc.start()
+        mem_before = tracemalloc.get_traced_memory()[0] if trace else 0
+
+        start = time.perf_counter()
+        pending = set()
+        for _ in range(events):
+            _, coro = next_event(bot, room, size)
+            task = asyncio.create_task(dispatch(coro))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            if len(pending) >= concurrency * 2:
+                await asyncio.sleep(0)
+        await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - start
+
+        mem_after = tracemalloc.get_traced_memory()[0] if trace else 0
+        if trace:
+            tracemalloc.stop()
+
+    for task in drivers:
+        task.cancel()
+    await asyncio.gather(*drivers, return_exceptions=True)
+    latencies.sort()
+    return {
+        "size": size,
+        "events": len(latencies),
+        "ev_s": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "api": api.total_calls / events,
+        "out": queued[0] / events,
+        "mem": mem_after - mem_before,
+        "calls": dict(api.calls.most_common(4)),
+    }
+
+
+async def bench(args):
+    print(f"events={args.events} concurrency={args.concurrency} "
+          f"latency={args.latency * 1000:.0f}ms±{args.jitter * 1000:.0f}ms")
+    print(f"{'users':>6} {'ev/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'api/ev':>7} {'out/ev':>7} {'mem KiB':>8}  top calls")
+    for size in args.sizes:
+        random.seed(size)
+        timed = await run_room(size, args.events, args.concurrency, args.latency, args.jitter)
+        random.seed(size)
+        traced = await run_room(size, args.events, args.concurrency, args.latency, args.jitter, trace=True)
+        print(f"{size:>6} {timed['ev_s']:>9.0f} {timed['p50']:>8.2f} {timed['p99']:>8.2f} "
+              f"{timed['api']:>7.2f} {timed['out']:>7.2f} {traced['mem'] / 1024:>8.0f}  {timed['calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="API latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, seconds")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_room_")
+    for name in CONTENT_FILES:
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy(os.path.join(ROOT, name), workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        asyncio.run(bench(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
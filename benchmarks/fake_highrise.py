@@ -0,0 +1,92 @@
+"""
+In-process stand-in for the SDK's BotAPI (bot.highrise) used by the benchmarks.
+
+Every call is counted per method and can be delayed by an injected latency
+(fixed + random jitter) so handlers that await the API behave as they would
+against the real server. get_room_users answers from `room`, which the
+benchmark keeps in step with the join / leave / move events it sends, and
+get_wallet / tip_user share one gold balance.
+"""
+
+import asyncio
+import random
+from collections import Counter
+
+from highrise.models import (
+    CurrencyItem, GetRoomUsersRequest, GetUserOutfitRequest, GetWalletRequest,
+)
+
+GOLD_BARS = {"gold_bar_1": 1, "gold_bar_5": 5, "gold_bar_10": 10, "gold_bar_50": 50,
+             "gold_bar_100": 100, "gold_bar_500": 500, "gold_bar_1k": 1000,
+             "gold_bar_5000": 5000, "gold_bar_10k": 10000}
+
+
+class FakeHighrise:
+    my_id = "bot00000000000000000000"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, gold: int = 1_000_000):
+        self.latency = latency
+        self.jitter = jitter
+        self.gold = gold
+        self.room = {}                # {user_id: (User, Position)}
+        self.calls = Counter()        # {method: count}
+
+    async def _call(self, method: str):
+        self.calls[method] += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)    # A real call always yields to the loop
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    # ── Fire-and-forget requests ────────────────────────────────────
+    async def chat(self, message):
+        await self._call("chat")
+
+    async def send_whisper(self, user_id, message):
+        await self._call("send_whisper")
+
+    async def react(self, reaction, target_user_id):
+        await self._call("react")
+
+    async def send_emote(self, emote_id, target_user_id=None):
+        await self._call("send_emote")
+
+    async def walk_to(self, destination):
+        await self._call("walk_to")
+
+    async def teleport(self, user_id, dest):
+        await self._call("teleport")
+
+    async def moderate_room(self, user_id, action, action_length=None):
+        await self._call("moderate_room")
+
+    async def set_outfit(self, outfit):
+        await self._call("set_outfit")
+
+    # ── Request / response ──────────────────────────────────────────
+    async def get_room_users(self):
+        await self._call("get_room_users")
+        return GetRoomUsersRequest.GetRoomUsersResponse(list(self.room.values()), "0")
+
+    async def get_wallet(self):
+        await self._call("get_wallet")
+        return GetWalletRequest.GetWalletResponse([CurrencyItem("gold", self.gold)], "0")
+
+    async def tip_user(self, user_id, tip):
+        await self._call("tip_user")
+        amount = GOLD_BARS[tip]
+        if amount > self.gold:
+            return "insufficient_funds"
+        self.gold -= amount
+        return "success"
+
+    async def get_outfit(self, *args):
+        await self._call("get_outfit")
+        return GetUserOutfitRequest.GetUserOutfitResponse([])
+
+    get_my_outfit = get_outfit
@@ -0,0 +1,310 @@
+"""
+Local stand-in for the Highrise bot WebSocket API, for offline load tests.
+
+    python benchmarks/mock_highrise.py --users 100 --rate chat=5 move=8 emote=3 \\
+        --latency 0.04 --jitter 0.04 --error-rate 0.01 --rate-limit 20/5 --drop-every 120
+    HR_BOTAPI_URL=ws://127.0.0.1:8765/web/botapi python -m highrise main:MyBot room token
+
+The SDK reads HR_BOTAPI_URL in place of wss://highrise.game/web/botapi, so
+the unmodified bot process (Procfile command and all) connects here. Frames
+are built and parsed with the SDK's own converter, so the wire format is the
+real one:
+
+  * on connect: SessionMetadata, then a simulated room of --users people
+    who chat, move, emote, join / leave and tip at the --rate events per
+    second (Poisson arrivals), only for the events the bot subscribed to
+  * requests (chat, whisper, react, send_emote, walk_to, teleport,
+    get_room_users, get_wallet, tip_user, ...) are answered after --latency
+    plus up to --jitter seconds; --error-rate answers with an Error, and
+    more than --rate-limit requests per window answer "rate limited"
+  * --drop-every closes the socket every N seconds so reconnect behaviour
+    can be measured — the gap until the bot is back is logged
+
+Every --report seconds (and at exit) it prints events sent, requests served
+per type, errors, rate-limited requests and reconnect gaps.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+
+from aiohttp import WSMsgType, web
+from highrise import Incoming, Outgoing, converter
+from highrise.models import (
+    ChatEvent, CurrencyItem, EmoteEvent, Error, GetRoomUsersRequest, GetUserOutfitRequest,
+    GetWalletRequest, KeepaliveRequest, Position, RoomInfo, SessionMetadata, TipReactionEvent,
+    TipUserRequest, User, UserJoinedEvent, UserLeftEvent, UserMovedEvent,
+)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_room import CHAT_LINES, DANCES  # noqa: E402
+from fake_highrise import GOLD_BARS  # noqa: E402
+
+BOT_ID = "bot00000000000000000000"
+BOT_USER = User(id=BOT_ID, username="_chikhatrax_")
+
+# Event kind → subscription name the SDK puts in ?events=
+SUBSCRIPTION = {"chat": "chat", "move": "user_moved", "emote": "emote", "join": "user_joined",
+                "leave": "user_left", "tip": "tip_reaction"}
+DEFAULT_RATES = {"chat": 3.0, "move": 5.0, "emote": 2.0, "join": 0.2, "leave": 0.2, "tip": 0.05}
+
+
+class RateLimit:
+    """Sliding window: at most `count` requests per `window` seconds."""
+
+    def __init__(self, spec: str):
+        count, _, window = spec.partition("/")
+        self.count = int(count)
+        self.window = float(window or 1)
+        self._times = []
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self._times = [t for t in self._times if now - t < self.window]
+        if len(self._times) >= self.count:
+            return False
+        self._times.append(now)
+        return True
+
+
+class MockRoom:
+    def __init__(self, args):
+        self.args = args
+        self.users = {}               # {user_id: (User, Position)}
+        self.seq = 0
+        self.gold = args.gold
+        self.events = Counter()       # {kind: sent}
+        self.requests = Counter()     # {request type: answered}
+        self.errors = 0
+        self.limited = 0
+        self.connections = 0
+        self.gaps = []                # Seconds from a dropped socket to the next connect
+        self._dropped_at = None
+        for _ in range(args.users):
+            self._new_user()
+
+    # ── Room model ──────────────────────────────────────────────────
+    def _new_user(self):
+        self.seq += 1
+        user = User(id=f"u{self.seq:023d}", username=f"mock_user{self.seq}")
+        pos = self._position()
+        self.users[user.id] = (user, pos)
+        return user, pos
+
+    @staticmethod
+    def _position() -> Position:
+        return Position(round(random.uniform(0, 20), 1), 0.0, round(random.uniform(0, 20), 1))
+
+    def _someone(self) -> User:
+        return random.choice(list(self.users.values()))[0]
+
+    def make_event(self, kind: str):
+        size, target = len(self.users), self.args.users
+        if kind == "join" and size >= target * 1.1 or kind == "leave" and size <= max(1, target * 0.9):
+            return None               # Keep the room near --users
+        if kind == "join":
+            user, pos = self._new_user()
+            return UserJoinedEvent(user, pos)
+        if kind == "leave":
+            user = self._someone()
+            del self.users[user.id]
+            return UserLeftEvent(user)
+        user = self._someone()
+        if kind == "chat":
+            return ChatEvent(user, random.choice(CHAT_LINES), False)
+        if kind == "move":
+            pos = self._position()
+            self.users[user.id] = (user, pos)
+            return UserMovedEvent(user, pos)
+        if kind == "emote":
+            return EmoteEvent(user, random.choice(DANCES), None)
+        amount = random.choice((1, 5, 10))
+        self.gold += amount
+        return TipReactionEvent(user, BOT_USER, CurrencyItem("gold", amount))
+
+    # ── Requests ────────────────────────────────────────────────────
+    def respond(self, req):
+        rid = req.rid
+        if isinstance(req, GetRoomUsersRequest):
+            return GetRoomUsersRequest.GetRoomUsersResponse(list(self.users.values()), rid)
+        if isinstance(req, GetWalletRequest):
+            return GetWalletRequest.GetWalletResponse([CurrencyItem("gold", self.gold)], rid)
+        if isinstance(req, TipUserRequest):
+            amount = GOLD_BARS[req.gold_bar]
+            if amount > self.gold:
+                return TipUserRequest.Response("insufficient_funds", rid)
+            self.gold -= amount
+            return TipUserRequest.Response("success", rid)
+        if isinstance(req, GetUserOutfitRequest):
+            return GetUserOutfitRequest.Response([], rid)
+        try:
+            return type(req).Response(rid=rid)
+        except TypeError:
+            return Error(f"{type(req).__name__} not supported by the mock server", rid=rid)
+
+    def report(self) -> str:
+        gaps = f" reconnect gaps {', '.join(f'{g:.2f}s' for g in self.gaps[-5:])}" if self.gaps else ""
+        return (f"[Mock] conns {self.connections} | users {len(self.users)} | gold {self.gold} | "
+                f"events {sum(self.events.values())} {dict(self.events)} | "
+                f"requests {sum(self.requests.values())} {dict(self.requests.most_common(6))} | "
+                f"errors {self.errors} | rate-limited {self.limited}{gaps}")
+
+
+async def handle_ws(request: web.Request):
+    room: MockRoom = request.app["room"]
+    args = room.args
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    room.connections += 1
+    if room._dropped_at is not None:
+        room.gaps.append(time.monotonic() - room._dropped_at)
+        room._dropped_at = None
+    subscribed = set(filter(None, request.query.get("events", "").split(",")))
+    print(f"[Mock] Bot connected (room {request.headers.get('room-id')}, events {sorted(subscribed)})")
+
+    meta = SessionMetadata(BOT_ID, RoomInfo("owner0000000000000000000", "Mock room"),
+                           {"client": (20, 5.0), "socials": (20, 5.0)}, uuid.uuid4().hex)
+    await ws.send_str(converter.dumps(meta, SessionMetadata | Error))
+    limit = RateLimit(args.rate_limit) if args.rate_limit else None
+    tasks = set()
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def send(msg):
+        if not ws.closed:
+            await ws.send_str(converter.dumps(msg, Incoming))
+
+    async def emit(kind: str, rate: float):
+        while True:
+            await asyncio.sleep(random.expovariate(rate))
+            event = room.make_event(kind)
+            if event is not None:
+                room.events[kind] += 1
+                await send(event)
+
+    async def answer(req):
+        delay = args.latency + (random.uniform(0, args.jitter) if args.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        name = type(req).__name__
+        if limit is not None and not limit.allow():
+            room.limited += 1
+            await send(Error("Rate limited", rid=req.rid))
+        elif random.random() < args.error_rate:
+            room.errors += 1
+            await send(Error(f"Mock failure for {name}", rid=req.rid))
+        else:
+            room.requests[name] += 1
+            await send(room.respond(req))
+
+    async def drop_later():
+        await asyncio.sleep(args.drop_every)
+        print(f"[Mock] Dropping the connection after {args.drop_every:.0f}s")
+        room._dropped_at = time.monotonic()
+        await ws.close()
+
+    for kind, rate in args.rates.items():
+        if rate > 0 and SUBSCRIPTION[kind] in subscribed:
+            spawn(emit(kind, rate))
+    if args.drop_every:
+        spawn(drop_later())
+    try:
+        async for frame in ws:
+            if frame.type != WSMsgType.TEXT:
+                continue
+            try:
+                req = converter.loads(frame.data, Outgoing)
+            except Exception as e:
+                # e.g. react("fire") — answer like the server would, keep the socket open
+                try:
+                    rid = json.loads(frame.data).get("rid")
+                except (ValueError, AttributeError):
+                    rid = None
+                room.errors += 1
+                await send(Error(f"Invalid request: {e}", rid=rid))
+                continue
+            if isinstance(req, KeepaliveRequest):
+                continue              # Sent without a rid — the SDK expects no reply
+            spawn(answer(req))
+    finally:
+        for task in list(tasks):
+            task.cancel()
+        if room._dropped_at is None:
+            room._dropped_at = time.monotonic()
+        print("[Mock] Bot disconnected")
+    return ws
+
+
+async def report_loop(room: MockRoom, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        print(room.report())
+
+
+def parse_rates(pairs) -> dict:
+    rates = dict(DEFAULT_RATES)
+    for pair in pairs or ():
+        kind, _, value = pair.partition("=")
+        if kind not in rates:
+            raise SystemExit(f"Unknown event kind {kind!r} (one of {', '.join(rates)})")
+        rates[kind] = float(value)
+    return rates
+
+
+async def serve(args):
+    room = MockRoom(args)
+    app = web.Application()
+    app["room"] = room
+    app.router.add_get("/{tail:.*}", handle_ws)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"[Mock] Listening — HR_BOTAPI_URL=ws://{args.host}:{args.port}/web/botapi")
+    reporter = asyncio.create_task(report_loop(room, args.report))
+    try:
+        if args.duration:
+            await asyncio.sleep(args.duration)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        reporter.cancel()
+        print(room.report())
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=50, help="Simulated room size")
+    parser.add_argument("--rate", nargs="*", metavar="KIND=PER_SEC",
+                        help="Event rates, e.g. chat=5 move=8 (kinds: " + ", ".join(DEFAULT_RATES) + ")")
+    parser.add_argument("--latency", type=float, default=0.03, help="Response latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an Error")
+    parser.add_argument("--rate-limit", default="", metavar="N/SECONDS",
+                        help="Answer 'rate limited' past N requests per window, e.g. 20/5")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="Close the socket every N seconds")
+    parser.add_argument("--gold", type=int, default=10_000, help="Starting wallet balance")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after N seconds (0 = forever)")
+    parser.add_argument("--report", type=float, default=10.0, help="Seconds between reports")
+    args = parser.parse_args()
+    args.rates = parse_rates(args.rate)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+commands.py — Table-driven chat command registry.
+
+on_chat used to walk several hundred lines of `low == ...` / `low.startswith`
+checks, so the emote-number path at the bottom paid for every comparison
+above it. Commands are now declared once in a table keyed by their first
+token, and dispatch is a dict lookup:
+
+    "!tip @bob 5"  → token "!tip"     → Command(!tip)
+    "loop 12"      → token "loop"     → Command(loop)
+    "!outfit3"     → token "!outfit3" → numbered family "!outfit"
+    "12"           → token "12"       → numbered family "" (emote numbers)
+
+Each Command declares:
+    perm      ALL / MOD / OWNER — checked before the handler runs
+    cooldown  seconds between uses per user (owners and mods bypass it)
+    route     CHAT  — public chat only, replies go to the room
+              REPLY — also usable from whispers; replies follow the channel
+    args      False — exact token only, True — arguments required,
+              "optional" — with or without arguments
+    denied    optional reply for users without permission (else ignored)
+
+Every call is timed; Command.calls / avg_ms / max_ms feed !cmdstats.
+"""
+
+import time
+
+# Permission levels
+ALL, MOD, OWNER = "all", "mod", "owner"
+
+# Reply routing
+CHAT, REPLY = "chat", "reply"
+
+_DIGITS = "0123456789"
+
+
+class Command:
+    __slots__ = ("name", "handler", "perm", "cooldown", "route", "args", "denied",
+                 "calls", "errors", "total_time", "max_time")
+
+    def __init__(self, name, handler, perm=ALL, cooldown=0.0, route=CHAT,
+                 args=False, denied=None):
+        self.name = name
+        self.handler = handler    # async (user, msg, low, whisper)
+        self.perm = perm
+        self.cooldown = cooldown
+        self.route = route
+        self.args = args
+        self.denied = denied
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    @property
+    def avg_ms(self) -> float:
+        return 1000 * self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return 1000 * self.max_time
+
+    def __repr__(self):
+        return f"Command({self.name!r}, perm={self.perm!r}, route={self.route!r})"
+
+
+class CommandRegistry:
+    """Token → Command table.
+
+    `check_perm(user, perm)` decides permissions; `reply(user, text, whisper)`
+    sends the `denied` message. Both come from the bot so the registry stays
+    free of Highrise specifics.
+    """
+
+    def __init__(self, check_perm, reply):
+        self._check_perm = check_perm
+        self._reply = reply
+        self._table = {}      # {token: Command}
+        self._numbered = {}   # {token prefix: Command} for tokens ending in digits
+        self._last_use = {}   # {(command name, user id): time.monotonic()}
+
+    def register(self, tokens, handler, perm=ALL, cooldown=0.0, route=CHAT,
+                 args=False, denied=None, numbered=False) -> Command:
+        """Register `handler` under every token in `tokens` (first one names it).
+        numbered=True matches the token followed by digits ("!outfit" → "!outfit3")."""
+        cmd = Command(tokens[0], handler, perm, cooldown, route, args, denied)
+        target = self._numbered if numbered else self._table
+        for token in tokens:
+            if token in target:
+                raise ValueError(f"Command token {token!r} registered twice")
+            target[token] = cmd
+        return cmd
+
+    def resolve(self, low: str):
+        """Command for a lowercased message, or None. One or two dict lookups."""
+        token, _, rest = low.partition(" ")
+        cmd = self._table.get(token)
+        if cmd is None and token[-1:].isdigit():
+            cmd = self._numbered.get(token.rstrip(_DIGITS))
+        if cmd is None:
+            return None
+        has_args = bool(rest.strip())
+        if has_args and not cmd.args:
+            return None
+        if not has_args and cmd.args is True:
+            return None
+        return cmd
+
+    def __iter__(self):
+        seen = {}
+        for cmd in list(self._table.values()) + list(self._numbered.values()):
+            seen.setdefault(cmd.name, cmd)
+        return iter(seen.values())
+
+    def __len__(self):
+        return len({cmd.name for cmd in self})
+
+    async def dispatch(self, user, msg: str, whisper: bool = False) -> bool:
+        """Run the command in `msg`. Returns True if a command consumed the message."""
+        low = msg.lower()
+        cmd = self.resolve(low)
+        if cmd is None or (whisper and cmd.route != REPLY):
+            return False
+        if not self._check_perm(user, cmd.perm):
+            if cmd.denied:
+                await self._reply(user, cmd.denied, whisper)
+                return True
+            return False
+        if cmd.cooldown and not self._check_perm(user, MOD):
+            key = (cmd.name, user.id)
+            now = time.monotonic()
+            if now - self._last_use.get(key, 0.0) < cmd.cooldown:
+                return True  # Swallowed — same behaviour as the old global cooldown
+            self._last_use[key] = now
+        start = time.perf_counter()
+        try:
+            await cmd.handler(user, msg, low, whisper)
+        except Exception:
+            cmd.errors += 1
+            raise
+        finally:
+            cmd.record(time.perf_counter() - start)
+        return True
+
+    def stats(self, limit: int = 8) -> list:
+        """Busiest commands by total handler time."""
+        used = [cmd for cmd in self if cmd.calls]
+        return sorted(used, key=lambda c: c.total_time, reverse=True)[:limit]
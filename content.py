@@ -0,0 +1,186 @@
+"""
+content.py — Compiled, memory-mapped content packs (dares, jokes, riddles).
+
+MyBot.__init__ used to json-parse tahadi.json, nokat.json and swalouat.json
+(the last one twice, once per key) on every start and keep every string in
+Python lists for the life of the process, so startup time and resident
+memory both grew with the size of the packs.
+
+The packs are now compiled into one binary bundle, content.bin:
+
+    magic "CHKBNDL1" | u32 header length | header JSON
+    per pack: u32 offsets[count + 1] | UTF-8 entries, back to back
+
+(all integers little-endian; entry offsets are relative to the pack's first
+entry, pack positions relative to the end of the header).
+
+The header records each pack's position and count plus the (mtime, size) of
+every source file. open_bundle() maps the file read-only and returns
+ContentPack sequences that decode one entry on access — len(), indexing and
+random.choice() never load the rest of the pack, and the pages are shared
+with the OS page cache rather than held as Python objects.
+
+If a source file is newer than the bundle (or the bundle is missing or
+unreadable) the bundle is rebuilt before mapping it; a missing source keeps
+whatever the bundle already holds. `python content.py` rebuilds it by hand.
+Source entries lacking any key their packs read (a riddle without an answer)
+are skipped, so packs built from one file always line up index for index.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+BUNDLE_FILE = "content.bin"
+MAGIC = b"CHKBNDL1"
+
+# pack name → (source file, key in each JSON entry)
+PACKS = {
+    "dares":   ("tahadi.json",   "dare"),
+    "jokes":   ("nokat.json",    "joke"),
+    "riddles": ("swalouat.json", "riddle"),
+    "answers": ("swalouat.json", "answer"),
+}
+
+
+class ContentPack(Sequence):
+    """Read-only sequence of strings backed by the mapped bundle."""
+
+    __slots__ = ("name", "_buf", "_index", "_data", "_count")
+
+    def __init__(self, name: str, buf, index: int, count: int):
+        self.name = name
+        self._buf = buf
+        self._index = index                   # Offset of offsets[0]
+        self._data = index + 4 * (count + 1)  # Offset of entry 0
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(f"{self.name} index out of range")
+        start, end = struct.unpack_from("<II", self._buf, self._index + 4 * i)
+        return self._buf[self._data + start:self._data + end].decode("utf-8")
+
+    def __repr__(self):
+        return f"<ContentPack {self.name} ({self._count} entries)>"
+
+
+# ── Build ───────────────────────────────────────────────────────────
+def _source_stamp(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def build_bundle(path: str = BUNDLE_FILE, packs: dict = PACKS) -> dict:
+    """Compile the JSON sources into `path`. Returns {pack: entry count}."""
+    parsed = {}                               # {source file: [entries]} — each file read once
+    for source, _ in packs.values():
+        if source in parsed:
+            continue
+        try:
+            with open(source, "r", encoding="utf-8") as f:
+                parsed[source] = json.load(f)
+        except Exception as e:
+            print(f"[Content] Could not load {source}: {e}")
+            parsed[source] = []
+
+    # Packs from one source share indexes (riddles[i] ↔ answers[i]), so keep
+    # only the items that carry every key read from that source
+    for source in parsed:
+        keys = {key for s, key in packs.values() if s == source}
+        items = [item for item in parsed[source] if isinstance(item, dict) and keys <= item.keys()]
+        if len(items) != len(parsed[source]):
+            print(f"[Content] {source}: skipped {len(parsed[source]) - len(items)} entries "
+                  f"missing {', '.join(sorted(keys))}")
+        parsed[source] = items
+
+    header = {"packs": {}, "sources": {s: _source_stamp(s) for s in parsed}}
+    blobs = []
+    for name, (source, key) in packs.items():
+        entries = [item[key].encode("utf-8") for item in parsed[source]]
+        offsets = array("I", [0])
+        for entry in entries:
+            offsets.append(offsets[-1] + len(entry))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        blobs.append((name, len(entries), offsets.tobytes() + b"".join(entries)))
+
+    position = 0                              # Relative to the end of the header
+    for name, count, blob in blobs:
+        header["packs"][name] = [position, count]
+        position += len(blob)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for _, _, blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return {name: count for name, count, _ in blobs}
+
+
+# ── Open ────────────────────────────────────────────────────────────
+def _read_header(buf):
+    """(header dict, offset where the packs start)."""
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a content bundle")
+    (length,) = struct.unpack_from("<I", buf, len(MAGIC))
+    start = len(MAGIC) + 4
+    return json.loads(bytes(buf[start:start + length])), start + length
+
+
+def _is_stale(header: dict, packs: dict) -> bool:
+    recorded = header.get("sources", {})
+    for name, (source, _) in packs.items():
+        if name not in header.get("packs", {}) or source not in recorded:
+            return True
+        stamp = _source_stamp(source)
+        if stamp is not None and stamp != recorded[source]:
+            return True               # Edited since the build (a missing source keeps the bundle)
+    return False
+
+
+def _map(path: str):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def open_bundle(path: str = BUNDLE_FILE, packs: dict = PACKS) -> dict:
+    """{pack name: ContentPack}, rebuilding the bundle first if it is stale."""
+    buf = header = None
+    try:
+        buf = _map(path)
+        header, base = _read_header(buf)
+    except (OSError, ValueError, struct.error) as e:
+        if os.path.exists(path):
+            print(f"[Content] {path} unreadable ({e}) — rebuilding")
+    if header is None or _is_stale(header, packs):
+        if buf is not None:
+            buf.close()
+        counts = build_bundle(path, packs)
+        print(f"[Content] Built {path}: " + ", ".join(f"{n} {c}" for n, c in counts.items()))
+        buf = _map(path)
+        header, base = _read_header(buf)
+    return {name: ContentPack(name, buf, base + header["packs"][name][0], header["packs"][name][1])
+            for name in packs if name in header["packs"]}
+
+
+if __name__ == "__main__":
+    counts = build_bundle()
+    print(f"[Content] Built {BUNDLE_FILE}: " + ", ".join(f"{n} {c}" for n, c in counts.items())
+          + f" ({os.path.getsize(BUNDLE_FILE)} bytes)")
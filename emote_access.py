@@ -0,0 +1,148 @@
+"""
+emote_access.py — Which emotes each user can actually play.
+
+Random loops drew from every emote and the dance beat sent one random emote
+to every dancer, but most paid emotes are not owned by most users, so a
+large share of send_emote calls failed — the loop silently retried, the beat
+dropped the dancer from the floor.
+
+EmoteAccess remembers failures per user instead:
+
+  * a send that fails because the user cannot play the emote ("not owned",
+    "not available", ...) puts it in the user's negative cache until it
+    expires (`ttl`; a failed *free* emote only for `free_ttl`, since
+    everyone owns those and the cause was likely something else)
+  * rate limits, connection errors and any error not recognised as one of
+    these are not the user's fault and are not recorded; "not in room"
+    means the user is gone
+  * the free flag is the prior: a free emote is assumed playable, a paid one
+    is weighted by the user's paid success rate so far (Laplace-smoothed,
+    1/2 for someone we know nothing about)
+  * pick() draws one emote for a user, pick_common() one emote for a group
+    (the dance beat), only from emotes not known to fail
+
+Entries expire lazily; prune() drops expired entries and empty users.
+"""
+
+import random
+import time
+
+DENIED_ERRORS = ("not owned", "not available", "not unlocked", "don't own", "do not own",
+                 "does not own", "doesn't own", "invalid emote", "emote not found", "unknown emote")
+GONE_ERRORS = ("not in room", "user not found", "not in the room")
+
+# classify() results
+DENIED, TRANSIENT, GONE = "denied", "transient", "gone"
+
+
+class _UserAccess:
+    __slots__ = ("failed", "paid_ok", "paid_failed")
+
+    def __init__(self):
+        self.failed = {}              # {emote_id: expires_at (time.monotonic())}
+        self.paid_ok = 0
+        self.paid_failed = 0
+
+
+class EmoteAccess:
+    def __init__(self, ttl: float = 1800.0, free_ttl: float = 120.0):
+        self.ttl = ttl
+        self.free_ttl = free_ttl
+        self._users = {}              # {user_id: _UserAccess}
+        self.denied = 0               # Failures recorded
+        self.avoided = 0              # Candidate emotes skipped as cached failures
+
+    @staticmethod
+    def classify(error) -> str:
+        """DENIED only for errors that say the user can't play the emote —
+        anything unrecognised (rate limits, server errors) is TRANSIENT."""
+        text = str(error).lower()
+        if any(s in text for s in GONE_ERRORS):
+            return GONE
+        if any(s in text for s in DENIED_ERRORS):
+            return DENIED
+        return TRANSIENT
+
+    # ── Recording ───────────────────────────────────────────────────
+    def record_failure(self, user_id: str, emote, error) -> str:
+        """Note a failed send of `emote` (an Emote record); returns classify(error)."""
+        kind = self.classify(error)
+        if kind != DENIED:
+            return kind
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = _UserAccess()
+        user.failed[emote.id] = time.monotonic() + (self.free_ttl if emote.free else self.ttl)
+        if not emote.free:
+            user.paid_failed += 1
+        self.denied += 1
+        return kind
+
+    def record_success(self, user_id: str, emote):
+        user = self._users.get(user_id)
+        if user is None:
+            if emote.free:
+                return                # Nothing learned — free emotes are assumed anyway
+            user = self._users[user_id] = _UserAccess()
+        user.failed.pop(emote.id, None)
+        if not emote.free:
+            user.paid_ok += 1
+
+    def forget(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    # ── Queries ─────────────────────────────────────────────────────
+    def chance(self, user_id: str, emote) -> float:
+        """Estimated probability that `user_id` can play `emote` (0 if cached as failing)."""
+        user = self._users.get(user_id)
+        if user is not None:
+            expires = user.failed.get(emote.id)
+            if expires is not None:
+                if time.monotonic() < expires:
+                    return 0.0
+                del user.failed[emote.id]
+        if emote.free:
+            return 1.0
+        if user is None:
+            return 0.5
+        return (user.paid_ok + 1) / (user.paid_ok + user.paid_failed + 2)
+
+    def can_play(self, user_id: str, emote) -> bool:
+        return self.chance(user_id, emote) > 0.0
+
+    def pick(self, user_id: str, emotes):
+        """A random emote from `emotes` weighted by chance(); None if all are cached as failing."""
+        return self.pick_common((user_id,), emotes)
+
+    def pick_common(self, user_ids, emotes):
+        """A random emote every user in `user_ids` is likely to play (weights multiplied)."""
+        if not any(uid in self._users for uid in user_ids):
+            weights = [1.0 if e.free else 0.5 ** len(user_ids) for e in emotes]
+        else:
+            weights = []
+            for emote in emotes:
+                weight = 1.0
+                for uid in user_ids:
+                    weight *= self.chance(uid, emote)
+                    if not weight:
+                        self.avoided += 1
+                        break
+                weights.append(weight)
+        if not any(weights):
+            return None
+        return random.choices(emotes, weights=weights)[0]
+
+    # ── Upkeep ──────────────────────────────────────────────────────
+    def prune(self):
+        now = time.monotonic()
+        for uid, user in list(self._users.items()):
+            user.failed = {eid: exp for eid, exp in user.failed.items() if exp > now}
+            if not user.failed and not user.paid_ok and not user.paid_failed:
+                del self._users[uid]
+
+    def __len__(self):
+        return sum(len(u.failed) for u in self._users.values())
+
+    def stats(self) -> dict:
+        return {"users": len(self._users), "cached": len(self), "denied": self.denied,
+                "avoided": self.avoided}
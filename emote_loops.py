@@ -0,0 +1,179 @@
+"""
+emote_loops.py — One timing-wheel driver for every per-user emote loop.
+
+`loop N` and `random` used to start a coroutine per user that slept for the
+emote's duration and polled a looping_users flag, so 50 looping users meant
+50 unsynchronized timers, and stopping a loop was a 0.3 s sleep-and-check
+race against the coroutine's next wake-up.
+
+EmoteLoops keeps every active loop in a hashed timing wheel driven by a
+single task:
+
+  * the wheel has `slots` buckets of `tick` seconds; a loop sits in the
+    bucket of its next fire time (with a lap counter for long delays)
+  * start() and stop() are O(1) dict operations — a stopped loop is gone
+    immediately and can never fire again
+  * every tick the driver collects all loops that fell due together and
+    sends their emotes as one batch (asyncio.gather)
+  * a failed send is classified (see emote_access.py): a user who left
+    stops the loop; a rate limit or connection error retries after
+    RETRY_DELAY; an emote the user can't play drops a fixed loop, while a
+    random loop tries another one on the next tick — pick(user_id) knows
+    which emotes the user failed to play
+
+The driver sleeps on an Event while no loop is active.
+"""
+
+import asyncio
+import math
+import time
+
+from emote_access import DENIED, GONE, EmoteAccess
+
+RETRY_DELAY = 2.0   # Seconds before retrying while disconnected or after a transient error
+
+
+class _Loop:
+    __slots__ = ("user_id", "emote_id", "duration", "slot", "laps", "fired", "started")
+
+    def __init__(self, user_id, emote_id, duration):
+        self.user_id = user_id
+        self.emote_id = emote_id      # None = random emote every cycle
+        self.duration = duration
+        self.slot = None
+        self.laps = 0
+        self.fired = 0
+        self.started = time.time()
+
+
+class EmoteLoops:
+    def __init__(self, send, pick, delay, ready=None, classify=None, tick: float = 0.1,
+                 slots: int = 512):
+        self._send = send             # async (emote_id, user_id)
+        self._pick = pick             # (user_id) → (emote_id, duration) for random loops
+        self._delay = delay           # (emote_id, duration) → seconds until the next send
+        self._ready = ready or (lambda: True)
+        self._classify = classify or EmoteAccess.classify  # (error) → DENIED / TRANSIENT / GONE
+        self.tick = tick
+        self._wheel = [{} for _ in range(slots)]   # [{user_id: _Loop}]
+        self._loops = {}              # {user_id: _Loop}
+        self._cursor = 0              # Last processed slot
+        self._wakeup = asyncio.Event()
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    # ── Control ─────────────────────────────────────────────────────
+    def start(self, user_id, emote_id=None, duration: float = 0.0) -> bool:
+        """Loop `emote_id` (or random emotes) for a user. False if already looping."""
+        if user_id in self._loops:
+            return False
+        loop = _Loop(user_id, emote_id, duration)
+        self._loops[user_id] = loop
+        self._schedule(loop, 0.0)
+        self._wakeup.set()
+        return True
+
+    def stop(self, user_id) -> bool:
+        loop = self._loops.pop(user_id, None)
+        if loop is None:
+            return False
+        self._wheel[loop.slot].pop(user_id, None)
+        return True
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._loops
+
+    def __len__(self):
+        return len(self._loops)
+
+    def _schedule(self, loop: _Loop, delay: float):
+        ticks = max(1, math.ceil(delay / self.tick))
+        slots = len(self._wheel)
+        loop.slot = (self._cursor + ticks) % slots
+        loop.laps = (ticks - 1) // slots
+        self._wheel[loop.slot][loop.user_id] = loop
+
+    # ── Driver ──────────────────────────────────────────────────────
+    def _advance(self) -> list:
+        """Move the cursor one slot; return the loops due in it."""
+        self._cursor = (self._cursor + 1) % len(self._wheel)
+        bucket = self._wheel[self._cursor]
+        due = []
+        for loop in list(bucket.values()):
+            if loop.laps:
+                loop.laps -= 1
+            else:
+                del bucket[loop.user_id]
+                due.append(loop)
+        return due
+
+    async def _fire(self, due: list):
+        if not self._ready():
+            for loop in due:
+                self._schedule(loop, RETRY_DELAY)
+            return
+        picks = []
+        for loop in due:
+            if loop.emote_id is None:
+                picks.append(self._pick(loop.user_id))
+            else:
+                picks.append((loop.emote_id, loop.duration))
+        results = await asyncio.gather(*(self._send(emote_id, loop.user_id)
+                                         for loop, (emote_id, _) in zip(due, picks)),
+                                       return_exceptions=True)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(due))
+        for loop, (emote_id, duration), result in zip(due, picks, results):
+            if self._loops.get(loop.user_id) is not loop:
+                continue  # Stopped (or restarted) while the batch was in flight
+            if isinstance(result, Exception):
+                self.failed += 1
+                kind = self._classify(result)
+                if kind == DENIED and loop.emote_id is None:
+                    self._schedule(loop, 0.0)   # Not owned — try another one next tick
+                elif kind == DENIED or kind == GONE:
+                    print(f"[Loops] Emote loop for {loop.user_id} stopped: {result}")
+                    del self._loops[loop.user_id]
+                else:
+                    self._schedule(loop, RETRY_DELAY)  # Rate limit / connection — don't hammer it
+                continue
+            self.sent += 1
+            loop.fired += 1
+            self._schedule(loop, self._delay(emote_id, duration))
+
+    async def run(self):
+        """Drive every loop — start once as a background task."""
+        next_tick = time.monotonic()
+        while True:
+            try:
+                if not self._loops:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    next_tick = time.monotonic()
+                next_tick += self.tick
+                await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+                # Catch up on every slot that passed while we were busy or late
+                due = []
+                behind = 0
+                while next_tick + self.tick <= time.monotonic() and behind < len(self._wheel):
+                    due += self._advance()
+                    next_tick += self.tick
+                    behind += 1
+                due += self._advance()
+                if due:
+                    await self._fire(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Loops] Driver error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._loops),
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+        }
@@ -1,3 +1,23 @@
+"""
+emotes.py — The emote table and the catalog built from it once at import.
+
+EMOTE_DICT is the hand-maintained table: display name → [emote id, duration
+in seconds, free]. Its order is the order of the "N" / "loop N" chat numbers.
+
+CATALOG is the read-only view everything else uses, so no caller scans or
+re-derives the table at run time:
+
+  * one Emote tuple per entry (number, name, id, duration, free, tags,
+    loop_delay)
+  * loop_delay — seconds until a looped emote is re-sent, precomputed
+  * by_id / by_name lookups, and tagged("dance" | "idle" | "floor"),
+    free / paid tuples for random picks
+  * number(n) — the emote a chat number refers to
+"""
+
+from types import MappingProxyType
+from typing import NamedTuple
+
 EMOTE_DICT = {
    "Zombie": ["idle_zombie", 28.75, False],
    "Relaxed": ["sit-relaxed", 29.89, False],
@@ -184,4 +204,98 @@ EMOTE_DICT = {
    "Wop Dance": ["dance-tiktok11", 11.00, True],
    "Cute Salute": ["emote-cutesalute", 3.00, True],
    "At Attention": ["emote-salute", 3.00, True]
-    }
\ No newline at end of file
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  CATALOG
+# ─────────────────────────────────────────────────────────────────────
+# Emotes that have a visible stand-up/reset at the end — re-trigger aggressively early
+FLOOR_EMOTES = frozenset({
+    "idle-floorsleeping",   # Cozy Nap
+    "idle-floorsleeping2",  # Relaxing
+    "idle_layingdown",      # Attentive
+    "sit-relaxed",          # Relaxed
+    "idle-loop-sitfloor",   # Sit
+    "idle-toilet",          # Toilet
+    "idle_zombie",          # Zombie
+    "idle-nervous",         # Nervous
+    "idle_singing",         # Singing
+    "idle-loop-sad",        # Bummed
+    "idle-loop-happy",      # Chillin'
+    "idle-loop-annoyed",    # Annoyed
+    "idle-loop-aerobics",   # Aerobics
+    "idle-loop-tired",      # Sleepy
+    "idle-loop-tapdance",   # Tap Loop
+    "idle-dance-casual",    # Casual Dance
+    "idle-guitar",          # Air Guitar
+    "idle-uwu",             # UwU
+    "idle-dance-tiktok4",   # TikTok Dance 4
+    "idle-wild",            # Scritchy
+})
+
+TAGS = ("dance", "idle", "floor")
+
+
+def loop_delay(emote_id: str, duration: float) -> float:
+    """Seconds between sends when looping an emote.
+    Floor/idle emotes have a visible stand-up at the end — re-trigger 2.5s
+    early to cut off the reset animation. Regular emotes just need a small
+    0.4s overlap."""
+    if emote_id in FLOOR_EMOTES:
+        return max(duration - 2.5, 0.8)
+    return max(duration - 0.4, 0.8)
+
+
+def _tags(emote_id: str) -> frozenset:
+    tags = set()
+    if "dance" in emote_id:
+        tags.add("dance")
+    if emote_id.startswith(("idle", "sit")):
+        tags.add("idle")
+    if emote_id in FLOOR_EMOTES:
+        tags.add("floor")
+    return frozenset(tags)
+
+
+class Emote(NamedTuple):
+    number: int             # 1-based chat number ("12" / "loop 12")
+    name: str
+    id: str
+    duration: float
+    free: bool
+    tags: frozenset
+    loop_delay: float
+
+
+class EmoteCatalog:
+    __slots__ = ("all", "by_id", "by_name", "free", "paid", "_by_tag")
+
+    def __init__(self, table: dict):
+        emotes = []
+        for number, (name, (emote_id, duration, free)) in enumerate(table.items(), 1):
+            duration = float(duration)
+            emotes.append(Emote(number, name, emote_id, duration, bool(free),
+                                _tags(emote_id), loop_delay(emote_id, duration)))
+        self.all = tuple(emotes)                 # Index n-1 = chat number n
+        self.by_id = MappingProxyType({e.id: e for e in emotes})
+        self.by_name = MappingProxyType({e.name: e for e in emotes})
+        self.free = tuple(e for e in emotes if e.free)
+        self.paid = tuple(e for e in emotes if not e.free)
+        self._by_tag = MappingProxyType({t: tuple(e for e in emotes if t in e.tags) for t in TAGS})
+
+    def __len__(self):
+        return len(self.all)
+
+    def __iter__(self):
+        return iter(self.all)
+
+    def number(self, n: int):
+        """The emote for chat number n (1-based), or None."""
+        return self.all[n - 1] if 1 <= n <= len(self.all) else None
+
+    def tagged(self, tag: str) -> tuple:
+        return self._by_tag.get(tag, ())
+
+
+CATALOG = EmoteCatalog(EMOTE_DICT)
@@ -0,0 +1,274 @@
+"""
+jobs.py — Resumable background jobs for bulk actions (!tipall, !hearts).
+
+!tipall used to tip users one by one inside on_chat, with a chat line and a
+0.8 s sleep per recipient, so a full room kept the handler busy for minutes,
+and a disconnect halfway left no record of who had already been paid.
+A bulk action is now a Job run in the background by a JobRunner:
+
+  * recipients are processed by `concurrency` workers per job, each step
+    optionally followed by a `pace` sleep
+  * progress is reported once every `batch` recipients and at the end,
+    not once per recipient
+  * the job list is checkpointed to chikha_jobs.json. For exactly_once
+    kinds (tips) a recipient is written as "in flight" *before* its step
+    runs, so a restart never repeats a step whose outcome is unknown —
+    such recipients are reported as uncertain instead of retried
+  * resume() restarts unfinished jobs after a restart; cancel() stops a
+    job from taking new recipients (steps already in flight finish)
+
+A step raising JobAbort stops the whole job (e.g. unsupported tip amount);
+any other exception only marks that recipient as failed. If the in-flight
+checkpoint of an exactly_once job cannot be written, the job is aborted
+before the step runs and the recipient goes back to pending — an
+unrecorded tip could be paid again after a restart.
+"""
+
+import asyncio
+import time
+
+from persistence import load_data, save_data
+
+JOBS_FILE = "chikha_jobs.json"
+
+# Job states
+RUNNING, CANCELLING, DONE, CANCELLED, ABORTED = "running", "cancelling", "done", "cancelled", "aborted"
+FINISHED = (DONE, CANCELLED, ABORTED)
+
+
+class JobAbort(Exception):
+    """Raised by a step to stop the whole job."""
+
+
+class JobKind:
+    __slots__ = ("name", "step", "report", "concurrency", "pace", "batch", "exactly_once")
+
+    def __init__(self, name, step, report, concurrency=1, pace=0.0, batch=10, exactly_once=False):
+        self.name = name
+        self.step = step                  # async (job, user_id, username) → None
+        self.report = report              # (job, final) → None, sends progress
+        self.concurrency = concurrency
+        self.pace = pace
+        self.batch = batch
+        self.exactly_once = exactly_once
+
+
+class Job:
+    __slots__ = ("id", "kind", "owner", "params", "total", "pending", "inflight",
+                 "done", "failed", "uncertain", "status", "error", "created", "updated",
+                 "task", "_reported")
+
+    def __init__(self, job_id, kind, owner, params, targets):
+        self.id = job_id
+        self.kind = kind
+        self.owner = owner                # Username that started the job
+        self.params = dict(params)        # e.g. {"amount": 5}
+        self.total = len(targets)
+        self.pending = [list(t) for t in targets]  # [[user_id, username]] still to do
+        self.inflight = {}                # {user_id: username} step running right now
+        self.done = []                    # [[user_id, username]]
+        self.failed = []
+        self.uncertain = []               # In flight when the bot stopped — not retried
+        self.status = RUNNING
+        self.error = None
+        self.created = self.updated = time.time()
+        self.task = None
+        self._reported = 0
+
+    @property
+    def processed(self) -> int:
+        return len(self.done) + len(self.failed) + len(self.uncertain)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "kind": self.kind, "owner": self.owner, "params": self.params,
+            "total": self.total, "pending": self.pending,
+            "inflight": [[uid, name] for uid, name in self.inflight.items()],
+            "done": self.done, "failed": self.failed, "uncertain": self.uncertain,
+            "status": self.status, "error": self.error,
+            "created": self.created, "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Job":
+        job = cls(d["id"], d["kind"], d.get("owner"), d.get("params") or {}, d.get("pending") or [])
+        job.total = d.get("total", job.total)
+        job.done = d.get("done") or []
+        job.failed = d.get("failed") or []
+        # Whatever was in flight when the process died may or may not have happened
+        job.uncertain = (d.get("uncertain") or []) + (d.get("inflight") or [])
+        job.status = d.get("status", RUNNING)
+        job.error = d.get("error")
+        job.created = d.get("created", job.created)
+        job.updated = d.get("updated", job.updated)
+        job._reported = job.processed
+        return job
+
+    def summary(self) -> str:
+        return (f"#{self.id} {self.kind} {self.status} {self.processed}/{self.total}"
+                + (f" ✗{len(self.failed)}" if self.failed else "")
+                + (f" ?{len(self.uncertain)}" if self.uncertain else ""))
+
+
+class JobRunner:
+    def __init__(self, path: str = JOBS_FILE, ready=None, history: int = 10):
+        self.path = path
+        self._ready = ready or (lambda: True)  # () → False while disconnected
+        self.history = history
+        self.failures = 0                     # Failed steps, aborted checkpoints, crashes — never pruned
+        self._kinds = {}
+        self._jobs = {}                       # {id: Job}, unfinished + recent history
+        self._save_lock = asyncio.Lock()
+        saved = load_data(path)
+        self._next_id = saved.get("next_id", 1)
+        for d in saved.get("jobs", []):
+            try:
+                job = Job.from_dict(d)
+            except (KeyError, TypeError) as e:
+                print(f"[Jobs] Skipping unreadable checkpoint entry: {e}")
+                continue
+            self._jobs[job.id] = job
+
+    def register(self, name, step, report, **options) -> JobKind:
+        kind = JobKind(name, step, report, **options)
+        self._kinds[name] = kind
+        return kind
+
+    # ── Checkpoint ──────────────────────────────────────────────────
+    def _snapshot(self) -> dict:
+        return {
+            "next_id": self._next_id,
+            "jobs": [j.to_dict() for j in self._jobs.values() if j.status not in FINISHED],
+        }
+
+    async def _save(self):
+        """Write the checkpoint; raises if it could not be written."""
+        async with self._save_lock:
+            await asyncio.to_thread(save_data, self._snapshot(), self.path)
+
+    async def _try_save(self):
+        """Best-effort checkpoint — a failure is logged, the next save catches up."""
+        try:
+            await self._save()
+        except Exception as e:
+            print(f"[Jobs] Checkpoint failed: {e}")
+
+    def save_sync(self):
+        save_data(self._snapshot(), self.path)
+
+    # ── Control ─────────────────────────────────────────────────────
+    def start(self, kind: str, owner: str, targets, params=None) -> Job:
+        """Start a job over `targets` ([(user_id, username)]) and return it."""
+        job = Job(self._next_id, kind, owner, params or {}, targets)
+        self._next_id += 1
+        self._jobs[job.id] = job
+        self._launch(job)
+        return job
+
+    def resume(self) -> list:
+        """Restart every unfinished job loaded from the checkpoint."""
+        resumed = []
+        for job in list(self._jobs.values()):
+            if job.status in FINISHED or job.task is not None:
+                continue
+            if job.kind not in self._kinds:
+                print(f"[Jobs] Unknown job kind '{job.kind}' for #{job.id} — dropped")
+                job.status = ABORTED
+                continue
+            if job.status == CANCELLING:
+                job.status = CANCELLED
+                continue
+            self._launch(job)
+            resumed.append(job)
+        return resumed
+
+    def cancel(self, job_id: int) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status != RUNNING:
+            return False
+        job.status = CANCELLING
+        return True
+
+    def get(self, job_id: int):
+        return self._jobs.get(job_id)
+
+    def active(self) -> list:
+        return [j for j in self._jobs.values() if j.status not in FINISHED]
+
+    def __iter__(self):
+        return iter(sorted(self._jobs.values(), key=lambda j: j.id))
+
+    # ── Execution ───────────────────────────────────────────────────
+    def _launch(self, job: Job):
+        job.task = asyncio.create_task(self._run(job, self._kinds[job.kind]))
+
+    async def _run(self, job: Job, kind: JobKind):
+        await self._try_save()
+
+        async def worker():
+            while job.pending and job.status == RUNNING:
+                if not self._ready():
+                    await asyncio.sleep(2)
+                    continue
+                uid, uname = job.pending.pop(0)
+                job.inflight[uid] = uname
+                if kind.exactly_once:
+                    try:
+                        await self._save()
+                    except Exception as e:
+                        # No durable record of this step — don't run it
+                        job.inflight.pop(uid, None)
+                        job.pending.insert(0, [uid, uname])
+                        self.failures += 1
+                        if job.status in (RUNNING, CANCELLING):
+                            job.status, job.error = ABORTED, f"checkpoint failed: {e}"
+                        print(f"[Jobs] #{job.id} {job.kind} aborted, checkpoint failed: {e}")
+                        break
+                try:
+                    await kind.step(job, uid, uname)
+                    job.done.append([uid, uname])
+                except JobAbort as e:
+                    job.pending.insert(0, [uid, uname])
+                    job.status, job.error = ABORTED, str(e)
+                except Exception as e:
+                    job.failed.append([uid, uname])
+                    self.failures += 1
+                    print(f"[Jobs] #{job.id} {job.kind} failed for {uname}: {e}")
+                finally:
+                    job.inflight.pop(uid, None)
+                    job.updated = time.time()
+                if job.processed - job._reported >= kind.batch:
+                    job._reported = job.processed
+                    self._report(job, kind, final=False)
+                    if not kind.exactly_once:
+                        await self._try_save()
+                if kind.pace:
+                    await asyncio.sleep(kind.pace)
+
+        try:
+            workers = max(1, min(kind.concurrency, len(job.pending)))
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        except Exception as e:
+            job.status, job.error = ABORTED, str(e)
+            self.failures += 1
+            print(f"[Jobs] #{job.id} {job.kind} crashed: {e}")
+        if job.status == RUNNING:
+            job.status = DONE
+        elif job.status == CANCELLING:
+            job.status = CANCELLED
+        job.updated = time.time()
+        job.task = None
+        self._report(job, kind, final=True)
+        self._prune()
+        await self._try_save()
+
+    def _report(self, job: Job, kind: JobKind, final: bool):
+        try:
+            kind.report(job, final)
+        except Exception as e:
+            print(f"[Jobs] Report failed for #{job.id}: {e}")
+
+    def _prune(self):
+        finished = [j for j in self if j.status in FINISHED]
+        for job in finished[:-self.history or None]:
+            del self._jobs[job.id]
@@ -0,0 +1,217 @@
+"""
+leaderboard.py — Incrementally maintained top-N boards.
+
+!lb / !tiplb / !pointslist / !time used to walk the whole table, filter it
+through _is_excluded_from_lb, sort it and rebuild the colored chunks on every
+request. A TopN keeps the best `capacity` rows of one table sorted as values
+change, so a read is O(k), and memoizes rendered chat chunks under a version
+counter, so asking again before anything moved costs nothing.
+
+Writers call update(key, value) after changing the table. Values in this bot
+almost only go up (points, tips, time), which TopN handles in O(capacity).
+A member dropping below the board's floor, or a deleted row, marks the board
+stale; it is rebuilt from the source table's top() on the next read.
+
+RankIndex answers "what position is this user" for the whole table (!rank,
+!stats) with a Fenwick tree over point values, in O(log n) per update/query.
+"""
+
+import bisect
+
+
+class TopN:
+    def __init__(self, source, capacity: int = 25, field=None):
+        self.source = source      # Table exposing top(k, field=..., exclude=...)
+        self.capacity = capacity
+        self.field = field        # Nested row field for stats-style tables
+        self.version = 0
+        self._rows = []           # [(-value, key)] sorted best first
+        self._values = {}         # {key: value} for rows on the board
+        self._stale = True
+        self._rendered = {}       # {name: (version, chunks)}
+
+    # ── Writes ──────────────────────────────────────────────────────
+    def update(self, key, value):
+        """Record that `key` now has `value` in the source table."""
+        if self._stale:
+            return  # Next read rebuilds from the table anyway
+        old = self._values.get(key)
+        if old == value:
+            return
+        full = len(self._rows) >= self.capacity
+        if old is not None:
+            floor = -self._rows[-1][0]
+            self._rows.pop(bisect.bisect_left(self._rows, (-old, key)))
+            del self._values[key]
+            if full and value < floor:
+                # Rows outside the board may now outrank it — can't tell without a scan
+                self.invalidate()
+                return
+        elif full and value <= -self._rows[-1][0]:
+            return  # Not good enough for the board
+        bisect.insort(self._rows, (-value, key))
+        self._values[key] = value
+        if len(self._rows) > self.capacity:
+            _, dropped = self._rows.pop()
+            del self._values[dropped]
+        self.version += 1
+
+    def remove(self, key):
+        """`key` was deleted from the source table."""
+        if key in self._values:
+            self.invalidate()
+
+    def reset(self):
+        """The source table was cleared."""
+        self._rows, self._values = [], {}
+        self._stale = False
+        self.version += 1
+
+    def invalidate(self):
+        self._stale = True
+        self.version += 1
+
+    # ── Reads ───────────────────────────────────────────────────────
+    def _rebuild(self):
+        pairs = self.source.top(self.capacity, field=self.field) if self.field \
+            else self.source.top(self.capacity)
+        self._rows = sorted((-value, key) for key, value in pairs)
+        self._values = {key: value for key, value in pairs}
+        self._stale = False
+
+    def top(self, k: int, exclude=None) -> list:
+        """Best k (key, value) pairs, skipping keys where exclude(key) is true."""
+        if self._stale:
+            self._rebuild()
+        out = []
+        for neg, key in self._rows:
+            if exclude is None or not exclude(key):
+                out.append((key, -neg))
+                if len(out) == k:
+                    return out
+        if len(self._rows) >= self.capacity:
+            # Exclusions ate into the board — ask the table directly
+            if self.field:
+                return self.source.top(k, field=self.field, exclude=exclude)
+            return self.source.top(k, exclude=exclude)
+        return out
+
+    def render(self, name: str, build) -> list:
+        """Chat chunks from build(), cached until the board changes."""
+        if self._stale:
+            self._rebuild()
+        cached = self._rendered.get(name)
+        if cached and cached[0] == self.version:
+            return cached[1]
+        chunks = build()
+        self._rendered[name] = (self.version, chunks)
+        return chunks
+
+
+class RankIndex:
+    """Order statistics over integer scores: rank-of-key and percentile.
+
+    Scores below `limit` are counted in a Fenwick tree with one bucket per
+    point value; the few scores at or above it live in a sorted list. Both
+    give "how many keys score higher" in logarithmic time. Only counts are
+    kept — a key's own score is read from `source` (the table being ranked),
+    and writers pass the score a key had before the change.
+    """
+
+    def __init__(self, source, limit: int = 16384, exclude=None):
+        self.source = source             # Mapping key → score (the ranked table)
+        self.limit = limit
+        self.exclude = exclude
+        self._tree = [0] * (limit + 1)   # 1-based Fenwick over scores 0..limit-1
+        self._high = []                  # Sorted scores >= limit
+        self._count = 0                  # Ranked keys
+
+    # ── Fenwick helpers ─────────────────────────────────────────────
+    def _add(self, score: int, delta: int):
+        self._count += delta
+        if score >= self.limit:
+            if delta > 0:
+                bisect.insort(self._high, score)
+            else:
+                self._high.pop(bisect.bisect_left(self._high, score))
+            return
+        i = score + 1
+        while i <= self.limit:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, score: int) -> int:
+        """Keys with a score <= `score`, for score < limit."""
+        i, total = score + 1, 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _excluded(self, key) -> bool:
+        return self.exclude is not None and self.exclude(key)
+
+    # ── Writes ──────────────────────────────────────────────────────
+    def update(self, key, score, old=None):
+        """`key` now scores `score`; `old` is its previous score (None if new)."""
+        if self._excluded(key):
+            return
+        score = max(0, int(score))
+        if old is not None:
+            old = max(0, int(old))
+            if old == score:
+                return
+            self._add(old, -1)
+        self._add(score, 1)
+
+    def remove(self, key, old):
+        """`key`, which scored `old`, was deleted from the table."""
+        if old is not None and not self._excluded(key):
+            self._add(max(0, int(old)), -1)
+
+    def reset(self):
+        self._tree = [0] * (self.limit + 1)
+        self._high = []
+        self._count = 0
+
+    def load(self, pairs):
+        """Rebuild from (key, score) pairs in O(n + limit); `pairs` is only iterated."""
+        self.reset()
+        for key, score in pairs:
+            if self._excluded(key):
+                continue
+            score = max(0, int(score))
+            self._count += 1
+            if score >= self.limit:
+                self._high.append(score)
+            else:
+                self._tree[score + 1] += 1
+        self._high.sort()
+        for i in range(1, self.limit + 1):  # Linear-time Fenwick construction
+            parent = i + (i & -i)
+            if parent <= self.limit:
+                self._tree[parent] += self._tree[i]
+
+    # ── Reads ───────────────────────────────────────────────────────
+    def __len__(self):
+        return self._count
+
+    def rank(self, key):
+        """1-based position of `key` (ties share the best position), or None."""
+        score = self.source.get(key)
+        if score is None or self._excluded(key):
+            return None
+        score = max(0, int(score))
+        if score >= self.limit:
+            higher = len(self._high) - bisect.bisect_right(self._high, score)
+        else:
+            low_total = self._count - len(self._high)
+            higher = len(self._high) + low_total - self._count_at_most(score)
+        return higher + 1
+
+    def percentile(self, key):
+        """Share of ranked keys at or above `key`, in percent — "top 3%"."""
+        position = self.rank(key)
+        if position is None:
+            return None
+        return 100.0 * position / self._count
@@ -0,0 +1,134 @@
+"""
+loop_watchdog.py — Event-loop stall detector that names the blocking code.
+
+LoopLagProbe (metrics.py) tells us *that* the loop was late, but only after
+it has woken up again, when the code that blocked it is long gone. Saves are
+off the loop (_persist only marks the writer dirty; json.dump runs in a
+worker thread), but the journal flush, the snapshot copy, leaderboard and
+command-reply string building and every handler's own code still run on the
+loop thread, so a stall can come from anywhere.
+
+LoopWatchdog is a LoopLagProbe with a helper thread:
+
+  * the probe task publishes when it expects to wake up next
+  * the thread checks that deadline every threshold/4 seconds; once the
+    loop is more than `threshold` seconds late it is blocked right now, so
+    the thread grabs the loop thread's Python stack (sys._current_frames)
+    and the task being run (asyncio.current_task), with the chain of
+    coroutines it is awaiting — e.g. Scheduler._run_async → MyBot.dance_beat
+  * one report per stall; when the loop comes back the total stall time is
+    logged and the stall is kept in `recent` (and counted for /metrics)
+
+The thread only reads; it never touches the loop or its tasks.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import LoopLagProbe
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _coro_chain(task) -> str:
+    """Qualnames of the coroutines a task is awaiting, outermost first."""
+    names = []
+    coro = task.get_coro() if task is not None else None
+    while coro is not None and len(names) < 8:
+        names.append(getattr(coro, "__qualname__", type(coro).__name__))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return " → ".join(names)
+
+
+def _where(stack) -> str:
+    """Deepest frame in the bot's own files — the line to go and fix."""
+    for frame in reversed(stack):
+        if frame.filename.startswith(BOT_DIR):
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+    return "?"
+
+
+class Stall:
+    __slots__ = ("at", "lag", "task", "chain", "where", "stack")
+
+    def __init__(self, task, chain, where, stack):
+        self.at = time.time()
+        self.lag = 0.0                # Filled in when the loop wakes up again
+        self.task = task
+        self.chain = chain
+        self.where = where
+        self.stack = stack
+
+
+class LoopWatchdog(LoopLagProbe):
+    def __init__(self, threshold: float = 0.5, interval: float = 0.25,
+                 depth: int = 12, keep: int = 20):
+        super().__init__(interval)
+        self.threshold = threshold
+        self.depth = depth            # Stack frames logged per stall
+        self.recent = deque(maxlen=keep)
+        self.stalls = 0
+        self._due = None              # time.monotonic() the probe should wake up by
+        self._pending = None          # Stall captured by the thread, not yet closed
+        self._loop = None
+        self._loop_thread = None
+        self._thread = None
+
+    # ── Loop side ───────────────────────────────────────────────────
+    async def run(self):
+        """Probe the loop and start the watchdog thread — start once as a task."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._thread.start()
+        while True:
+            start = time.monotonic()
+            self._due = start + self.interval
+            await asyncio.sleep(self.interval)
+            self._due = None
+            self.lag = max(0.0, time.monotonic() - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            stall, self._pending = self._pending, None
+            if stall is not None:
+                stall.lag = self.lag
+                self.recent.append(stall)
+                print(f"[Watchdog] Loop unblocked after {stall.lag:.2f}s ({stall.where})")
+
+    # ── Helper thread ───────────────────────────────────────────────
+    def _watch(self):
+        while True:
+            time.sleep(self.threshold / 4)
+            due = self._due
+            if due is None or self._pending is not None:
+                continue
+            late = time.monotonic() - due
+            if late > self.threshold:
+                try:
+                    self._capture(late)
+                except Exception as e:
+                    print(f"[Watchdog] Could not capture stall: {e}")
+
+    def _capture(self, late: float):
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        # The event loop's own frames are the same in every report
+        stack = [f for f in stack if not f.filename.startswith(ASYNCIO_DIR)][-self.depth:]
+        task = asyncio.current_task(self._loop)
+        name = task.get_name() if task is not None else "(loop callback)"
+        stall = Stall(name, _coro_chain(task), _where(stack), stack)
+        self._pending = stall
+        self.stalls += 1
+        print(f"[Watchdog] Loop blocked {late:.2f}s+ in task {name}"
+              + (f" [{stall.chain}]" if stall.chain else "") + f" at {stall.where}")
+        for line in traceback.format_list(stack):
+            print("[Watchdog]   " + line.rstrip().replace("\n", "\n[Watchdog]   "))
@@ -3,12 +3,30 @@ import random
 import re
 import time
 import json
-import os
+import signal
 import sys
+import atexit
 from datetime import datetime, timedelta
 from highrise import BaseBot, Position, AnchorPosition
-from highrise.models import SessionMetadata, User, CurrencyItem, Item
-from emotes import EMOTE_DICT
+from highrise.models import SessionMetadata, User, CurrencyItem, Item, Error
+from emotes import CATALOG, loop_delay
+from storage import open_storage
+from leaderboard import RankIndex, TopN
+from commands import CommandRegistry, MOD, OWNER, REPLY
+from wordmatch import PhraseMatcher
+from outbound import Outbox, MODERATION, GAME, GREETING, ANNOUNCE
+from jobs import JobRunner, JobAbort, DONE, ABORTED
+from wallet import GoldLedger, InsufficientFunds
+from emote_loops import EmoteLoops
+from emote_access import EmoteAccess, DENIED, GONE
+from scheduler import Scheduler
+from content import open_bundle
+from textstyle import gradient_text, GRADIENT_NAMES
+from metrics import Registry
+from loop_watchdog import LoopWatchdog
+from webserver import start_async_webserver, alive_text
+from room_state import RoomState
+from zones import Zone, ZoneIndex, ZONE_KINDS
 
 # ── CONTEST DEADLINE ─────────────────────────────────────────────────
 # Contest ends 2.5 days from 2026-02-26 (deadline: 2026-02-28 ~21:46 UTC)
@@ -31,31 +49,6 @@ def get_contest_countdown() -> str:
     return " ".join(parts)
 
 
-# ─────────────────────────────────────────────────────────────────────
-#  PERSISTENCE HELPERS
-#  All data saved to bot_data.json — reloaded on every restart
-# ─────────────────────────────────────────────────────────────────────
-DATA_FILE = "chikha_data.json"  # ChikhatraX own file — separate from Sikiriti
-
-def load_data() -> dict:
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[Persistence] Could not load {DATA_FILE}: {e}")
-    return {}
-
-def save_data(data: dict):
-    try:
-        tmp = DATA_FILE + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        os.replace(tmp, DATA_FILE)
-    except Exception as e:
-        print(f"[Persistence] Could not save {DATA_FILE}: {e}")
-
-
 class MyBot(BaseBot):
     def __init__(self):
         super().__init__()
@@ -68,6 +61,11 @@ class MyBot(BaseBot):
         # ── MODERATORS ───────────────────────────────────────────────
         self.moderators = set()  # Mods have permanent VIP access
 
+        # ── ROOM STATE ───────────────────────────────────────────────
+        # Shared map of who is in the room — fed by join/leave/move events and
+        # reconciled by keep_alive. Read this instead of calling get_room_users.
+        self.room = RoomState()
+
         # ── FOLLOW ───────────────────────────────────────────────────
         self.following_user = None
         self.following_username = None
@@ -75,9 +73,7 @@ class MyBot(BaseBot):
         # ── MISC ─────────────────────────────────────────────────────
         self.custom_greetings = {}
         self.awaiting_greeting = []
-        self.looping_users = {}
-        self.user_cooldowns = {}
-        self.cooldown_seconds = 2
+        self.cooldown_seconds = 2        # Default per-user cooldown for public commands
         self.points_cooldowns = {}       # Separate cooldown just for earning points
         self.points_cooldown_seconds = 60  # 1 point max per 60 seconds from chat
         self.reaction_cooldowns = {}     # Cooldown for reaction points — 60s per user
@@ -87,18 +83,16 @@ class MyBot(BaseBot):
         self.join_points_given = set()   # Users who already got join bonus (first time only)
 
         # ── FLOOR MANAGEMENT ─────────────────────────────────────────
-        self.vip_floor = None
-        self.dance_floor = None
+        self.zones = ZoneIndex()           # All named zones (VIP, dance floors, stage, AFK, no-go…)
+        self.user_zones = {}               # {user_id: frozenset(zone names)} — last known membership
         self.users_dancing_on_floor = {}  # Track users auto-dancing on floor
         self.vip_warned = set()             # Track users already warned about VIP floor
-        self.dance_floor_emote = None     # Current shared emote — random, changes every beat
+        self.dance_floor_emote = None     # Current shared Emote — random, changes every beat
         self.dance_beat_start = 0.0       # Timestamp of last beat — new joiners wait for next beat
 
-        # Floor setup wizard state (two-point system)
-        self.floor_setup = {
-            'vip':   {'step': 0, 'point1': None},
-            'dance': {'step': 0, 'point1': None},
-        }
+        # Zone builder wizard state (two-point system)
+        # {user_id: {'name': str, 'kind': str, 'step': int, 'point1': dict | None}}
+        self.zone_setup = {}
 
         # ── VIP ACCESS SYSTEM (tiered) ───────────────────────────────
         self.vip_permanent = set()  # Permanent VIP (500g)
@@ -148,6 +142,8 @@ class MyBot(BaseBot):
             'mzn': ['<#ff8c00>Mezyan bzaf! 😊', '<#00cfff>Hamdollah! ✨'],
             'zwina': ['<#ff69b4>Nta zwina! 😊', '<#9b59b6>Nti zwin/a bzaf! ✨', '<#f1c40f>Kolchi zwina 3andkom! 💫'],
         }
+        # Whole-word trigger matcher — rebuild it if auto_responses is edited at runtime
+        self.auto_response_triggers = PhraseMatcher(self.auto_responses, whole_words=True)
 
         # ── COMPLIMENTS (Moroccan Darija) ───────────────────────────
         # ── PRESET OUTFITS (owner only — fill item IDs after running !myoutfit) ──
@@ -177,7 +173,8 @@ class MyBot(BaseBot):
         }
 
         # ── BAD WORDS FILTER (Moroccan + International) ─────────────
-        self.bad_words = [
+        # Compiled into one automaton — see wordmatch.py. add()/discard() recompile.
+        self.bad_words = PhraseMatcher([
             '97ba', '9ahba', 'qahba', 'kahba',
             'zaml', 'zamal', 'zamel', 'zeml', 'z4ml', 'z4mal',
             'fuck', 'bitch', 'whore', 'slut',
@@ -190,7 +187,7 @@ class MyBot(BaseBot):
             'shit', 'asshole',
             'nik', 'nayek', 'maniak',
             'sharmouta', 'sharmota', 'mtnayak', 'zbi','tarma','zb','9lawi','mlawi','tiz','krk','fkark','zabi','zebi','zok','mtniyak',
-        ]
+        ])
 
         # ── TRUTH OR DARE (Moroccan Darija) ─────────────────────────
         self.truths = [
@@ -207,19 +204,9 @@ class MyBot(BaseBot):
             "Chno hiya l'hobby li khassak tbd'a walakin 3ib 3lik? 🎭",
             "Mn hiya l'insana li bagha t3tazal menha f7ayatek? 👋",
         ]
-        # ── LOAD JOKES, RIDDLES, DARES FROM JSON FILES ───────────────
-        def _load_json(filename, key):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return [item[key] for item in json.load(f)]
-            except Exception as e:
-                print(f"[JSON] Could not load {filename}: {e}")
-                return []
-
-        loaded_dares   = _load_json("tahadi.json",   "dare")
-        loaded_jokes   = _load_json("nokat.json",    "joke")
-        loaded_riddles = _load_json("swalouat.json", "riddle")
-        loaded_answers = _load_json("swalouat.json", "answer")
+        # ── LOAD JOKES, RIDDLES, DARES (memory-mapped bundle, see content.py) ──
+        packs = open_bundle()
+        loaded_dares = packs.get("dares", ())
 
         # Fall back to built-in dares if JSON missing
         self.dares = loaded_dares if loaded_dares else [
@@ -228,99 +215,316 @@ class MyBot(BaseBot):
             "3tik l'okhrin 3 compliments daba f chat! 💙",
             "Kteb message bdarija kollu b 7rouf kbar (CAPS)! 📢",
         ]
-        self.jokes          = loaded_jokes    # 200 jokes from nokat.json
-        self.riddles        = loaded_riddles  # 100 riddles from swalouat.json
-        self.riddle_answers = loaded_answers
+        self.jokes          = packs.get("jokes", ())     # nokat.json
+        self.riddles        = packs.get("riddles", ())   # swalouat.json
+        self.riddle_answers = packs.get("answers", ())
 
         # Active riddle state: {user_id: {"answer": str, "username": str}}
         self.active_riddles: dict = {}
 
-        self.emote_dict = EMOTE_DICT
-        self.emote_keys = list(self.emote_dict.keys())
+        self.emotes = CATALOG             # Immutable, indexed once at import — see emotes.py
 
         # ── LOAD PERSISTENT DATA ─────────────────────────────────────
-        saved = load_data()
-        self.moderators       = set(saved.get("moderators", []))
-        self.vip_permanent    = set(saved.get("vip_permanent", []))
-        self.vip_timed        = saved.get("vip_timed", {})
-        self.tip_totals       = saved.get("tip_totals", {})
-        self.user_total_time  = saved.get("user_total_time", {})
-        self.user_sessions    = saved.get("user_sessions", {})
+        # Backend picked by STORAGE_BACKEND (json snapshot+journal, or sqlite).
+        # Every table below persists its own writes — see storage.py.
+        self.storage = open_storage()
+        st = self.storage
+        self.moderators       = st.set("moderators")
+        self.vip_permanent    = st.set("vip_permanent")
+        self.vip_timed        = st.table("vip_timed")
+        self.tip_totals       = st.table("tip_totals")
+        self.user_total_time  = st.table("user_total_time")
+        self.user_sessions    = st.table("user_sessions")
         # tip_bank removed — bot tips directly from wallet
-        self.user_stats       = saved.get("user_stats", {})
-        self.user_ratings     = saved.get("user_ratings", {})
-        self.custom_greetings = saved.get("custom_greetings", {})
-        self.vip_floor        = saved.get("vip_floor", None)
-        self.dance_floor      = saved.get("dance_floor", None)
-        self.bot_last_position = saved.get("bot_last_position", None)
-        print("[Persistence] Data loaded from disk")
+        self.user_stats       = st.table("user_stats")
+        self.user_ratings     = st.table("user_ratings")
+        self.custom_greetings = st.table("custom_greetings")
+        self.zones            = ZoneIndex.from_dict(st.extra("zones", {}))
+        # Migrate the old single vip_floor / dance_floor boxes into named zones
+        for legacy_kind in ("vip", "dance"):
+            legacy = st.extra(f"{legacy_kind}_floor")
+            if legacy and not self.zones.has_kind(legacy_kind):
+                self.zones.add(Zone.from_dict(legacy_kind, legacy, kind=legacy_kind))
+        self.bot_last_position = st.extra("bot_last_position", None)
+        print(f"[Persistence] Data loaded ({st.name} backend)")
+
+        # Journal flushes / commits + snapshot compaction run in the background
+        self.persist = st.writer(self._extras, interval=5.0)
+        atexit.register(self.persist.flush_sync)
+
+        # Top-N boards kept current by the writers below — see leaderboard.py
+        self.lb_points = TopN(self.user_ratings)
+        self.lb_tips   = TopN(self.user_stats, field='tips_given')
+        self.lb_time   = TopN(self.user_total_time, capacity=40)
+        self.rank_index = RankIndex(self.user_ratings, exclude=self._is_excluded_from_lb)
+        self.rank_index.load(self.user_ratings.items())
+
+        # Every chat / whisper / react goes through one rate-limited queue — see outbound.py
+        self.outbox = Outbox(lambda: self.highrise)
+
+        # Local gold balance — payouts reserve against it instead of fetching the wallet
+        self.ledger = GoldLedger(self.get_wallet_gold, self._pay_gold)
+        self._tip_holds = {}   # {job id: Reservation} gold held for a running !tipall
+
+        # Periodic loops and one-shot game timers — see scheduler.py and _schedule_jobs
+        self.scheduler = Scheduler()
+        self._beat_job = None
+        self._dawya_timer = None
+        self._auto_save_ticks = 0
+        self._announce_count = 0
+
+        # Emotes each user failed to play, so random picks avoid them — see emote_access.py
+        self.emote_access = EmoteAccess()
+
+        # Every `loop N` / `random` loop runs on one timing wheel — see emote_loops.py
+        self.emote_loops = EmoteLoops(self._send_loop_emote, self._pick_random_emote,
+                                      self._emote_loop_delay, ready=lambda: self.is_connected,
+                                      classify=self.emote_access.classify)
+
+        # Bulk actions (!tipall, !hearts) run as resumable background jobs — see jobs.py
+        self.jobs = JobRunner(ready=lambda: self.is_connected)
+        self._register_jobs()
+
+        # Chat/whisper commands — see _register_commands and commands.py
+        self.commands = CommandRegistry(self._has_permission, self._w)
+        self._register_commands()
+
+        # Prometheus metrics served on /metrics — see _register_metrics and metrics.py
+        self.metrics = Registry()
+        self.loop_lag = LoopWatchdog(threshold=0.5)   # Logs the stack of anything blocking the loop
+        self._register_metrics()
+
+        # Health server state — see _http_routes / readiness
+        self.web = None
+        self._background = {}         # {name: asyncio.Task} started once in on_start
+        self.last_api_ok = 0.0        # time.monotonic() of the last successful room fetch
+
+    # ─────────────────────────────────────────────────────────────────
+    #  BULK JOBS
+    # ─────────────────────────────────────────────────────────────────
+    def _register_jobs(self):
+        """Job kinds for jobs.py. Tips are exactly-once: each recipient is
+        checkpointed before tip_user, so a restart never pays anyone twice."""
+        self.jobs.register("tipall", self._job_tip, self._report_tipall,
+                           concurrency=3, pace=0.3, batch=10, exactly_once=True)
+        self.jobs.register("hearts", self._job_heart, self._report_hearts,
+                           concurrency=2, batch=25)
+
+    async def _job_tip(self, job, user_id: str, username: str):
+        amount = job.params["amount"]
+        if not self.to_gold_bar(amount):
+            raise JobAbort(f"{amount}g not supported")
+        # Resumed jobs have no hold (reservations don't survive a restart)
+        payer = self._tip_holds.get(job.id) or self.ledger
+        try:
+            paid = await payer.tip(user_id, amount)
+        except InsufficientFunds:
+            paid = False
+        if not paid:
+            raise JobAbort("bot wallet is empty")
+
+    async def _job_heart(self, job, user_id: str, username: str):
+        await self.outbox.deliver("react", "heart", user_id)
+
+    def _report_tipall(self, job, final: bool):
+        amount = job.params["amount"]
+        key = ("job", job.id)
+        if final and job.id in self._tip_holds:
+            self._tip_holds.pop(job.id).release()
+        if not final:
+            self.outbox.say(f"✅ [{job.processed}/{job.total}] tipped {amount}g each 💰", key=key)
+            return
+        extra = []
+        if job.failed:
+            names = ", ".join(f"@{name}" for _, name in job.failed[:5])
+            extra.append(f"{len(job.failed)} failed: {names}")
+        if job.uncertain:
+            names = ", ".join(f"@{name}" for _, name in job.uncertain[:5])
+            extra.append(f"{len(job.uncertain)} unconfirmed (bot restarted): {names}")
+        if job.status == DONE:
+            head = f"🎉 Done! Tipped {len(job.done)} users {amount}g each!"
+        elif job.status == ABORTED:
+            head = f"❌ TipAll stopped after {len(job.done)} users: {job.error}"
+        else:
+            head = f"🛑 TipAll cancelled after {len(job.done)}/{job.total} users."
+        self.outbox.say(head + ("\n⚠️ " + "\n⚠️ ".join(extra) if extra else ""), key=key)
+
+    def _report_hearts(self, job, final: bool):
+        if final and job.status != DONE:
+            print(f"[Hearts] {job.summary()}")
+
+    # ─────────────────────────────────────────────────────────────────
+    #  METRICS
+    # ─────────────────────────────────────────────────────────────────
+    EVENT_HANDLERS = ("on_chat", "on_whisper", "on_user_join", "on_user_leave", "on_tip",
+                      "on_reaction", "on_emote", "on_user_move")
+
+    def _register_metrics(self):
+        """Everything /metrics exposes. Most values are read from the components
+        at scrape time; only handler latency and errors are recorded here."""
+        m = self.metrics
+        m.gauge("bot_connected", "1 while the bot WebSocket is connected",
+                fn=lambda: self.is_connected)
+        m.gauge("bot_event_loop_lag_seconds", "How late the last 0.25 s loop-lag probe woke up",
+                fn=lambda: self.loop_lag.lag)
+        m.gauge("bot_event_loop_lag_max_seconds", "Worst loop lag seen since start",
+                fn=lambda: self.loop_lag.max_lag)
+        m.counter("bot_event_loop_stalls_total", "Times the loop was blocked past the watchdog threshold",
+                  fn=lambda: self.loop_lag.stalls)
+
+        # Event handlers — the SDK calls self.on_*, so wrap the bound methods
+        self.m_handlers = m.histogram("bot_handler_seconds", "Event handler latency",
+                                      labels=("handler",))
+        for name in self.EVENT_HANDLERS:
+            setattr(self, name, m.timed(self.m_handlers, getattr(self, name), handler=name))
+        m.counter("bot_command_calls_total", "Chat command invocations", labels=("command",),
+                  fn=lambda: {(c.name or "#",): c.calls for c in self.commands if c.calls})
+        m.counter("bot_command_seconds_total", "Total time spent in command handlers",
+                  labels=("command",),
+                  fn=lambda: {(c.name or "#",): c.total_time for c in self.commands if c.calls})
+
+        self.m_room_users = m.histogram("bot_room_users_request_seconds",
+                                        "get_room_users latency (safe_get_room_users)",
+                                        labels=("outcome",))
+
+        m.counter("bot_outbound_sent_total", "Messages sent by the outbox", labels=("kind",),
+                  fn=lambda: {(k,): v for k, v in self.outbox.sent_by_kind.items()})
+        m.counter("bot_outbound_dropped_total", "Outbox items dropped (TTL or queue full)",
+                  fn=lambda: self.outbox.dropped)
+        m.counter("bot_outbound_merged_total", "Outbox items replaced by a newer one",
+                  fn=lambda: self.outbox.merged)
+        m.gauge("bot_outbound_queue_depth", "Queued outbound items", labels=("priority",),
+                fn=lambda: {(k,): v for k, v in self.outbox.stats()["depth_by_priority"].items()})
+        m.gauge("bot_outbound_wait_max_seconds", "Longest queue wait seen",
+                fn=lambda: self.outbox.max_wait)
+
+        m.gauge("bot_persistence_flush_seconds", "Duration of the last persistence flush",
+                fn=lambda: self.persist.last_flush_duration)
+        m.counter("bot_persistence_flushes_total", "Persistence flushes",
+                  fn=lambda: self.persist.flush_count)
+
+        m.gauge("bot_room_users", "Users currently in the room", fn=lambda: len(self.room))
+        m.gauge("bot_dance_floor_users", "Users on the dance floor",
+                fn=lambda: len(self.users_dancing_on_floor))
+        m.gauge("bot_emote_loops_active", "Active per-user emote loops",
+                fn=lambda: len(self.emote_loops))
+        m.counter("bot_emote_denied_total", "Emote sends a user could not play",
+                  fn=lambda: self.emote_access.denied)
+        m.gauge("bot_emote_access_cached", "Cached (user, emote) failures",
+                fn=lambda: len(self.emote_access))
+        m.gauge("bot_wallet_gold", "Locally tracked gold balance",
+                fn=lambda: self.ledger.balance or 0)
+
+        self.m_errors = m.counter("bot_errors_total", "Errors per subsystem",
+                                  labels=("subsystem",), fn=self._error_counts)
+
+    # ─────────────────────────────────────────────────────────────────
+    #  HEALTH SERVER (/healthz, /readyz, /metrics — see webserver.py)
+    # ─────────────────────────────────────────────────────────────────
+    READY_API_MAX_AGE = 180.0     # keep_alive fetches the room every 60s
+
+    def _http_routes(self) -> dict:
+        text = "text/plain; charset=utf-8"
+        return {
+            "/healthz": lambda: (200, text, "ok"),
+            "/readyz":  self._readyz,
+            "/metrics": lambda: (200, "text/plain; version=0.0.4; charset=utf-8",
+                                 self.metrics.render()),
+            "*":        lambda: (200, text, alive_text()),
+        }
+
+    def readiness(self) -> dict:
+        """{check: (ok, detail)} — connected, drivers alive, API answered recently."""
+        now = time.monotonic()
+        dead = [name for name, task in self._background.items() if task.done()]
+        late = self.scheduler.overdue(grace=30.0)
+        api_age = now - max(self.last_api_ok, self.outbox.last_sent_at)
+        return {
+            "connected":  (self.is_connected, "websocket up" if self.is_connected else "disconnected"),
+            "tasks":      (bool(self._background) and not dead,
+                           "dead: " + ", ".join(dead) if dead else f"{len(self._background)} running"),
+            "scheduler":  (not late, "overdue: " + ", ".join(late) if late else "on time"),
+            "api":        (api_age <= self.READY_API_MAX_AGE, f"last success {api_age:.0f}s ago"),
+        }
+
+    def _readyz(self):
+        checks = self.readiness()
+        ready = all(ok for ok, _ in checks.values())
+        body = json.dumps({"ready": ready,
+                           "checks": {k: {"ok": ok, "detail": d} for k, (ok, d) in checks.items()}})
+        return (200 if ready else 503), "application/json", body
+
+    def _error_counts(self) -> dict:
+        """Errors counted by the components themselves, for bot_errors_total."""
+        counts = {
+            "commands": sum(c.errors for c in self.commands),
+            "outbound": self.outbox.failed,
+            "emote_loops": self.emote_loops.failed,
+            "jobs": self.jobs.failures,
+        }
+        for name, stats in list(self.scheduler.stats.items()):
+            counts[f"scheduler:{name}"] = stats.errors
+        return {(k,): v for k, v in counts.items()}
 
     # ─────────────────────────────────────────────────────────────────
     #  PERSISTENCE
     # ─────────────────────────────────────────────────────────────────
     def _persist(self):
-        save_data({
-            "moderators":       list(self.moderators),
-            "vip_permanent":    list(self.vip_permanent),
-            "vip_timed":        self.vip_timed,
-            "tip_totals":       self.tip_totals,
-            "user_total_time":  self.user_total_time,
-            "user_sessions":    self.user_sessions,
-            "user_stats":       self.user_stats,
-            "user_ratings":     self.user_ratings,
-            "custom_greetings": self.custom_greetings,
-            "vip_floor":        self.vip_floor,
-            "dance_floor":      self.dance_floor,
-            "bot_last_position": self.bot_last_position,
-        })
+        """Request a snapshot compaction within a few seconds. Only needed for state
+        the journal does not cover (zones, bot position) — table writes journal themselves."""
+        self.persist.mark_dirty()
+
+    def _extras(self) -> dict:
+        """Non-table state saved alongside the tables. Runs on the event loop."""
+        return {
+            "zones":            self.zones.to_dict(),
+            "bot_last_position": dict(self.bot_last_position) if self.bot_last_position else None,
+        }
 
-    async def auto_save_loop(self):
-        tick = 0
-        while True:
-            await asyncio.sleep(60)
+    def _install_shutdown_flush(self):
+        """Flush pending state on SIGTERM/SIGINT before the process exits."""
+        loop = asyncio.get_running_loop()
+
+        def _on_signal():
+            self.persist.flush_sync()
+            raise SystemExit(0)
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
             try:
-                if not self.is_connected:
-                    continue
-                tick += 1
-                await self.update_all_user_times()
-                self.clean_expired_vip()
+                loop.add_signal_handler(sig, _on_signal)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows / non-main thread — atexit still covers normal exit
 
-                # Every 5 minutes — award 5 points to every user currently in the room
-                if tick % 5 == 0 and self.user_join_times:
-                    try:
-                        room_users = await self.safe_get_room_users()
-                        for u, _ in room_users:
-                            if u.id in self.user_join_times and u.id != self.highrise.my_id:
-                                self.add_rating_points(u.username, 5)
-                                print(f"[Points] +5 time points → {u.username}")
-                    except Exception as e:
-                        print(f"[Points] Error awarding time points: {e}")
+    async def auto_save_loop(self):
+        """Every minute: fold live session time into the totals and expire VIPs."""
+        self._auto_save_ticks += 1
+        await self.update_all_user_times()
+        self.clean_expired_vip()
 
-                self._persist()
-                print("[Persistence] Auto-saved")
+        # Every 5 minutes — award 5 points to every user currently in the room
+        if self._auto_save_ticks % 5 == 0 and self.user_join_times:
+            try:
+                for u, _ in self.room.users():
+                    if u.id in self.user_join_times and u.id != self.highrise.my_id:
+                        self.add_rating_points(u.username, 5)
+                        print(f"[Points] +5 time points → {u.username}")
             except Exception as e:
-                print(f"[Persistence] Auto-save error: {e}")
+                print(f"[Points] Error awarding time points: {e}")
 
     async def position_saver_loop(self):
         """Save bot position every 5 minutes — not aggressively, avoids respawn loop."""
-        while True:
-            await asyncio.sleep(300)  # Every 5 minutes only
-            try:
-                if not self.is_connected:
-                    continue
-                if not self.following_user:
-                    room_users = await self.safe_get_room_users()
-                    bot_pos = next((p for u, p in room_users if u.id == self.highrise.my_id), None)
-                    if bot_pos and hasattr(bot_pos, 'x'):
-                        self.bot_last_position = {
-                            'x': bot_pos.x,
-                            'y': bot_pos.y,
-                            'z': bot_pos.z,
-                            'facing': bot_pos.facing
-                        }
-                        print(f"[Position] Saved ({bot_pos.x}, {bot_pos.y}, {bot_pos.z})")
-            except Exception as e:
-                print(f"[Position] Error saving position: {e}")
+        if self.following_user:
+            return
+        bot_pos = self.room.position(self.highrise.my_id)
+        if bot_pos and hasattr(bot_pos, 'x'):
+            self.bot_last_position = {
+                'x': bot_pos.x,
+                'y': bot_pos.y,
+                'z': bot_pos.z,
+                'facing': bot_pos.facing
+            }
+            self._persist()
+            print(f"[Position] Saved ({bot_pos.x}, {bot_pos.y}, {bot_pos.z})")
 
     # ─────────────────────────────────────────────────────────────────
     #  OWNER/MOD CHECK
@@ -344,16 +548,29 @@ class MyBot(BaseBot):
         }
         return mapping.get(amount, None)
 
-    async def get_wallet_gold(self) -> int:
-        """Return the bot's current gold balance from its wallet. Returns 0 on failure."""
+    async def get_wallet_gold(self) -> int | None:
+        """Fetch the bot's real gold balance. Returns None on failure.
+        Payouts go through self.ledger, which calls this only to reconcile."""
         try:
             wallet = (await self.highrise.get_wallet()).content
             for item in wallet:
                 if isinstance(item, CurrencyItem) and item.type == "gold":
                     return item.amount
+            return 0
         except Exception as e:
             print(f"[Wallet] Could not fetch wallet: {e}")
-        return 0
+        return None
+
+    async def _pay_gold(self, user_id: str, amount: int):
+        """The one place tip_user is called — used by self.ledger."""
+        gold = self.to_gold_bar(amount)
+        if not gold:
+            raise ValueError(f"{amount}g not supported")
+        result = await self.highrise.tip_user(user_id, gold)
+        if result == "insufficient_funds":
+            raise InsufficientFunds(f"wallet cannot cover {amount}g")
+        if result != "success":
+            raise RuntimeError(f"tip_user failed: {getattr(result, 'message', result)}")
 
     def is_owner(self, user: User) -> bool:
         return (user.username.lower() == self.owner_username.lower() or
@@ -369,37 +586,14 @@ class MyBot(BaseBot):
     #  COLOR GRADIENTS (Per-character coloring for public chat!)
     # ─────────────────────────────────────────────────────────────────
     def gradient_text(self, text: str, gradient_type: str = "rainbow") -> str:
-        """Apply color gradient to text character by character - PUBLIC CHAT FORMAT"""
-        gradients = {
-            "rainbow": ["ff0000", "ff7f00", "ffff00", "00ff00", "0000ff", "4b0082", "9400d3"],
-            "fire": ["ff0e3c", "ff2a4e", "ff2e51", "ff526f", "ff6347", "ff7f50"],
-            "ocean": ["00affe", "00c0fe", "3ccffe", "72d7f8", "80ddfb", "a5e4f9"],
-            "pink": ["ff1493", "ff69b4", "ff00ff", "ba55d3", "9370db", "dda0dd"],
-            "green": ["00ff7f", "00ff00", "00dd00", "00bb00", "009900", "007700"],
-            "purple": ["9400d3", "8a2be2", "9370db", "ba55d3", "dda0dd", "ee82ee"],
-            "sunset": ["ff6b35", "ff8c42", "ffaa5c", "ffd97d", "fff5ba", "fffacd"],
-            "cyan": ["00ffff", "00e5e5", "00cccc", "00b2b2", "009999", "008080"],
-            "gold": ["ffd700", "ffed4e", "ffff00", "ffed4e", "ffd700", "ffcc00"],
-        }
-        
-        colors = gradients.get(gradient_type, gradients["rainbow"])
-        result = ""
-        color_index = 0
-        
-        for char in text:
-            # Apply color to all characters except spaces and some punctuation
-            if char != " ":
-                result += f"<#{colors[color_index % len(colors)]}>{char}"
-                color_index += 1
-            else:
-                result += " "
-        
-        return result
-    
+        """Apply color gradient to text character by character - PUBLIC CHAT FORMAT.
+        Palettes and caching live in textstyle.py."""
+        return gradient_text(text, gradient_type)
+
     def random_gradient(self) -> str:
         """Get random gradient type"""
-        return random.choice(["rainbow", "fire", "ocean", "pink", "green", "purple", "sunset", "cyan", "gold"])
-    
+        return random.choice(GRADIENT_NAMES)
+
     def style_greeting(self, text: str) -> str:
         """Style greeting with gradient"""
         gradient = self.random_gradient()
@@ -475,9 +669,18 @@ class MyBot(BaseBot):
             print(f"[Position] Could not restore position: {e}")
 
     async def safe_get_room_users(self):
-        """Safely call get_room_users — returns empty list if disconnected or API fails."""
+        """Safely call get_room_users — returns empty list if disconnected or API fails.
+        Every call is timed into bot_room_users_request_seconds."""
         if not self.is_connected:
             return []
+        start = time.perf_counter()
+        users = await self._get_room_users()
+        self.m_room_users.observe(time.perf_counter() - start, outcome="ok" if users else "error")
+        if users:
+            self.last_api_ok = time.monotonic()
+        return users
+
+    async def _get_room_users(self):
         try:
             result = await asyncio.wait_for(self.highrise.get_room_users(), timeout=8.0)
             if not hasattr(result, "content"):
@@ -502,38 +705,51 @@ class MyBot(BaseBot):
                 print(f"[API] get_room_users error: {e}")
             return []
 
+    async def refresh_room_state(self) -> bool:
+        """Reconcile self.room against one real get_room_users snapshot.
+        Returns True if the snapshot was applied. The bot itself is always in the
+        room, so an empty result means the call failed — keep the cache as is."""
+        started = time.monotonic()
+        room_users = await self.safe_get_room_users()
+        if not room_users:
+            return False
+        self.room.reconcile(room_users, started)
+        return True
+
     async def keep_alive(self):
-        """Pings the room every 60 seconds — 10s caused rate-limit disconnects."""
-        while True:
-            await asyncio.sleep(60)
-            try:
-                if not self.is_connected:
-                    await asyncio.sleep(5)
-                    continue
-                result = await asyncio.wait_for(self.highrise.get_room_users(), timeout=8.0)
-                if hasattr(result, "content"):
-                    print("[KeepAlive] Ping OK")
-                else:
-                    err_msg = str(result).lower()
-                    if "not in room" in err_msg:
-                        self.is_connected = False
-                        print("[KeepAlive] Not in room — waiting for reconnect")
-                    else:
-                        print(f"[KeepAlive] Unexpected response: {result}")
-            except asyncio.TimeoutError:
-                print("[KeepAlive] Ping timed out")
-            except Exception as e:
-                err = str(e).lower()
-                if "closing transport" in err or "not connected" in err or "not in room" in err:
-                    self.is_connected = False
-                    print("[KeepAlive] Connection closed — waiting for reconnect")
-                else:
-                    print(f"[KeepAlive] Error: {e}")
+        """Pings the room every 60 seconds — 10s caused rate-limit disconnects.
+        The ping reply doubles as the room-state reconcile, so this is the only
+        periodic get_room_users call left in the bot."""
+        if await self.refresh_room_state():
+            print(f"[KeepAlive] Ping OK — {len(self.room)} users in room")
+        elif not self.is_connected:
+            print("[KeepAlive] Connection lost — waiting for reconnect")
+
+    def _schedule_jobs(self):
+        """Every periodic job the bot runs, on the one scheduler. A job returning
+        a number sets its own next delay (emote-length beats, random rounds)."""
+        sched = self.scheduler
+        connected = lambda: self.is_connected
+        # Chikha starts 7s late so it never emotes at the same time as Sikiriti
+        sched.every("bot_brain",     5,   self.bot_brain,       first=7)
+        # Sikiriti announces at T+30, T+330... — ChikhatraX at T+450, T+750...
+        sched.every("announcements", 300, self.periodic_announcements, first=450, when=connected)
+        sched.every("floor_monitor", 60,  self.floor_monitor,   jitter=5, when=connected)
+        self._beat_job = sched.every("dance_beat", 1.0, self.dance_beat, first=1.0)
+        sched.every("auto_save",     60,  self.auto_save_loop,  when=connected)
+        sched.every("position",      300, self.position_saver_loop, jitter=15, when=connected)
+        sched.every("keep_alive",    60,  self.keep_alive,      when=connected)
+        sched.every("wallet",        self.ledger.reconcile_interval, self.ledger.refresh,
+                    jitter=30, when=connected)
+        sched.every("emote_access",  600, self.emote_access.prune)
+        sched.every("dawya",         60,  self.dawya_round,     first=60 + random.randint(60, 480))
 
     async def on_start(self, session_metadata: SessionMetadata):
         self.is_connected = True
         print("Bot fully loaded!")
-        await self.highrise.chat("<#ff2200> Talit ala wladi o jit andi<#ff3300>16 bnt o dri 8 f lhbs o lb9i khadamin ala rasshom  🌟")
+        # Seed the room cache — events only carry changes from here on
+        asyncio.create_task(self.refresh_room_state())
+        self.outbox.say("<#ff2200> Talit ala wladi o jit andi<#ff3300>16 bnt o dri 8 f lhbs o lb9i khadamin ala rasshom  🌟", priority=ANNOUNCE)
         
         # Restore bot position
         target_pos = None
@@ -553,14 +769,22 @@ class MyBot(BaseBot):
         # via the is_connected flag. Creating them again causes duplicates.
         if not hasattr(self, '_tasks_started'):
             self._tasks_started = True
-            asyncio.create_task(self.bot_brain())
-            asyncio.create_task(self.periodic_announcements())
-            asyncio.create_task(self.floor_monitor())
-            asyncio.create_task(self.dance_beat_loop())
-            asyncio.create_task(self.auto_save_loop())
-            asyncio.create_task(self.position_saver_loop())
-            asyncio.create_task(self.keep_alive())
-            asyncio.create_task(self.dawya_game_loop())
+            self._schedule_jobs()
+            # Long-lived drivers — /readyz fails if any of them dies
+            self._background = {
+                "scheduler":   asyncio.create_task(self.scheduler.run()),
+                "loop_lag":    asyncio.create_task(self.loop_lag.run()),
+                "persistence": asyncio.create_task(self.persist.run()),
+                "outbox":      asyncio.create_task(self.outbox.run()),
+                "emote_loops": asyncio.create_task(self.emote_loops.run()),
+            }
+            try:
+                self.web = await start_async_webserver(self._http_routes())
+            except OSError as e:
+                print(f"[WebServer] Not started: {e}")
+            for job in self.jobs.resume():
+                print(f"[Jobs] Resumed {job.summary()}")
+            self._install_shutdown_flush()
             print("[Tasks] Background tasks started")
         else:
             print("[Tasks] Reconnected — reusing existing background tasks")
@@ -568,159 +792,153 @@ class MyBot(BaseBot):
     # ─────────────────────────────────────────────────────────────────
     #  FLOOR MONITOR (Dance floor auto-dance, VIP floor restricted)
     # ─────────────────────────────────────────────────────────────────
-    async def floor_monitor(self):
-        await asyncio.sleep(5)
-        while True:
+    @property
+    def vip_floor(self) -> dict | None:
+        """First VIP zone as a center/radius dict, or None."""
+        zone = self.zones.first_of_kind("vip")
+        return zone.to_dict() if zone else None
+
+    @property
+    def dance_floor(self) -> dict | None:
+        """First dance zone as a center/radius dict, or None."""
+        zone = self.zones.first_of_kind("dance")
+        return zone.to_dict() if zone else None
+
+    async def on_floor_position(self, user: User, position):
+        """Work out zone entry/exit for one user from their latest position.
+        Called from on_user_move / on_user_join, so transitions fire immediately.
+        Membership comes from the zone grid — cost does not grow with zone count."""
+        if user.id == self.highrise.my_id:
+            return
+        inside = self.zones.zones_at(position)
+        now_in = frozenset(z.name for z in inside)
+        was_in = self.user_zones.get(user.id, frozenset())
+        if now_in:
+            self.user_zones[user.id] = now_in
+        else:
+            self.user_zones.pop(user.id, None)
+        kinds = {z.kind for z in inside}
+
+        # VIP floor check — warn once per entry
+        if "vip" in kinds:
+            if user.id not in self.vip_warned and not self.has_vip_access(user.username):
+                self.vip_warned.add(user.id)
+                self.outbox.say(
+                    f"🚫 @{user.username}, VIP floor requires VIP access!\n"
+                    f"💎 30g = 1 day | 100g = 7 days | 500g = Permanent",
+                    priority=MODERATION
+                )
+        else:
+            self.vip_warned.discard(user.id)
+
+        # No-go zones — warn on every fresh entry, owners/mods exempt
+        for zone in inside:
+            if zone.kind == "nogo" and zone.name not in was_in and not self.is_owner_or_mod(user):
+                self.outbox.say(f"⛔ @{user.username}, '{zone.name}' is off limits!", priority=MODERATION)
+
+        # Dance floors — register user so beat loop picks them up
+        if "dance" in kinds:
+            if user.id not in self.users_dancing_on_floor:
+                idle = not any(self.users_dancing_on_floor.values())
+                self.users_dancing_on_floor[user.id] = False  # Pending until next beat
+                if idle:
+                    # Nobody mid-emote — start a beat now instead of waiting for the poll
+                    self._activate_dancer(user.id)
+                    self.scheduler.wake(self._beat_job)
+                else:
+                    self.auto_dance_on_floor(user.id)
+        else:
+            # User left dance floor — beat loop iterates a copy, safe to drop now
+            self.users_dancing_on_floor.pop(user.id, None)
+
+    async def sweep_floors(self):
+        """Re-check every cached position against the floors — used after a
+        floor is (re)defined and by the floor_monitor safety net."""
+        for user, position in self.room.users():
             try:
-                await asyncio.sleep(5)
-                if not self.is_connected:
-                    continue
-                if not self.vip_floor and not self.dance_floor:
-                    continue
-                room_users = await self.safe_get_room_users()
-                for user, position in room_users:
-                    if user.id == self.highrise.my_id:
-                        continue
-                    # Skip seated/anchored users — AnchorPosition has no x/y/z
-                    if not hasattr(position, 'x'):
-                        continue
-
-                    # VIP floor check — warn once per entry, not every 2s
-                    if self.vip_floor and self.is_on_floor(position, self.vip_floor):
-                        if not self.has_vip_access(user.username):
-                            if user.id not in self.vip_warned:
-                                self.vip_warned.add(user.id)
-                                await self.highrise.chat(
-                                    f"🚫 @{user.username}, VIP floor requires VIP access!\n"
-                                    f"💎 30g = 1 day | 100g = 7 days | 500g = Permanent"
-                                )
-                    else:
-                        self.vip_warned.discard(user.id)
-                    
-                    # Dance floor — register user so beat loop picks them up
-                    if self.dance_floor and self.is_on_floor(position, self.dance_floor):
-                        if user.id not in self.users_dancing_on_floor:
-                            self.users_dancing_on_floor[user.id] = True
-                            # Greet + let the central beat loop handle the emote
-                            asyncio.create_task(self.auto_dance_on_floor(user.id, user.username))
-                    else:
-                        # User left dance floor, stop dancing
-                        if user.id in self.users_dancing_on_floor:
-                            self.users_dancing_on_floor[user.id] = False
-                            await asyncio.sleep(0.3)
-                            if user.id in self.users_dancing_on_floor:
-                                del self.users_dancing_on_floor[user.id]
-                            
+                await self.on_floor_position(user, position)
             except Exception as e:
-                print(f"Error in floor monitor: {e}")
+                print(f"Error sweeping floors for {user.username}: {e}")
+
+    async def floor_monitor(self):
+        """Safety net only — floor entry/exit is handled in on_user_move.
+        Catches anything the events missed (e.g. a dropped move event)."""
+        await self.sweep_floors()
 
-    async def auto_dance_on_floor(self, user_id, username):
+    def auto_dance_on_floor(self, user_id):
         """
         Called when a user steps onto the dance floor.
         Marks them as 'pending' (False) so the beat loop skips them until the
         next beat boundary — then flips them to True so they join in perfect sync.
         """
-        try:
-            # Mark as pending — beat loop only fires emotes for True entries
-            self.users_dancing_on_floor[user_id] = False
-
-            # Calculate exact wait until the next beat boundary
-            if self.dance_floor_emote and self.dance_floor_emote in self.emote_dict:
-                duration = float(self.emote_dict[self.dance_floor_emote][1])
-                elapsed = time.time() - self.dance_beat_start
-                # Use modulo so this works correctly even if multiple beats have passed
-                wait = max(0.0, duration - (elapsed % max(duration, 0.001)))
-                if wait > 0.1:
-                    await asyncio.sleep(wait)
-
-            # Activate — included in the very next beat tick
-            self.users_dancing_on_floor[user_id] = True
+        wait = 0.0
+        # Calculate exact wait until the next beat boundary
+        if self.dance_floor_emote:
+            duration = self.dance_floor_emote.duration
+            elapsed = time.time() - self.dance_beat_start
+            # Use modulo so this works correctly even if multiple beats have passed
+            wait = max(0.0, duration - (elapsed % max(duration, 0.001)))
+        if wait > 0.1:
+            self.scheduler.after(wait, self._activate_dancer, user_id, name="dance_join")
+        else:
+            self._activate_dancer(user_id)
 
-        except Exception as e:
-            print(f"Error in auto_dance_on_floor: {e}")
-            # Activate anyway so user is not permanently stuck as pending
+    def _activate_dancer(self, user_id):
+        # Activate — included in the very next beat tick (unless they left meanwhile)
+        if user_id in self.users_dancing_on_floor:
             self.users_dancing_on_floor[user_id] = True
 
-    async def dance_beat_loop(self):
+    async def dance_beat(self):
         """
-        ONE central beat loop — picks a NEW random emote every beat and
-        fires it to ALL floor dancers at exactly the same instant.
-        FIX: refreshes room cache every 5 beats instead of every beat.
+        ONE central beat — picks a NEW random emote every beat and fires it
+        to ALL floor dancers at exactly the same instant. Returns the delay
+        until the next beat; polls every second while no dancer is active
+        (on_floor_position wakes it early when the first dancer arrives, and
+        never while others are mid-emote).
+        Dancers no longer in self.room are dropped — no API call per beat.
         """
-        all_emotes = self.emote_keys[:]
-        _cached_room_ids: set = set()
-        _beat_count: int = 0
-
-        while True:
-            try:
-                if not self.is_connected:
-                    await asyncio.sleep(2)
-                    continue
-                if self.dance_floor and self.users_dancing_on_floor:
-                    emote_name = random.choice(all_emotes)
-                    emote_data = self.emote_dict[emote_name]
-                    emote_id   = emote_data[0]
-                    duration   = float(emote_data[1])
-
-                    self.dance_beat_start = time.time()
-                    self.dance_floor_emote = emote_name
-
-                    # FIX: refresh room cache every 5 beats only (80% fewer API calls)
-                    _beat_count += 1
-                    if _beat_count >= 5 or not _cached_room_ids:
-                        try:
-                            room_users = await self.safe_get_room_users()
-                            _cached_room_ids = {u.id for u, _ in room_users}
-                            _beat_count = 0
-                        except Exception:
-                            _cached_room_ids = set(self.users_dancing_on_floor.keys())
-
-                    stale = []
-                    tasks = []
-                    task_uids = []
-                    for uid, active in list(self.users_dancing_on_floor.items()):
-                        if not active:
-                            continue
-                        if uid not in _cached_room_ids:
-                            stale.append(uid)
-                            continue
-                        tasks.append(self.highrise.send_emote(emote_id, uid))
-                        task_uids.append(uid)
-
-                    if tasks:
-                        results = await asyncio.gather(*tasks, return_exceptions=True)
-                        for uid, result in zip(task_uids, results):
-                            if isinstance(result, Exception):
-                                print(f"[Beat] emote error for {uid}: {result}")
-                                stale.append(uid)
-
-                    for uid in stale:
-                        self.users_dancing_on_floor.pop(uid, None)
-
-                    await asyncio.sleep(max(duration, 2.0))
-                else:
-                    await asyncio.sleep(1.0)
-
-            except asyncio.CancelledError:
-                print("[Beat] dance_beat_loop cancelled cleanly")
-                return
-            except Exception as e:
-                print(f"[Beat] dance_beat_loop error: {e}")
-                await asyncio.sleep(2.0)
-
-    def is_on_floor(self, user_pos, floor_coords: dict) -> bool:
-        """Check if user is on a floor area. Safely handles AnchorPosition (seated users)."""
+        if not self.is_connected:
+            return 2.0
+        if not (self.users_dancing_on_floor and self.zones.has_kind("dance")):
+            return 1.0
         try:
-            x = user_pos.x
-            y = user_pos.y
-            z = user_pos.z
-        except AttributeError:
-            # AnchorPosition (user is seated/anchored) — no x/y/z, skip them
-            return False
-        x_match = abs(x - floor_coords['x']) <= floor_coords.get('rx', 2)
-        y_match = abs(y - floor_coords['y']) <= floor_coords.get('ry', 0.6)
-        z_match = abs(z - floor_coords['z']) <= floor_coords.get('rz', 2)
-        return x_match and y_match and z_match
+            stale = []
+            task_uids = []
+            for uid, active in list(self.users_dancing_on_floor.items()):
+                if not active:
+                    continue
+                if uid not in self.room:
+                    stale.append(uid)
+                    continue
+                task_uids.append(uid)
+
+            if not task_uids:
+                # Only pending dancers — keep the current beat so they still join on its boundary
+                for uid in stale:
+                    self.users_dancing_on_floor.pop(uid, None)
+                return 1.0
+
+            # One emote every active dancer can play — no beat wasted on unowned emotes
+            emote = (self.emote_access.pick_common(task_uids, self.emotes.all)
+                     or random.choice(self.emotes.free))
+            self.dance_beat_start = time.time()
+            self.dance_floor_emote = emote
+
+            results = await asyncio.gather(*(self._send_user_emote(emote, uid) for uid in task_uids),
+                                           return_exceptions=True)
+            for uid, result in zip(task_uids, results):
+                # Not owned: remembered, they stay on the floor for the next beat
+                if isinstance(result, Exception) and self.emote_access.classify(result) == GONE:
+                    print(f"[Beat] emote error for {uid}: {result}")
+                    stale.append(uid)
+
+            for uid in stale:
+                self.users_dancing_on_floor.pop(uid, None)
+
+            return max(emote.duration, 2.0)
+        except Exception as e:
+            print(f"[Beat] dance_beat error: {e}")
+            return 2.0
 
     # ─────────────────────────────────────────────────────────────────
     #  FOLLOW LOOP (Fixed to match facing direction)
@@ -731,8 +949,7 @@ class MyBot(BaseBot):
                 await asyncio.sleep(2)  # FIX: was 0.5s = 120 API calls/min
                 if not self.following_user:
                     break
-                room_users = await self.safe_get_room_users()
-                target_pos = next((p for u, p in room_users if u.id == self.following_user), None)
+                target_pos = self.room.position(self.following_user)
                 if target_pos is None:
                     self.following_user = None
                     self.following_username = None
@@ -765,27 +982,23 @@ class MyBot(BaseBot):
                     return
                 amount = self.auto_tip_amount.get(username, 1)
                 try:
-                    room_users = await self.safe_get_room_users()
-                    eligible = [u for u, _ in room_users
+                    eligible = [u for u, _ in self.room.users()
                                 if u.id != self.highrise.my_id and u.username != username]
                     if eligible:
                         recipient = random.choice(eligible)
                         gold = self.to_gold_bar(amount)
                         if not gold:
-                            await self.highrise.chat(f"❌ Auto-tip amount {amount}g not supported!")
+                            self.outbox.say(f"❌ Auto-tip amount {amount}g not supported!")
                             self.auto_tip_enabled[username] = False
                             return
-                        # Check wallet balance before tipping
-                        balance = await self.get_wallet_gold()
-                        if balance < amount:
-                            await self.highrise.chat("❌ Bot wallet is empty! Auto-tip stopped. 💸")
+                        if not await self.ledger.tip(recipient.id, amount):
+                            self.outbox.say("❌ Bot wallet is empty! Auto-tip stopped. 💸")
                             self.auto_tip_enabled[username] = False
                             return
-                        await self.highrise.tip_user(recipient.id, gold)
-                        await self.highrise.chat(f"💰 Auto-tip: @{recipient.username} +{amount}g! 🎉")
+                        self.outbox.say(f"💰 Auto-tip: @{recipient.username} +{amount}g! 🎉")
                 except Exception as e:
                     print(f"Error in auto_tip_loop: {e}")
-                    await self.highrise.chat(f"❌ Auto-tip error: {e}")
+                    self.outbox.say(f"❌ Auto-tip error: {e}")
         except asyncio.CancelledError:
             pass  # Task was hard-cancelled — clean exit
         finally:
@@ -819,11 +1032,12 @@ class MyBot(BaseBot):
 
     def get_leaderboard_text(self) -> list:
         """Return top-10 leaderboard split into message chunks, excluding bots"""
-        filtered = {u: p for u, p in self.user_ratings.items()
-                    if not self._is_excluded_from_lb(u)}
-        if not filtered:
+        return self.lb_points.render("lb", self._render_leaderboard)
+
+    def _render_leaderboard(self) -> list:
+        sorted_users = self.lb_points.top(10, exclude=self._is_excluded_from_lb)
+        if not sorted_users:
             return ["📊 Leaderboard is empty!"]
-        sorted_users = sorted(filtered.items(), key=lambda x: x[1], reverse=True)[:10]
         msgs = []
         # Part 1: ranks 1-5
         lines1 = ["<#f1c40f>🏆 TOP 10 (1/2)"]
@@ -843,11 +1057,13 @@ class MyBot(BaseBot):
 
     def get_tips_leaderboard_text(self) -> list:
         """Return top-10 tippers split into message chunks, excluding bots"""
-        tippers = {u: s.get('tips_given', 0) for u, s in self.user_stats.items()
-                   if s.get('tips_given', 0) > 0 and not self._is_excluded_from_lb(u)}
-        if not tippers:
+        return self.lb_tips.render("tiplb", self._render_tips_leaderboard)
+
+    def _render_tips_leaderboard(self) -> list:
+        sorted_users = [(u, n) for u, n in self.lb_tips.top(10, exclude=self._is_excluded_from_lb)
+                        if n > 0]
+        if not sorted_users:
             return ["💰 No tips recorded yet!"]
-        sorted_users = sorted(tippers.items(), key=lambda x: x[1], reverse=True)[:10]
         msgs = []
         lines1 = ["<#ff8c00>💰 Top Tippers — Part 1/2 💰"]
         for i, (uname, count) in enumerate(sorted_users[:5], 1):
@@ -885,26 +1101,44 @@ class MyBot(BaseBot):
     async def update_all_user_times(self):
         try:
             current_time = time.time()
-            # FIX: one API call total — not one per tracked user
-            room_users = await self.safe_get_room_users()
-            room_map = {u.id: u for u, _ in room_users}
             for user_id, join_time in list(self.user_join_times.items()):
-                user = room_map.get(user_id)
-                if user:
+                entry = self.room.get(user_id)
+                if entry:
+                    user = entry[0]
                     session_time = current_time - join_time
-                    self.user_total_time[user.username] = \
-                        self.user_total_time.get(user.username, 0) + session_time
+                    total = self.user_total_time.incr(user.username, session_time)
+                    self.lb_time.update(user.username, total)
                     self.user_join_times[user_id] = current_time
         except Exception as e:
             print(f"Error updating user times: {e}")
 
+    NEW_STATS_ROW = {'messages': 0, 'emotes': 0, 'tips_given': 0}
+
     def add_rating_points(self, username: str, points: int):
-        self.user_ratings[username] = self.user_ratings.get(username, 0) + points
+        old = self.user_ratings.get(username)   # None for a first-time scorer
+        total = self.user_ratings.incr(username, points)
+        self.lb_points.update(username, total)
+        self.rank_index.update(username, total, old)
+
+    def set_rating_points(self, username: str, points: int):
+        old = self.user_ratings.get(username)
+        self.user_ratings[username] = points
+        self.lb_points.update(username, points)
+        self.rank_index.update(username, points, old)
+
+    def rank_position_text(self, username: str) -> str:
+        """"#342 of 12,000 (top 3%)" for ranked users, "" otherwise."""
+        position = self.rank_index.rank(username)
+        if position is None:
+            return ""
+        pct = self.rank_index.percentile(username)
+        pct_text = f"{pct:.1f}" if pct < 1 else f"{pct:.0f}"
+        return f"#{position:,} of {len(self.rank_index):,} (top {pct_text}%)"
 
     def update_stats(self, username: str, stat_type: str):
-        if username not in self.user_stats:
-            self.user_stats[username] = {'messages': 0, 'emotes': 0, 'tips_given': 0}
-        self.user_stats[username][stat_type] = self.user_stats[username].get(stat_type, 0) + 1
+        value = self.user_stats.incr_field(username, stat_type, 1, default_row=self.NEW_STATS_ROW)
+        if stat_type == 'tips_given':
+            self.lb_tips.update(username, value)
         if stat_type == 'messages':
             # Only award points if enough time has passed — prevents spam farming
             now = time.time()
@@ -920,16 +1154,8 @@ class MyBot(BaseBot):
                 self.add_rating_points(username, 2)
                 self.emote_cooldowns[username] = now
 
-    async def check_cooldown(self, user: User) -> bool:
-        now = time.time()
-        last_time = self.user_cooldowns.get(user.id, 0)
-        if now - last_time < self.cooldown_seconds:
-            return False
-        self.user_cooldowns[user.id] = now
-        return True
-
     async def periodic_announcements(self):
-        """Auto-post help tips and announcements"""
+        """Auto-post help tips and announcements — alternates between the two lists."""
         tips = [
             "💡 Kteb !help bach tchof les commandes!",
             "⭐ Tip 30g+ bach tkhtar VIP greeting dyalk!",
@@ -948,81 +1174,58 @@ class MyBot(BaseBot):
             "👑 Tip 30g to get VIP access!",
         ]
         
-        # FIX: Sikiriti fires at T+30, T+330... ChikhatraX waits 150s first
-        # so it fires at T+450, T+750... — they never collide
-        await asyncio.sleep(150)
-        counter = 0
-        while True:
-            await asyncio.sleep(300)
-            try:
-                if not self.is_connected:
-                    continue
-                counter += 1
-                if counter % 2 == 0:
-                    tip = random.choice(help_tips)
-                    await self.highrise.chat(tip)
-                else:
-                    announcement = random.choice(tips)
-                    await self.highrise.chat(announcement)
-            except Exception as e:
-                print(f"Error in announcements: {e}")
-                await asyncio.sleep(30)
+        self._announce_count += 1
+        if self._announce_count % 2 == 0:
+            self.outbox.say(random.choice(help_tips), priority=ANNOUNCE)
+        else:
+            self.outbox.say(random.choice(tips), priority=ANNOUNCE)
 
     async def bot_brain(self):
-        """Chikha dances using dance emotes from EMOTE_DICT.
-        Starts with a 7s offset so it never fires at the same time as Sikiriti.
+        """Chikha dances using the catalog's dance emotes — one emote per run,
+        returns the delay until the next one (the emote's length).
         on_emote already ignores both bots so no conflict loop."""
-        # Offset start so Chikha and Sikiriti never send emotes simultaneously
-        await asyncio.sleep(7)
-        while True:
-            try:
-                if not self.is_connected:
-                    await asyncio.sleep(5)
-                    continue
-                if not self.following_user:
-                    # Filter only dance emotes from the loaded EMOTE_DICT
-                    dance_keys = [k for k in self.emote_keys
-                                  if any(tag in self.emote_dict[k][0].lower()
-                                         for tag in ('dance', 'idle-dance', 'idle_dance'))]
-                    if dance_keys:
-                        key = random.choice(dance_keys)
-                        emote_id = self.emote_dict[key][0]
-                        duration = float(self.emote_dict[key][1])
-                        await self.highrise.send_emote(emote_id)
-                        # Wait for emote to finish before picking the next one
-                        await asyncio.sleep(max(duration - 0.5, 2.0))
-                    else:
-                        await asyncio.sleep(10)
-                else:
-                    await asyncio.sleep(2)
-            except Exception as e:
-                err = str(e).lower()
-                if "not in room" in err or "user not" in err:
-                    await asyncio.sleep(10)
-                elif "closing transport" in err or "not connected" in err:
-                    self.is_connected = False
-                    print("[bot_brain] Connection lost — pausing")
-                    await asyncio.sleep(10)
-                else:
-                    print(f"Error in bot_brain: {e}")
-                    await asyncio.sleep(5)
+        try:
+            if not self.is_connected:
+                return 5
+            if self.following_user:
+                return 2
+            dances = self.emotes.tagged("dance")
+            if not dances:
+                return 10
+            emote = random.choice(dances)
+            await self.highrise.send_emote(emote.id)
+            # Wait for emote to finish before picking the next one
+            return max(emote.duration - 0.5, 2.0)
+        except Exception as e:
+            err = str(e).lower()
+            if "not in room" in err or "user not" in err:
+                return 10
+            elif "closing transport" in err or "not connected" in err:
+                self.is_connected = False
+                print("[bot_brain] Connection lost — pausing")
+                return 10
+            print(f"Error in bot_brain: {e}")
+            return 5
 
     # ─────────────────────────────────────────────────────────────────
     #  EVENTS
     # ─────────────────────────────────────────────────────────────────
     async def on_user_join(self, user: User, position: Position):
+        self.room.join(user, position)
         try:
+            await self.on_floor_position(user, position)
             if user.username.lower() == "sikiriti_3lal":
                 return  # No greeting or tracking for Sikiriti
             self.user_join_times[user.id] = time.time()
-            self.user_sessions[user.username] = self.user_sessions.get(user.username, 0) + 1
+            self.user_sessions.incr(user.username)
             rating = self.user_ratings.get(user.username, 0)
             rank_name = self.get_rank_name(rating)
             vip_badge = " 👑 [VIP]" if self.has_vip_access(user.username) else ""
 
             if user.username in self.custom_greetings:
-                await self.highrise.chat(
-                    f"⭐ [VIP] {user.username}{vip_badge} ({rank_name}): {self.custom_greetings[user.username]}"
+                self.outbox.say(
+                    f"⭐ [VIP] {user.username}{vip_badge} ({rank_name}): {self.custom_greetings[user.username]}",
+                    priority=GREETING
                 )
             else:
                 # Moroccan Darija greetings — one solid color per message
@@ -1042,23 +1245,18 @@ class MyBot(BaseBot):
                     f"🔥 <#ff2d2d>@{user.username}{vip_badge} wassal! Mrhba bik! [{rank_name}]",
                     f"💎 <#00e5ff>@{user.username}{vip_badge} ja! Kolchi mezyan daba! [{rank_name}]",
                 ]
-                await self.highrise.chat(random.choice(greetings))
+                self.outbox.say(random.choice(greetings), priority=GREETING)
 
             for _ in range(2):
-                await self.highrise.react("heart", user.id)
-                await asyncio.sleep(0.4)
+                self.outbox.react("heart", user.id, priority=GREETING)
 
             # First-time visitor tip
             if user.username not in self.user_stats:
-                self.user_stats[user.username] = {'messages': 0, 'emotes': 0, 'tips_given': 0}
+                self.user_stats[user.username] = dict(self.NEW_STATS_ROW)
                 # Tip first-time visitors 1g only if wallet has enough
                 try:
-                    balance = await self.get_wallet_gold()
-                    if balance >= 1:
-                        gold = self.to_gold_bar(1)
-                        if gold:
-                            await self.highrise.tip_user(user.id, gold)
-                            await self.highrise.chat(f"1 🎁   @{user.username}! ✨")
+                    if await self.ledger.tip(user.id, 1):
+                        self.outbox.say(f"1 🎁   @{user.username}! ✨", priority=GREETING)
                     else:
                         print(f"[Wallet] Skipping welcome tip for {user.username} — wallet empty.")
                 except Exception as e:
@@ -1068,17 +1266,18 @@ class MyBot(BaseBot):
             if user.username not in self.join_points_given:
                 self.join_points_given.add(user.username)
                 self.add_rating_points(user.username, 5)
-            self._persist()
 
         except Exception as e:
             print(f"Error in on_user_join: {e}")
+            self.m_errors.inc(subsystem="on_user_join")
 
     async def on_user_leave(self, user: User):
+        self.room.leave(user.id)
         try:
             if user.id in self.user_join_times:
                 session_time = time.time() - self.user_join_times[user.id]
-                self.user_total_time[user.username] = \
-                    self.user_total_time.get(user.username, 0) + session_time
+                total = self.user_total_time.incr(user.username, session_time)
+                self.lb_time.update(user.username, total)
                 del self.user_join_times[user.id]
                 self.add_rating_points(user.username, int(session_time / 60))
 
@@ -1092,7 +1291,7 @@ class MyBot(BaseBot):
                 f"💎 <#ff4500>@{user.username} msha! Allah ysahel 3lih! ✨",
                 f"🔥 <#bf00ff>Bslama @{user.username}! Nchofok 3la khir! 💫",
             ]
-            await self.highrise.chat(random.choice(goodbyes))
+            self.outbox.say(random.choice(goodbyes), priority=GREETING)
 
             self.vip_warned.discard(user.id)
 
@@ -1100,27 +1299,22 @@ class MyBot(BaseBot):
                 self.following_user = None
                 self.following_username = None
 
-            if user.id in self.looping_users:
-                self.looping_users[user.id] = False
-                await asyncio.sleep(0.3)
-                if user.id in self.looping_users:
-                    del self.looping_users[user.id]
+            self.emote_loops.stop(user.id)
+            self.emote_access.forget(user.id)
 
             # Stop dancing if leaving
-            if user.id in self.users_dancing_on_floor:
-                self.users_dancing_on_floor[user.id] = False
-                await asyncio.sleep(0.3)
-                if user.id in self.users_dancing_on_floor:
-                    del self.users_dancing_on_floor[user.id]
-
-            self._persist()
+            self.users_dancing_on_floor.pop(user.id, None)
+            self.user_zones.pop(user.id, None)
 
         except Exception as e:
             print(f"Error in on_user_leave: {e}")
+            self.m_errors.inc(subsystem="on_user_leave")
 
     async def on_tip(self, sender: User, receiver: User, tip: CurrencyItem):
         try:
             if receiver.id == self.highrise.my_id:
+                if isinstance(tip, CurrencyItem) and tip.type == "gold":
+                    self.ledger.credit(tip.amount)
                 self.update_stats(sender.username, 'tips_given')
                 self.add_rating_points(sender.username, tip.amount)
                 await self.highrise.send_emote("emote-lust")
@@ -1157,18 +1351,18 @@ class MyBot(BaseBot):
 
                 if tip.amount >= 100:
                     mega = self.gradient_text("MEGA TIP", "fire")
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"🔥 {mega}! @{sender.username} 3ta {tip.amount}g!\n"
                         f"{vip_message}"
                     )
                 elif tip.amount >= 50:
                     wow = self.gradient_text("WOW", "cyan")
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"💎 {wow}! @{sender.username} 3ta {tip.amount}g!\n"
                         f"{vip_message if vip_message else ''}"
                     )
                 else:
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"🎉 @{sender.username} 3ta {tip.amount}g! Shukran! 💙"
                         + (f"\n{vip_message}" if vip_message else "")
                     )
@@ -1176,7 +1370,7 @@ class MyBot(BaseBot):
                 # Greeting offer — show on first VIP unlock OR any tip from existing VIP
                 is_vip_now = self.has_vip_access(sender.username)
                 if newly_got_vip:
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"🎁 @{sender.username}, rak VIP! Kteb !setgreeting [greeting dyalk] "
                         f"bach twli t7yyed bik kol mara tdkhol! 👑"
                     )
@@ -1186,13 +1380,13 @@ class MyBot(BaseBot):
                     # Already VIP and tipped again — remind them they can update their greeting
                     current = self.custom_greetings.get(sender.username)
                     if current:
-                        await self.highrise.chat(
+                        self.outbox.say(
                             f"💙 @{sender.username} shukran 3la tip! "
                             f"Greeting dyalek daba: \"{current}\" — "
                             f"Baghi tbdla? Kteb !setgreeting [greeting jdid] 🔄"
                         )
                     else:
-                        await self.highrise.chat(
+                        self.outbox.say(
                             f"💙 @{sender.username} shukran 3la tip! "
                             f"Ma3ndakch greeting — kteb !setgreeting [greeting dyalk] bach t7yed bik! 👑"
                         )
@@ -1201,11 +1395,10 @@ class MyBot(BaseBot):
             else:
                 self.update_stats(sender.username, 'tips_given')
                 self.add_rating_points(sender.username, tip.amount // 2)
-                await self.highrise.chat(f"💝 @{sender.username} tipped @{receiver.username} {tip.amount}g!")
-
-            self._persist()
+                self.outbox.say(f"💝 @{sender.username} tipped @{receiver.username} {tip.amount}g!")
         except Exception as e:
             print(f"Error in on_tip: {e}")
+            self.m_errors.inc(subsystem="on_tip")
 
     async def on_reaction(self, user: User, receiver: User, reaction: str):
         try:
@@ -1219,7 +1412,7 @@ class MyBot(BaseBot):
                     'wave':   ['Salam ', 'Labas?', 'Fin a sat! 😊'],
                 }
                 response = reactions_responses.get(reaction, ['Baraka fik! 😊', 'Mezyan! ✨'])
-                await self.highrise.chat(f"@{user.username} {random.choice(response)}")
+                self.outbox.say(f"@{user.username} {random.choice(response)}", priority=GREETING)
                 # Cooldown — max +3 pts per 60 seconds from reactions
                 now = time.time()
                 last = self.reaction_cooldowns.get(user.username, 0)
@@ -1228,6 +1421,7 @@ class MyBot(BaseBot):
                     self.reaction_cooldowns[user.username] = now
         except Exception as e:
             print(f"Error in on_reaction: {e}")
+            self.m_errors.inc(subsystem="on_reaction")
 
     async def on_emote(self, user: User, emote_id: str, receiver: User | None):
         try:
@@ -1238,12 +1432,20 @@ class MyBot(BaseBot):
             # Only track and react to real human users doing emotes
             self.update_stats(user.username, 'emotes')
             if 'dance' in emote_id.lower():
-                await self.highrise.react("fire", user.id)
+                self.outbox.react("fire", user.id, priority=GREETING, key=("fire", user.id))
         except Exception as e:
             print(f"Error in on_emote: {e}")
+            self.m_errors.inc(subsystem="on_emote")
 
     async def on_user_move(self, user: User, pos: Position):
-        """Follow owner in real-time whenever they move."""
+        """Keep the room cache current, track floor entry/exit and
+        follow owner in real-time whenever they move."""
+        self.room.move(user, pos)
+        try:
+            await self.on_floor_position(user, pos)
+        except Exception as e:
+            print(f"Error checking floors on move: {e}")
+            self.m_errors.inc(subsystem="on_user_move")
         if self.following_user == user.id:
             try:
                 # Use target's facing direction for proper following
@@ -1259,331 +1461,1078 @@ class MyBot(BaseBot):
         try:
             if not self.is_owner(user):
                 # Non-owners get a polite private reply
-                await self.highrise.send_whisper(user.id, "🤫 Whisper commands are for owners only!")
+                self.outbox.whisper(user.id, "🤫 Whisper commands are for owners only!")
                 return
-            await self._handle_owner_command(user, message, whisper=True)
+            await self.commands.dispatch(user, message.strip(), whisper=True)
         except Exception as e:
             print(f"Error in on_whisper: {e}")
+            self.m_errors.inc(subsystem="on_whisper")
 
     async def _w(self, user: User, text: str, whisper: bool):
         """Send response as whisper or public chat depending on context."""
         if whisper:
-            await self.highrise.send_whisper(user.id, text)
+            self.outbox.whisper(user.id, text)
         else:
-            await self.highrise.chat(text)
-
-    async def _handle_owner_command(self, user: User, message: str, whisper: bool = False) -> bool:
-        """
-        Handle all owner-only commands.
-        Returns True if a command was matched (so on_chat can return early).
-        When whisper=True, all responses go to send_whisper instead of chat.
-        """
-        msg = message.strip()
-        low = msg.lower()
+            self.outbox.say(text)
 
-        if low == '!dawya':
-            if self.dawya_active:
-                await self._w(user, "⚠️ Challenge deja active!", whisper)
-            else:
-                self.dawya_active = True
-                self.dawya_claimed = False
-                self.dawya_winner_this_round = None
-                self.dawya_current_word = random.choice(self.dawya_words)
-                announce = self.gradient_text("⚡ WORD CHALLENGE! ⚡", "fire")
-                await self.highrise.chat(
-                    f"{announce}\n"
-                    f"🏃 Awwel wa7ed ykteb '{self.dawya_current_word}' f chat "
-                    f"ywl +5 nqat f leaderboard! 🏆"
-                )
-                async def _expire():
-                    await asyncio.sleep(20)
-                    if self.dawya_active and not self.dawya_claimed:
-                        self.dawya_active = False
-                        self.dawya_current_word = None
-                        await self.highrise.chat(f"⏰ Waqt sala! Ma7ad kteb '{self.dawya_current_word or ''}' 😅")
-                asyncio.create_task(_expire())
-            return True
-
-        # ── MODERATOR MANAGEMENT ─────────────────────────────
-        if low.startswith('!addmod '):
-            target = msg[8:].strip().lstrip('@')
-            self.moderators.add(target)
-            self._persist()
-            await self._w(user, f"🛡️ @{target} added as moderator!", whisper)
-            return True
-
-        if low.startswith('!removemod '):
-            target = msg[11:].strip().lstrip('@')
-            self.moderators.discard(target)
-            self._persist()
-            await self._w(user, f"✅ @{target} removed from moderators.", whisper)
-            return True
-
-        if low == '!modlist':
-            if self.moderators:
-                await self._w(user, f"🛡️ Moderators:\n{', '.join(sorted(self.moderators))}", whisper)
-            else:
-                await self._w(user, "🛡️ No moderators set.", whisper)
-            return True
+    # ─────────────────────────────────────────────────────────────────
+    #  COMMAND TABLE
+    # ─────────────────────────────────────────────────────────────────
+    def _has_permission(self, user: User, perm: str) -> bool:
+        if perm == OWNER:
+            return self.is_owner(user)
+        if perm == MOD:
+            return self.is_owner_or_mod(user)
+        return True
 
-        # ── FOLLOW / STOP ────────────────────────────────────
-        if low in ('follow', '!follow'):
-            self.following_user = user.id
-            self.following_username = user.username
-            asyncio.create_task(self.follow_loop())
-            await self._w(user, f"🚶 Now following @{user.username}!", whisper)
-            return True
+    def _register_commands(self):
+        """Every chat/whisper command: tokens, handler, permission, cooldown, routing.
+        See commands.py — dispatch is a lookup on the message's first token."""
+        reg = self.commands.register
+        cd = self.cooldown_seconds
+        owner_only = "❌ Only the owner can use {}!"
+
+        # Owner commands — chat or whisper, replies follow the channel
+        reg(('!dawya',),                 self._cmd_dawya,       perm=OWNER, route=REPLY)
+        reg(('!addmod',),                self._cmd_addmod,      perm=OWNER, route=REPLY, args=True)
+        reg(('!removemod',),             self._cmd_removemod,   perm=OWNER, route=REPLY, args=True)
+        reg(('!modlist',),               self._cmd_modlist,     perm=OWNER, route=REPLY)
+        reg(('follow', '!follow'),       self._cmd_follow,      perm=OWNER, route=REPLY)
+        reg(('!stop', '!unfollow'),      self._cmd_stop,        perm=OWNER, route=REPLY)
+        reg(('!setvipfloor', '!setvip', '!setdancefloor', '!setdance'),
+                                         self._cmd_setfloor,    perm=OWNER, route=REPLY)
+        reg(('!setzone',),               self._cmd_setzone,     perm=OWNER, route=REPLY, args="optional")
+        reg(('!zonepoint', '!vippoint', '!dancepoint'),
+                                         self._cmd_zonepoint,   perm=OWNER, route=REPLY)
+        reg(('!clearzone',),             self._cmd_clearzone,   perm=OWNER, route=REPLY, args=True)
+        reg(('!clearvip',),              self._cmd_clearvip,    perm=OWNER, route=REPLY)
+        reg(('!cleardance',),            self._cmd_cleardance,  perm=OWNER, route=REPLY)
+        reg(('!floorstatus',),           self._cmd_floorstatus, perm=OWNER, route=REPLY)
+        reg(('!zones',),                 self._cmd_zones,       perm=OWNER, route=REPLY)
+        reg(('!announce',),              self._cmd_announce,    perm=OWNER, route=REPLY, args=True)
+        reg(('!ownercmds',),             self._cmd_ownercmds,   perm=OWNER, route=REPLY)
+        reg(('!cmdstats',),              self._cmd_cmdstats,    perm=OWNER, route=REPLY)
+        reg(('!outbox',),                self._cmd_outbox,      perm=OWNER, route=REPLY)
+        reg(('!jobs',),                  self._cmd_jobs,        perm=OWNER, route=REPLY)
+        reg(('!sched',),                 self._cmd_sched,       perm=OWNER, route=REPLY)
+        reg(('!canceljob',),             self._cmd_canceljob,   perm=OWNER, route=REPLY, args=True)
+        reg(('!myoutfit',),              self._cmd_myoutfit,    perm=OWNER, route=REPLY)
+        reg(('!outfit',),                self._cmd_outfit,      perm=OWNER, route=REPLY, numbered=True)
+        reg(('!setpos',),                self._cmd_setpos,      perm=OWNER, route=REPLY)
+        reg(('!clearlb',),               self._cmd_clearlb,     perm=OWNER, route=REPLY)
+        reg(('!resetstats',),            self._cmd_resetstats,  perm=OWNER, route=REPLY)
+        reg(('!hearts',),                self._cmd_hearts,      perm=OWNER, route=REPLY)
+
+        # Owner data commands — public chat
+        reg(('!data',),                  self._cmd_data,           perm=OWNER)
+        reg(('!viplist',),               self._cmd_viplist,        perm=OWNER)
+        reg(('!timedvip',),              self._cmd_timedvip,       perm=OWNER)
+        reg(('!pointslist',),            self._cmd_pointslist,     perm=OWNER)
+        reg(('!greetlist',),             self._cmd_greetlist,      perm=OWNER)
+        reg(('!addvip',),                self._cmd_addvip,         perm=OWNER, args=True)
+        reg(('!removevip',),             self._cmd_removevip,      perm=OWNER, args=True)
+        reg(('!addpermvip',),            self._cmd_addpermvip,     perm=OWNER, args=True)
+        reg(('!addpoints',),             self._cmd_addpoints,      perm=OWNER, args=True)
+        reg(('!removepoints',),          self._cmd_removepoints,   perm=OWNER, args=True)
+        reg(('!setpoints',),             self._cmd_setpoints,      perm=OWNER, args=True)
+        reg(('!addgreeting',),           self._cmd_addgreeting,    perm=OWNER, args=True)
+        reg(('!removegreeting',),        self._cmd_removegreeting, perm=OWNER, args=True)
+
+        # Greetings & info — no cooldown
+        reg(('!setgreeting',),           self._cmd_setgreeting, args=True)
+        reg(('!set',),                   self._cmd_set,         args=True)
+        reg(('!info',),                  self._cmd_info,        args="optional")
+        reg(('!infow',),                 self._cmd_infow,       args="optional")
+
+        # Public commands
+        reg(('!help',),                  self._cmd_help,        cooldown=cd)
+        reg(('!help2',),                 self._cmd_help2,       cooldown=cd)
+        reg(('!help3', '!commands'),     self._cmd_help3,       cooldown=cd)
+        reg(('!vipstatus',),             self._cmd_vipstatus,   cooldown=cd)
+        reg(('!wallet', '!balance', '!gold', '!flous'),
+                                         self._cmd_wallet,      cooldown=cd)
+        reg(('!tip',),                   self._cmd_tip,         perm=OWNER, args=True,
+            denied=owner_only.format('!tip'))
+        reg(('!tipall',),                self._cmd_tipall,      perm=OWNER, args="optional",
+            denied=owner_only.format('!tipall'))
+        reg(('!autotip',),               self._cmd_autotip,     perm=OWNER, args=True,
+            denied=owner_only.format('!autotip'))
+        reg(('!stopautotip',),           self._cmd_stopautotip, perm=OWNER,
+            denied=owner_only.format('!stopautotip'))
+        reg(('!autostatus',),            self._cmd_autostatus,  cooldown=cd)
+        reg(('!vipfloor', 'vip'),        self._cmd_vipfloor,    cooldown=cd)
+        reg(('!dancefloor',),            self._cmd_dancefloor,  cooldown=cd)
+        reg(('!leaderboard', '!top', '!lb'),
+                                         self._cmd_leaderboard, cooldown=cd)
+        reg(('!tiplb', '!tippers'),      self._cmd_tiplb,       cooldown=cd)
+        reg(('!ranks',),                 self._cmd_ranks,       cooldown=cd)
+        reg(('!rank',),                  self._cmd_rank,        cooldown=cd, args="optional")
+        reg(('!stats',),                 self._cmd_stats,       cooldown=cd, args="optional")
+        reg(('!time', '!timelb'),        self._cmd_time,        cooldown=cd)
+        reg(('!tt',),                    self._cmd_tt,          cooldown=cd, args="optional")
+        reg(('!truth',),                 self._cmd_truth,       cooldown=cd)
+        reg(('!dare',),                  self._cmd_dare,        cooldown=cd)
+        reg(('!joke',),                  self._cmd_joke,        cooldown=cd)
+        reg(('!riddle',),                self._cmd_riddle,      cooldown=cd)
+        reg(('!skip',),                  self._cmd_skip,        cooldown=cd)
+        reg(('!roll',),                  self._cmd_roll,        cooldown=cd)
+        reg(('!flip',),                  self._cmd_flip,        cooldown=cd)
+
+        # Emotes
+        reg(('stop',),                   self._cmd_stop,         cooldown=cd, route=REPLY)
+        reg(('random',),                 self._cmd_random,       cooldown=cd)
+        reg(('0',),                      self._cmd_stop_random,  cooldown=cd)
+        reg(('loop',),                   self._cmd_emote_number, cooldown=cd, args=True)
+        reg(('',),                       self._cmd_emote_number, cooldown=cd, numbered=True)
 
-        if low in ('stop', '!stop', '!unfollow'):
+    # ─────────────────────────────────────────────────────────────────
+    #  OWNER COMMANDS (chat or whisper)
+    # ─────────────────────────────────────────────────────────────────
+    async def _cmd_dawya(self, user: User, msg: str, low: str, whisper: bool):
+        if self.dawya_active:
+            await self._w(user, "⚠️ Challenge deja active!", whisper)
+        else:
+            self.start_dawya_round()
+
+    # ── MODERATOR MANAGEMENT ──────────────────────────────────────────
+    async def _cmd_addmod(self, user: User, msg: str, low: str, whisper: bool):
+        target = msg[8:].strip().lstrip('@')
+        self.moderators.add(target)
+        self._persist()
+        await self._w(user, f"🛡️ @{target} added as moderator!", whisper)
+
+    async def _cmd_removemod(self, user: User, msg: str, low: str, whisper: bool):
+        target = msg[11:].strip().lstrip('@')
+        self.moderators.discard(target)
+        self._persist()
+        await self._w(user, f"✅ @{target} removed from moderators.", whisper)
+
+    async def _cmd_modlist(self, user: User, msg: str, low: str, whisper: bool):
+        if self.moderators:
+            await self._w(user, f"🛡️ Moderators:\n{', '.join(sorted(self.moderators))}", whisper)
+        else:
+            await self._w(user, "🛡️ No moderators set.", whisper)
+
+    # ── FOLLOW / STOP ─────────────────────────────────────────────────
+    async def _cmd_follow(self, user: User, msg: str, low: str, whisper: bool):
+        self.following_user = user.id
+        self.following_username = user.username
+        asyncio.create_task(self.follow_loop())
+        await self._w(user, f"🚶 Now following @{user.username}!", whisper)
+
+    async def _cmd_stop(self, user: User, msg: str, low: str, whisper: bool):
+        """Owners: stop following + own loop. Everyone else: stop their emote loop."""
+        if self.is_owner(user):
             self.following_user = None
             self.following_username = None
-            if user.id in self.looping_users:
-                self.looping_users[user.id] = False
-                await asyncio.sleep(0.3)
-                if user.id in self.looping_users:
-                    del self.looping_users[user.id]
+        self.emote_loops.stop(user.id)
+        if self.is_owner(user):
             await self._w(user, "🛑 Stopped.", whisper)
-            return True
+        else:
+            self.outbox.say(f"🛑 @{user.username} stopped.")
 
-        # ── VIP FLOOR SETUP ──────────────────────────────────
+    # ── ZONE BUILDER ──────────────────────────────────────────────────
+    # !setzone name [kind] → !zonepoint ×2. The VIP/dance floor commands are
+    # shortcuts for the same wizard with a fixed name and kind.
+    async def _cmd_setfloor(self, user: User, msg: str, low: str, whisper: bool):
         if low in ('!setvipfloor', '!setvip'):
-            self.floor_setup['vip'] = {'step': 1, 'point1': None}
+            await self._start_zone_setup(user, 'vip', 'vip', "👑 VIP Floor", "!vippoint", whisper)
+        else:
+            await self._start_zone_setup(user, 'dance', 'dance', "🕺 Dance Floor", "!dancepoint", whisper)
+
+    async def _cmd_setzone(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        if len(parts) < 2:
+            await self._w(user, f"Usage: !setzone name [{'|'.join(ZONE_KINDS)}]", whisper)
+            return
+        name = parts[1].lower()
+        kind = parts[2].lower() if len(parts) >= 3 else 'custom'
+        if kind not in ZONE_KINDS:
+            await self._w(user, f"❌ Unknown kind '{kind}'. Use: {', '.join(ZONE_KINDS)}", whisper)
+            return
+        await self._start_zone_setup(user, name, kind, f"🗺️ Zone '{name}' ({kind})", "!zonepoint", whisper)
+
+    async def _start_zone_setup(self, user: User, name: str, kind: str, label: str,
+                                point_cmd: str, whisper: bool):
+        self.zone_setup[user.id] = {'name': name, 'kind': kind, 'step': 1, 'point1': None}
+        await self._w(user,
+            f"{label} Setup — Step 1/2\n"
+            "Walk to the FIRST corner of the area\n"
+            f"then type: {point_cmd}", whisper)
+
+    async def _cmd_zonepoint(self, user: User, msg: str, low: str, whisper: bool):
+        setup = self.zone_setup.get(user.id)
+        if not setup:
+            await self._w(user, "⚠️ Start with !setzone, !setvipfloor or !setdancefloor first.", whisper)
+            return
+        my_pos = self.room.position(user.id)
+        if my_pos is None or not hasattr(my_pos, 'x'):
+            await self._w(user, "❌ Can't find your position. Try again.", whisper)
+            return
+        if setup['step'] == 1:
+            setup['point1'] = {'x': my_pos.x, 'y': my_pos.y, 'z': my_pos.z}
+            setup['step'] = 2
             await self._w(user,
-                "👑 VIP Floor Setup — Step 1/2\n"
-                "Walk to the FIRST corner of the VIP area\n"
-                "then type: !vippoint", whisper)
-            return True
+                f"✅ Point 1 saved: ({my_pos.x:.1f}, {my_pos.y:.1f}, {my_pos.z:.1f})\n"
+                "Step 2/2: Walk to the OPPOSITE corner\n"
+                f"then type: {low}", whisper)
+        else:
+            zone = Zone.from_corners(setup['name'], setup['kind'], setup['point1'],
+                                     {'x': my_pos.x, 'y': my_pos.y, 'z': my_pos.z})
+            self.zones.add(zone)
+            del self.zone_setup[user.id]
+            self._persist()
+            asyncio.create_task(self.sweep_floors())
+            await self._w(user,
+                f"✅ Zone '{zone.name}' ({zone.kind}) set!\n"
+                f"Center: ({zone.x:.1f}, {zone.y:.1f}, {zone.z:.1f})", whisper)
 
-        if low == '!vippoint':
-            setup = self.floor_setup['vip']
-            room_users = await self.safe_get_room_users()
-            my_pos = next((p for u, p in room_users
-                           if u.username.lower() == self.owner_username.lower()), None)
-            if my_pos is None:
-                await self._w(user, "❌ Can't find your position. Try again.", whisper)
-                return True
-            if setup['step'] == 1:
-                setup['point1'] = {'x': my_pos.x, 'y': my_pos.y, 'z': my_pos.z}
-                setup['step'] = 2
-                await self._w(user,
-                    f"✅ Point 1 saved: ({my_pos.x:.1f}, {my_pos.y:.1f}, {my_pos.z:.1f})\n"
-                    "Step 2/2: Walk to the OPPOSITE corner\n"
-                    "then type: !vippoint", whisper)
-            elif setup['step'] == 2:
-                p1 = setup['point1']
-                self.vip_floor = {
-                    'x':  (p1['x'] + my_pos.x) / 2,
-                    'y':  (p1['y'] + my_pos.y) / 2,
-                    'z':  (p1['z'] + my_pos.z) / 2,
-                    'rx': abs(p1['x'] - my_pos.x) / 2 + 0.5,
-                    'ry': max(abs(p1['y'] - my_pos.y) / 2, 0.6),
-                    'rz': abs(p1['z'] - my_pos.z) / 2 + 0.5,
+    # ── ZONE / FLOOR CLEAR ────────────────────────────────────────────
+    async def _cmd_clearzone(self, user: User, msg: str, low: str, whisper: bool):
+        name = msg[11:].strip().lower()
+        if self.zones.remove(name):
+            self._persist()
+            asyncio.create_task(self.sweep_floors())
+            await self._w(user, f"🗑️ Zone '{name}' cleared!", whisper)
+        else:
+            await self._w(user, f"❌ No zone named '{name}'.", whisper)
+
+    async def _cmd_clearvip(self, user: User, msg: str, low: str, whisper: bool):
+        self.zones.remove_kind("vip")
+        self.vip_warned.clear()
+        self._persist()
+        await self._w(user, "🗑️ VIP floor cleared!", whisper)
+
+    async def _cmd_cleardance(self, user: User, msg: str, low: str, whisper: bool):
+        self.zones.remove_kind("dance")
+        self.dance_floor_emote = None
+        self.users_dancing_on_floor.clear()
+        self._persist()
+        await self._w(user, "🗑️ Dance floor cleared!", whisper)
+
+    # ── FLOOR STATUS ──────────────────────────────────────────────────
+    async def _cmd_floorstatus(self, user: User, msg: str, low: str, whisper: bool):
+        vip_s = (f"({self.vip_floor['x']:.1f}, {self.vip_floor['y']:.1f}, {self.vip_floor['z']:.1f})"
+                 if self.vip_floor else "Not set")
+        dan_s = (f"({self.dance_floor['x']:.1f}, {self.dance_floor['y']:.1f}, {self.dance_floor['z']:.1f})"
+                 if self.dance_floor else "Not set")
+        await self._w(user,
+            f"🗺️ Floor Status:\n"
+            f"👑 VIP Floor: {vip_s}\n"
+            f"🕺 Dance Floor: {dan_s}\n"
+            f"📍 Zones: {len(self.zones)} (!zones)", whisper)
+
+    async def _cmd_zones(self, user: User, msg: str, low: str, whisper: bool):
+        if not len(self.zones):
+            await self._w(user, "🗺️ No zones set.", whisper)
+            return
+        lines = [f"{z.name} [{z.kind}] ({z.x:.1f}, {z.y:.1f}, {z.z:.1f})" for z in self.zones]
+        for i in range(0, len(lines), 6):
+            await self._w(user, "🗺️ " + "\n".join(lines[i:i+6]), whisper)
+
+    # ── ANNOUNCE ──────────────────────────────────────────────────────
+    async def _cmd_announce(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(f"📢 ANNOUNCEMENT: {msg[10:].strip()}")
+        if whisper:
+            await self._w(user, "✅ Announcement sent!", whisper)
+
+    # ── OWNER HELP ────────────────────────────────────────────────────
+    async def _cmd_ownercmds(self, user: User, msg: str, low: str, whisper: bool):
+        await self._w(user,
+            "👑 OWNER COMMANDS (whisper these!):\n"
+            "follow / stop — follow/unfollow\n"
+            "!addmod @u / !removemod @u\n"
+            "!modlist\n"
+            "!setvipfloor → !vippoint ×2\n"
+            "!setdancefloor → !dancepoint ×2\n"
+            "!setzone name kind → !zonepoint ×2\n"
+            "!clearvip / !cleardance / !clearzone name\n"
+            "!floorstatus / !zones\n"
+            "!clearlb / !resetstats\n"
+            "!setpos / !announce [msg]\n"
+            "!hearts / !cmdstats / !outbox\n"
+            "!jobs / !canceljob id / !sched", whisper)
+
+    async def _cmd_cmdstats(self, user: User, msg: str, low: str, whisper: bool):
+        """Busiest commands by total handler time."""
+        busiest = self.commands.stats()
+        if not busiest:
+            await self._w(user, "⏱️ No commands run yet.", whisper)
+            return
+        lines = [f"{c.name or '#'} {c.calls}× avg {c.avg_ms:.0f}ms max {c.max_ms:.0f}ms"
+                 + (f" ⚠️{c.errors}" if c.errors else "") for c in busiest]
+        await self._w(user, "⏱️ Command latency:\n" + "\n".join(lines), whisper)
+
+    async def _cmd_outbox(self, user: User, msg: str, low: str, whisper: bool):
+        """Outbound queue depth and counters."""
+        s = self.outbox.stats()
+        pending = " ".join(f"{k}:{v}" for k, v in s["depth_by_priority"].items() if v)
+        await self._w(user,
+            f"📤 Outbox: {s['depth']} queued{f' ({pending})' if pending else ''}\n"
+            f"sent {s['sent']} | dropped {s['dropped']} | merged {s['merged']} | failed {s['failed']}\n"
+            f"wait last {s['last_wait']:.1f}s max {s['max_wait']:.1f}s", whisper)
+
+    async def _cmd_jobs(self, user: User, msg: str, low: str, whisper: bool):
+        """Running and recently finished bulk jobs."""
+        lines = [job.summary() for job in self.jobs]
+        if not lines:
+            await self._w(user, "📋 No bulk jobs.", whisper)
+            return
+        await self._w(user, "📋 Jobs:\n" + "\n".join(lines[-8:]), whisper)
+
+    async def _cmd_sched(self, user: User, msg: str, low: str, whisper: bool):
+        """Scheduled jobs: next run, runs, average / max run time."""
+        lines = []
+        for name, due, stats, pending in self.scheduler.jobs():
+            when = f"in {due:.0f}s" if due is not None else (f"{pending} pending" if pending else "idle")
+            lines.append(f"{name} {when} | {stats.runs}× avg {stats.avg_ms:.0f}ms max {stats.max_ms:.0f}ms"
+                         + (f" ⚠️{stats.errors}" if stats.errors else ""))
+        lag = self.loop_lag
+        lines.append(f"loop lag {lag.lag * 1000:.0f}ms max {lag.max_lag * 1000:.0f}ms | stalls {lag.stalls}")
+        for stall in list(lag.recent)[-3:]:
+            lines.append(f"🐢 {stall.lag:.1f}s {stall.task} @ {stall.where}")
+        await self._w(user, "🗓️ Scheduler:\n" + "\n".join(lines), whisper)
+
+    async def _cmd_canceljob(self, user: User, msg: str, low: str, whisper: bool):
+        arg = msg.split()[1].lstrip('#')
+        if not arg.isdigit():
+            await self._w(user, "Usage: !canceljob 3", whisper)
+            return
+        if self.jobs.cancel(int(arg)):
+            await self._w(user, f"🛑 Job #{arg} stopping after the current step.", whisper)
+        else:
+            await self._w(user, f"❌ No running job #{arg}.", whisper)
+
+    # ── OUTFIT COMMANDS (owner only) ──────────────────────────────────
+    async def _cmd_myoutfit(self, user: User, msg: str, low: str, whisper: bool):
+        try:
+            resp = await self.highrise.get_outfit()
+            items = resp.outfit if hasattr(resp, 'outfit') else []
+            if not items:
+                await self._w(user, "❌ Could not get bot outfit!", whisper)
+                return
+            lines = ["👗 Bot current outfit item IDs:"]
+            for item in items:
+                lines.append(f"  type={item.type} id={item.id}")
+            # Split into chunks of 10 lines
+            chunk = []
+            for line in lines:
+                chunk.append(line)
+                if len(chunk) == 10:
+                    await self._w(user, "\n".join(chunk), whisper)
+                    chunk = []
+            if chunk:
+                await self._w(user, "\n".join(chunk), whisper)
+        except Exception as e:
+            await self._w(user, f"❌ Error: {e}", whisper)
+
+    async def _cmd_outfit(self, user: User, msg: str, low: str, whisper: bool):
+        """!outfit1 through !outfit20"""
+        num = int(low[len('!outfit'):])
+        if num < 1 or num > 20:
+            await self._w(user, "❌ Use !outfit1 to !outfit20", whisper)
+            return
+        items = self.outfits.get(num, [])
+        if not items:
+            await self._w(user, f"❌ Outfit {num} is empty! Run !myoutfit to get item IDs and fill self.outfits[{num}] in main.py", whisper)
+            return
+        try:
+            outfit_items = [Item(type=i["type"], id=i["id"], amount=i.get("amount","1")) for i in items]
+            await self.highrise.set_outfit(outfit_items)
+            await self._w(user, f"✅ Outfit {num} applied! 👗", whisper)
+        except Exception as e:
+            await self._w(user, f"❌ Could not apply outfit {num}: {e}", whisper)
+            print(f"[Outfit] Error applying outfit {num}: {e}")
+
+    # ── SET POSITION ──────────────────────────────────────────────────
+    async def _cmd_setpos(self, user: User, msg: str, low: str, whisper: bool):
+        try:
+            bot_pos = self.room.position(self.highrise.my_id)
+            if bot_pos and hasattr(bot_pos, 'x'):
+                self.bot_last_position = {
+                    'x': bot_pos.x, 'y': bot_pos.y,
+                    'z': bot_pos.z, 'facing': bot_pos.facing
                 }
-                setup['step'] = 0
                 self._persist()
                 await self._w(user,
-                    f"✅ VIP Floor set!\n"
-                    f"Center: ({self.vip_floor['x']:.1f}, {self.vip_floor['y']:.1f}, {self.vip_floor['z']:.1f})\n"
-                    "👑 VIP members only!", whisper)
+                    f"✅ Bot position saved!\n"
+                    f"({bot_pos.x:.1f}, {bot_pos.y:.1f}, {bot_pos.z:.1f})\n"
+                    "Bot will spawn here after reconnect!", whisper)
             else:
-                await self._w(user, "⚠️ Start with !setvipfloor first.", whisper)
-            return True
+                await self._w(user, "❌ Could not find bot position!", whisper)
+        except Exception as e:
+            print(f"Error setting position: {e}")
+            await self._w(user, "❌ Error saving position!", whisper)
+
+    # ── CLEAR LEADERBOARD ─────────────────────────────────────────────
+    async def _cmd_clearlb(self, user: User, msg: str, low: str, whisper: bool):
+        self.user_ratings.clear()
+        self.lb_points.reset()
+        self.rank_index.reset()
+        await self._w(user, "🗑️ Leaderboard cleared!", whisper)
+
+    # ── RESET ALL STATS ───────────────────────────────────────────────
+    async def _cmd_resetstats(self, user: User, msg: str, low: str, whisper: bool):
+        self.user_stats.clear()
+        self.user_ratings.clear()
+        self.tip_totals.clear()
+        self.user_total_time.clear()
+        for board in (self.lb_points, self.lb_tips, self.lb_time, self.rank_index):
+            board.reset()
+        self._persist()
+        await self._w(user, "⚠️ ALL user stats reset!", whisper)
+
+    # ── HEARTS ────────────────────────────────────────────────────────
+    async def _cmd_hearts(self, user: User, msg: str, low: str, whisper: bool):
+        targets = [u for u, _ in self.room.users() if u.id != self.highrise.my_id]
+        if not targets:
+            await self._w(user, "❌ No users in room!", whisper)
+            return
+        job = self.jobs.start("hearts", user.username, [(u.id, u.username) for u in targets])
+        self.outbox.say(f"💙 Sending blue hearts to everyone! ({len(targets)} users, job #{job.id})")
 
-        # ── DANCE FLOOR SETUP ────────────────────────────────
-        if low in ('!setdancefloor', '!setdance'):
-            self.floor_setup['dance'] = {'step': 1, 'point1': None}
-            await self._w(user,
-                "🕺 Dance Floor Setup — Step 1/2\n"
-                "Walk to the FIRST corner of the dance area\n"
-                "then type: !dancepoint", whisper)
-            return True
+    # ─────────────────────────────────────────────────────────────────
+    #  OWNER DATA COMMANDS (public chat)
+    # ─────────────────────────────────────────────────────────────────
+    async def _cmd_data(self, user: User, msg: str, low: str, whisper: bool):
+        """!data — overview"""
+        self.outbox.say(f"📊 VIP💎{len(self.vip_permanent)} Timed⏰{len(self.vip_timed)} Pts⭐{len(self.user_ratings)} Greet💬{len(self.custom_greetings)} Mods🛡️{len(self.moderators)}")
+        self.outbox.say("!viplist !timedvip !pointslist !greetlist")
+
+    async def _cmd_viplist(self, user: User, msg: str, low: str, whisper: bool):
+        """!viplist — permanent VIPs"""
+        if self.vip_permanent:
+            vips = list(self.vip_permanent)
+            chunks = [vips[i:i+5] for i in range(0, len(vips), 5)]
+            for chunk in chunks:
+                self.outbox.say("💎 " + " | ".join(chunk))
+        else:
+            self.outbox.say("💎 No permanent VIPs.")
 
-        if low == '!dancepoint':
-            setup = self.floor_setup['dance']
-            room_users = await self.safe_get_room_users()
-            my_pos = next((p for u, p in room_users
-                           if u.username.lower() == self.owner_username.lower()), None)
-            if my_pos is None:
-                await self._w(user, "❌ Can't find your position. Try again.", whisper)
-                return True
-            if setup['step'] == 1:
-                setup['point1'] = {'x': my_pos.x, 'y': my_pos.y, 'z': my_pos.z}
-                setup['step'] = 2
-                await self._w(user,
-                    f"✅ Point 1 saved: ({my_pos.x:.1f}, {my_pos.y:.1f}, {my_pos.z:.1f})\n"
-                    "Step 2/2: Walk to the OPPOSITE corner\n"
-                    "then type: !dancepoint", whisper)
-            elif setup['step'] == 2:
-                p1 = setup['point1']
-                self.dance_floor = {
-                    'x':  (p1['x'] + my_pos.x) / 2,
-                    'y':  (p1['y'] + my_pos.y) / 2,
-                    'z':  (p1['z'] + my_pos.z) / 2,
-                    'rx': abs(p1['x'] - my_pos.x) / 2 + 0.5,
-                    'ry': max(abs(p1['y'] - my_pos.y) / 2, 0.6),
-                    'rz': abs(p1['z'] - my_pos.z) / 2 + 0.5,
-                }
-                setup['step'] = 0
+    async def _cmd_timedvip(self, user: User, msg: str, low: str, whisper: bool):
+        """!timedvip — timed VIPs with time left"""
+        if self.vip_timed:
+            now = time.time()
+            lines = []
+            for u, exp in self.vip_timed.items():
+                rem = exp - now
+                lines.append(f"{u}:{int(rem//86400)}d{int((rem%86400)//3600)}h" if rem > 0 else f"{u}:expired")
+            chunks = [lines[i:i+4] for i in range(0, len(lines), 4)]
+            for chunk in chunks:
+                self.outbox.say("⏰ " + " | ".join(chunk))
+        else:
+            self.outbox.say("⏰ No timed VIPs.")
+
+    async def _cmd_pointslist(self, user: User, msg: str, low: str, whisper: bool):
+        """!pointslist — top 15"""
+        sorted_pts = self.lb_points.top(15)
+        lines = [f"{i+1}.{u}:{p}" for i, (u, p) in enumerate(sorted_pts)]
+        chunks = [lines[i:i+5] for i in range(0, len(lines), 5)]
+        for chunk in chunks:
+            self.outbox.say("⭐ " + " | ".join(chunk))
+
+    async def _cmd_greetlist(self, user: User, msg: str, low: str, whisper: bool):
+        """!greetlist — all greetings"""
+        if self.custom_greetings:
+            lines = [f"{u}: {g[:20]}" for u, g in list(self.custom_greetings.items())[:12]]
+            chunks = [lines[i:i+3] for i in range(0, len(lines), 3)]
+            for chunk in chunks:
+                self.outbox.say("💬 " + " | ".join(chunk))
+        else:
+            self.outbox.say("💬 No greetings.")
+
+    async def _cmd_addvip(self, user: User, msg: str, low: str, whisper: bool):
+        """!addvip username hours"""
+        parts = msg.split()
+        if len(parts) >= 3:
+            try:
+                target, hours = parts[1], float(parts[2])
+                self.vip_timed[target] = time.time() + hours * 3600
                 self._persist()
-                await self._w(user,
-                    f"✅ Dance Floor set!\n"
-                    f"Center: ({self.dance_floor['x']:.1f}, {self.dance_floor['y']:.1f}, {self.dance_floor['z']:.1f})\n"
-                    "🕺 Everyone can dance here!", whisper)
+                self.outbox.say(f"✅ @{target} VIP {int(hours//24)}d{int(hours%24)}h!")
+            except:
+                self.outbox.say("❌ !addvip username hours")
+        else:
+            self.outbox.say("❌ !addvip username hours")
+
+    async def _cmd_removevip(self, user: User, msg: str, low: str, whisper: bool):
+        """!removevip username"""
+        parts = msg.split()
+        if len(parts) >= 2:
+            target = parts[1]
+            removed = False
+            if target in self.vip_timed:
+                del self.vip_timed[target]; removed = True
+            if target in self.vip_permanent:
+                self.vip_permanent.discard(target); removed = True
+            if removed:
+                self._persist()
+                self.outbox.say(f"✅ VIP removed: @{target}")
             else:
-                await self._w(user, "⚠️ Start with !setdancefloor first.", whisper)
-            return True
+                self.outbox.say(f"❌ @{target} has no VIP")
 
-        # ── FLOOR CLEAR ──────────────────────────────────────
-        if low == '!clearvip':
-            self.vip_floor = None
+    async def _cmd_addpermvip(self, user: User, msg: str, low: str, whisper: bool):
+        """!addpermvip username"""
+        parts = msg.split()
+        if len(parts) >= 2:
+            self.vip_permanent.add(parts[1])
             self._persist()
-            await self._w(user, "🗑️ VIP floor cleared!", whisper)
-            return True
+            self.outbox.say(f"💎 @{parts[1]} Permanent VIP!")
 
-        if low == '!cleardance':
-            self.dance_floor = None
-            self.dance_floor_emote = None
-            self._persist()
-            await self._w(user, "🗑️ Dance floor cleared!", whisper)
-            return True
+    async def _cmd_addpoints(self, user: User, msg: str, low: str, whisper: bool):
+        """!addpoints username amount"""
+        parts = msg.split()
+        if len(parts) >= 3:
+            try:
+                target, amount = parts[1], int(parts[2])
+                self.add_rating_points(target, amount)
+                self._persist()
+                self.outbox.say(f"✅ +{amount}pts @{target} → {self.user_ratings[target]}")
+            except:
+                self.outbox.say("❌ !addpoints username amount")
+        else:
+            self.outbox.say("❌ !addpoints username amount")
 
-        # ── FLOOR STATUS ─────────────────────────────────────
-        if low == '!floorstatus':
-            vip_s = (f"({self.vip_floor['x']:.1f}, {self.vip_floor['y']:.1f}, {self.vip_floor['z']:.1f})"
-                     if self.vip_floor else "Not set")
-            dan_s = (f"({self.dance_floor['x']:.1f}, {self.dance_floor['y']:.1f}, {self.dance_floor['z']:.1f})"
-                     if self.dance_floor else "Not set")
-            await self._w(user,
-                f"🗺️ Floor Status:\n"
-                f"👑 VIP Floor: {vip_s}\n"
-                f"🕺 Dance Floor: {dan_s}", whisper)
-            return True
+    async def _cmd_removepoints(self, user: User, msg: str, low: str, whisper: bool):
+        """!removepoints username amount"""
+        parts = msg.split()
+        if len(parts) >= 3:
+            try:
+                target, amount = parts[1], int(parts[2])
+                self.set_rating_points(target, max(0, self.user_ratings.get(target, 0) - amount))
+                self._persist()
+                self.outbox.say(f"✅ -{amount}pts @{target} → {self.user_ratings[target]}")
+            except:
+                self.outbox.say("❌ !removepoints username amount")
+        else:
+            self.outbox.say("❌ !removepoints username amount")
 
-        # ── ANNOUNCE ─────────────────────────────────────────
-        if low.startswith('!announce '):
-            await self.highrise.chat(f"📢 ANNOUNCEMENT: {msg[10:].strip()}")
-            if whisper:
-                await self._w(user, "✅ Announcement sent!", whisper)
-            return True
+    async def _cmd_setpoints(self, user: User, msg: str, low: str, whisper: bool):
+        """!setpoints username amount"""
+        parts = msg.split()
+        if len(parts) >= 3:
+            try:
+                target, amount = parts[1], int(parts[2])
+                self.set_rating_points(target, amount)
+                self._persist()
+                self.outbox.say(f"✅ @{target} points = {amount}")
+            except:
+                self.outbox.say("❌ !setpoints username amount")
+
+    async def _cmd_addgreeting(self, user: User, msg: str, low: str, whisper: bool):
+        """!addgreeting username text"""
+        parts = msg.split(None, 2)
+        if len(parts) >= 3:
+            self.custom_greetings[parts[1]] = parts[2]
+            self._persist()
+            self.outbox.say(f"✅ Greeting set: @{parts[1]}")
+        else:
+            self.outbox.say("❌ !addgreeting username text")
+
+    async def _cmd_removegreeting(self, user: User, msg: str, low: str, whisper: bool):
+        """!removegreeting username"""
+        parts = msg.split()
+        if len(parts) >= 2:
+            target = parts[1]
+            if target in self.custom_greetings:
+                del self.custom_greetings[target]
+                self._persist()
+                self.outbox.say(f"✅ Greeting removed: @{target}")
+            else:
+                self.outbox.say(f"❌ No greeting for @{target}")
 
-        # ── OWNER HELP ───────────────────────────────────────
-        if low == '!ownercmds':
-            await self._w(user,
-                "👑 OWNER COMMANDS (whisper these!):\n"
-                "follow / stop — follow/unfollow\n"
-                "!addmod @u / !removemod @u\n"
-                "!modlist\n"
-                "!setvipfloor → !vippoint ×2\n"
-                "!setdancefloor → !dancepoint ×2\n"
-                "!clearvip / !cleardance\n"
-                "!floorstatus\n"
-                "!clearlb / !resetstats\n"
-                "!setpos / !announce [msg]\n"
-                "!hearts", whisper)
-            return True
+    # ─────────────────────────────────────────────────────────────────
+    #  PUBLIC COMMANDS
+    # ─────────────────────────────────────────────────────────────────
+    # ── Custom greeting setter ────────────────────────────────────────
+    async def _cmd_setgreeting(self, user: User, msg: str, low: str, whisper: bool):
+        """Method 1: !setgreeting [text] — any VIP user can use this anytime"""
+        greeting_text = msg[13:].strip()
+        if not self.has_vip_access(user.username):
+            self.outbox.say(f"❌ @{user.username} khssek tkoun VIP bach tdir greeting dyalk! 💎")
+            return
+        if not greeting_text:
+            self.outbox.say(f"❌ @{user.username} kteb: !setgreeting [message dyalk] 📝")
+            return
+        if len(greeting_text) > 200:
+            self.outbox.say(f"❌ @{user.username} message twil bzaf! Max 200 characters.")
+            return
+        self.custom_greetings[user.username] = greeting_text
+        if user.username in self.awaiting_greeting:
+            self.awaiting_greeting.remove(user.username)
+        self._persist()
+        success_msg = f"✅ {self.gradient_text(f'VIP Greeting t7fad l @{user.username}!', 'green')} 🌟"
+        self.outbox.say(success_msg)
+
+    async def _cmd_set(self, user: User, msg: str, low: str, whisper: bool):
+        """Method 2: !set [text] — only for users in awaiting_greeting list (after tipping)"""
+        if user.username not in self.awaiting_greeting:
+            return
+        greeting_text = msg[5:].strip()
+        if not greeting_text:
+            error_msg = f"❌ {self.gradient_text('Khssek tkteb message! Dir !set [Message dyalk]', 'fire')}"
+            self.outbox.say(error_msg)
+            return
+        if len(greeting_text) > 200:
+            error_msg = f"❌ {self.gradient_text('Message twil bzaf! Max 200 characters.', 'fire')}"
+            self.outbox.say(error_msg)
+            return
+        self.custom_greetings[user.username] = greeting_text
+        self.awaiting_greeting.remove(user.username)
+        self._persist()
+        success_msg = f"✅ {self.gradient_text(f'VIP Greeting t7fad l @{user.username}!', 'green')} 🌟"
+        self.outbox.say(success_msg)
+
+    # ── INFO & DATA COMMANDS ──────────────────────────────────────────
+    async def _cmd_info(self, user: User, msg: str, low: str, whisper: bool):
+        """!info [username] — anyone sees own info, owner can check others"""
+        parts = msg.split()
+        target = parts[1] if len(parts) >= 2 and self.is_owner(user) else user.username
+        pts = self.user_ratings.get(target, 0)
+        perm = "💎Yes" if target in self.vip_permanent else "No"
+        timed_str = "No"
+        if target in self.vip_timed:
+            rem = self.vip_timed[target] - time.time()
+            if rem > 0:
+                timed_str = f"{int(rem//86400)}d{int((rem%86400)//3600)}h"
+        is_mod = "Yes" if target in self.moderators else "No"
+        greeting = self.custom_greetings.get(target, "None")[:35]
+        self.outbox.say(f"👤{target} ⭐{pts}pts 💎{perm} ⏰{timed_str} 🛡️{is_mod}")
+        self.outbox.say(f"💬 {greeting}")
+
+    async def _cmd_infow(self, user: User, msg: str, low: str, whisper: bool):
+        """!infow [username] — same but whispered"""
+        parts = msg.split()
+        target = parts[1] if len(parts) >= 2 and self.is_owner(user) else user.username
+        pts = self.user_ratings.get(target, 0)
+        perm = "💎Yes" if target in self.vip_permanent else "No"
+        timed_str = "No"
+        if target in self.vip_timed:
+            rem = self.vip_timed[target] - time.time()
+            if rem > 0:
+                timed_str = f"{int(rem//86400)}d{int((rem%86400)//3600)}h"
+        is_mod = "Yes" if target in self.moderators else "No"
+        greeting = self.custom_greetings.get(target, "None")[:35]
+        self.outbox.whisper(user.id, f"👤{target} ⭐{pts}pts 💎{perm} ⏰{timed_str} 🛡️{is_mod}")
+        self.outbox.whisper(user.id, f"💬 {greeting}")
+
+    # ── HELP ──────────────────────────────────────────────────────────
+    async def _cmd_help(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(
+            "🤖 COMMANDS 1/3\n"
+            "!tip @u 5g|!tipall 5g\n"
+            "!autotip 5g 60s|!stopautotip\n"
+            "👑 30g=1d|100g=7d|500g=dima\n"
+            "!vipstatus | !help2 for more"
+        )
+
+    async def _cmd_help2(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(
+            "🤖 BOT COMMANDS (2/3)\n"
+            "🎭 EMOTES:\n"
+            f"1-{len(self.emotes)} - Do emote\n"
+            "loop N - Loop emote\n"
+            "stop - Stop loop\n\n"
+            "🗺️ FLOORS:\n"
+            "!vipfloor - TP to VIP\n"
+            "!dancefloor - TP to dance\n\n"
+            "Type !help3 for more"
+        )
+
+    async def _cmd_help3(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(
+            "🤖 COMMANDS 3/3\n"
+            "!stats|!rank|!ranks|!lb\n"
+            "!tiplb|!time|!tt @u\n"
+            "!joke|!riddle(!skip)|!dare\n"
+            "!truth|!roll|!flip"
+        )
+
+    # ── VIP STATUS ────────────────────────────────────────────────────
+    async def _cmd_vipstatus(self, user: User, msg: str, low: str, whisper: bool):
+        status = self.get_vip_status_text(user.username)
+        self.outbox.say(f"👑 VIP Status for @{user.username}:\n{status}")
+
+    # ── WALLET BALANCE ────────────────────────────────────────────────
+    async def _cmd_wallet(self, user: User, msg: str, low: str, whisper: bool):
+        if self.is_owner(user):
+            await self.ledger.refresh()  # Owner asking is a good moment to reconcile
+        else:
+            await self.ledger.ensure()
+        balance = self.ledger.available
+        if self.is_owner(user):
+            self.outbox.say(f"💰 Bot wallet: {balance}g")
+        else:
+            self.outbox.say(f"@{user.username} 💰 Bot wallet: {balance}g")
 
-        # ── OUTFIT COMMANDS (owner only) ─────────────────────
-        if low == '!myoutfit':
+    # ── TIP @USER ─────────────────────────────────────────────────────
+    async def _cmd_tip(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        if len(parts) >= 3:
             try:
-                resp = await self.highrise.get_outfit()
-                items = resp.outfit if hasattr(resp, 'outfit') else []
-                if not items:
-                    await self._w(user, "❌ Could not get bot outfit!", whisper)
-                    return True
-                lines = ["👗 Bot current outfit item IDs:"]
-                for item in items:
-                    lines.append(f"  type={item.type} id={item.id}")
-                # Split into chunks of 10 lines
-                chunk = []
-                for line in lines:
-                    chunk.append(line)
-                    if len(chunk) == 10:
-                        await self._w(user, "\n".join(chunk), whisper)
-                        chunk = []
-                if chunk:
-                    await self._w(user, "\n".join(chunk), whisper)
+                target_username = parts[1].lstrip('@')
+                # Accept both "5" and "5g"
+                amount = int(parts[2].replace('g', '').replace('G', ''))
+                if amount <= 0:
+                    self.outbox.say("❌ Amount must be positive!")
+                    return
+                # Find target in room
+                entry = self.room.find(target_username)
+                target_user = entry[0] if entry else None
+                if not target_user:
+                    self.outbox.say(f"❌ @{target_username} not found in room!")
+                    return
+                gold = self.to_gold_bar(amount)
+                if not gold:
+                    self.outbox.say(
+                        f"❌ {amount}g not supported!\nUse: 1, 5, 10, 50, 100, 500, 1000, 5000, 10000"
+                    )
+                    return
+                hold = await self.ledger.reserve(amount)
+                if hold is None:
+                    self.outbox.say(f"❌ Bot wallet is empty! Can't tip @{target_username}. 💸")
+                    return
+                self.outbox.say(f"💸 Tipping @{target_username} {amount}g... ⏳")
+                try:
+                    await hold.tip(target_user.id, amount)
+                finally:
+                    hold.release()
+                self.outbox.say(f"✅ @{target_username} received {amount}g! 💰")
+            except ValueError:
+                self.outbox.say("❌ Invalid amount! Use: !tip @user 5")
             except Exception as e:
-                await self._w(user, f"❌ Error: {e}", whisper)
-            return True
+                self.outbox.say(f"❌ Tip failed: {e}")
+                print(f"[Tip] Error: {e}")
+        else:
+            self.outbox.say("Usage: !tip @username 5")
 
-        # !outfit1 through !outfit20
-        import re as _re
-        outfit_match = _re.fullmatch(r'!outfit(\d+)', low)
-        if outfit_match:
-            num = int(outfit_match.group(1))
-            if num < 1 or num > 20:
-                await self._w(user, "❌ Use !outfit1 to !outfit20", whisper)
-                return True
-            items = self.outfits.get(num, [])
-            if not items:
-                await self._w(user, f"❌ Outfit {num} is empty! Run !myoutfit to get item IDs and fill self.outfits[{num}] in main.py", whisper)
-                return True
+    # ── TIP ALL ───────────────────────────────────────────────────────
+    async def _cmd_tipall(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        if len(parts) >= 2:
             try:
-                from highrise.models import Item
-                outfit_items = [Item(type=i["type"], id=i["id"], amount=i.get("amount","1")) for i in items]
-                await self.highrise.set_outfit(outfit_items)
-                await self._w(user, f"✅ Outfit {num} applied! 👗", whisper)
+                amount = int(parts[1].replace('g', '').replace('G', ''))
+                if amount <= 0:
+                    self.outbox.say("❌ Amount must be positive!")
+                    return
+                if not self.to_gold_bar(amount):
+                    self.outbox.say(f"❌ {amount}g not supported! Use: 1,5,10,50,100,500,1000")
+                    return
+                eligible = [u for u, _ in self.room.users()
+                            if u.id != self.highrise.my_id and u.username != user.username]
+                if not eligible:
+                    self.outbox.say("❌ No other users in room!")
+                    return
+                total = amount * len(eligible)
+                # Hold the whole amount up front so other payouts can't eat into it
+                hold = await self.ledger.reserve(total)
+                if hold is None:
+                    self.outbox.say(
+                        f"❌ Bot wallet is empty or insufficient! Need {total}g but only have {self.ledger.available}g. 💸"
+                    )
+                    return
+                job = self.jobs.start("tipall", user.username,
+                                      [(u.id, u.username) for u in eligible], {"amount": amount})
+                self._tip_holds[job.id] = hold
+                self.outbox.say(
+                    f"💸 Tipping {len(eligible)} users {amount}g each ({total}g total)... ⏳ (job #{job.id})"
+                )
+            except ValueError:
+                self.outbox.say("❌ Invalid amount! Use: !tipall 5")
             except Exception as e:
-                await self._w(user, f"❌ Could not apply outfit {num}: {e}", whisper)
-                print(f"[Outfit] Error applying outfit {num}: {e}")
-            return True
+                self.outbox.say(f"❌ TipAll failed: {e}")
+                print(f"[TipAll] Error: {e}")
+        else:
+            self.outbox.say("Usage: !tipall 5")
 
-        # ── SET POSITION ─────────────────────────────────────
-        if low == '!setpos':
+    # ── AUTO-TIP ──────────────────────────────────────────────────────
+    async def _cmd_autotip(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        if len(parts) >= 3:
             try:
-                room_users = await self.safe_get_room_users()
-                bot_pos = next((p for u, p in room_users if u.id == self.highrise.my_id), None)
-                if bot_pos:
-                    self.bot_last_position = {
-                        'x': bot_pos.x, 'y': bot_pos.y,
-                        'z': bot_pos.z, 'facing': bot_pos.facing
-                    }
-                    self._persist()
-                    await self._w(user,
-                        f"✅ Bot position saved!\n"
-                        f"({bot_pos.x:.1f}, {bot_pos.y:.1f}, {bot_pos.z:.1f})\n"
-                        "Bot will spawn here after reconnect!", whisper)
-                else:
-                    await self._w(user, "❌ Could not find bot position!", whisper)
-            except Exception as e:
-                print(f"Error setting position: {e}")
-                await self._w(user, "❌ Error saving position!", whisper)
-            return True
-
-        # ── CLEAR LEADERBOARD ────────────────────────────────
-        if low == '!clearlb':
-            self.user_ratings = {}
-            self._persist()
-            await self._w(user, "🗑️ Leaderboard cleared!", whisper)
-            return True
+                amount = int(parts[1].replace('g', '').replace('G', ''))
+                interval_raw = parts[2]
+                interval = int(interval_raw.replace('s', '').replace('m', ''))
+                if 'm' in interval_raw:
+                    interval *= 60
+                if amount <= 0 or interval <= 0:
+                    self.outbox.say("❌ Amount and interval must be positive!")
+                    return
+                if interval < 30:
+                    self.outbox.say("❌ Minimum interval is 30 seconds!")
+                    return
+                # Cancel any existing task first
+                if user.username in self.auto_tip_tasks:
+                    self.auto_tip_tasks[user.username].cancel()
+                self.auto_tip_enabled[user.username] = True
+                self.auto_tip_amount[user.username] = amount
+                self.auto_tip_interval[user.username] = interval
+                task = asyncio.create_task(self.auto_tip_loop(user.username))
+                self.auto_tip_tasks[user.username] = task
+                self.outbox.say(
+                    f"✅ Auto-tip ON! Bot tips {amount}g every {interval}s to random users!"
+                )
+            except ValueError:
+                self.outbox.say("❌ Invalid format! Use: !autotip 5 60s")
+        else:
+            self.outbox.say("Usage: !autotip 5 60s (or 1m)")
+
+    async def _cmd_stopautotip(self, user: User, msg: str, low: str, whisper: bool):
+        if user.username in self.auto_tip_tasks or self.auto_tip_enabled.get(user.username):
+            # Hard cancel the task
+            task = self.auto_tip_tasks.pop(user.username, None)
+            if task and not task.done():
+                task.cancel()
+            # Clear all state
+            self.auto_tip_enabled.pop(user.username, None)
+            self.auto_tip_amount.pop(user.username, None)
+            self.auto_tip_interval.pop(user.username, None)
+            self.outbox.say(f"🛑 Auto-tip STOPPED for @{user.username}!")
+        else:
+            self.outbox.say("❌ No active auto-tip found.")
+
+    async def _cmd_autostatus(self, user: User, msg: str, low: str, whisper: bool):
+        if self.auto_tip_enabled.get(user.username):
+            amount = self.auto_tip_amount.get(user.username, 0)
+            interval = self.auto_tip_interval.get(user.username, 0)
+            self.outbox.say(
+                f"✅ Auto-tip ACTIVE\n"
+                f"Tipping {amount}g every {interval}s from bot wallet!"
+            )
+        else:
+            self.outbox.say(f"❌ Auto-tip not active for @{user.username}")
+
+    # ── FLOORS ────────────────────────────────────────────────────────
+    async def _cmd_vipfloor(self, user: User, msg: str, low: str, whisper: bool):
+        if self.has_vip_access(user.username):
+            if self.vip_floor:
+                await self.highrise.teleport(
+                    user.id,
+                    Position(self.vip_floor['x'], self.vip_floor['y'], self.vip_floor['z'])
+                )
+                self.outbox.say(f"👑 @{user.username} → VIP Floor! ✨")
+            else:
+                self.outbox.say("VIP floor not set yet!")
+        else:
+            self.outbox.say(
+                f"@{user.username}, VIP access required!\n"
+                f"💎 30g = 1 day | 100g = 7 days | 500g = Permanent"
+            )
+
+    async def _cmd_dancefloor(self, user: User, msg: str, low: str, whisper: bool):
+        if self.dance_floor:
+            await self.highrise.teleport(
+                user.id,
+                Position(self.dance_floor['x'], self.dance_floor['y'], self.dance_floor['z'])
+            )
+            self.outbox.say(f"🕺 @{user.username} teleported to dance floor!")
+        else:
+            self.outbox.say("Dance floor not set yet!")
+
+    # ── LEADERBOARD ───────────────────────────────────────────────────
+    async def _cmd_leaderboard(self, user: User, msg: str, low: str, whisper: bool):
+        for msg in self.get_leaderboard_text():
+            self.outbox.say(msg)
+        # Contest countdown
+        countdown = get_contest_countdown()
+        if countdown:
+            self.outbox.say(
+                f"🏆 CONTEST — TOP 3 YRBHO!\n"
+                f"⏳ Remaining: {countdown}\n"
+                f"💡 Earn pts: 💬chat|💃dance|🎁tip 1gold = 1point|⏱️stay!"
+            )
+        else:
+            self.outbox.say("💡 Earn pts: 💬chat|💃dance|🎁tip bot: 1gold=1point|⏱️stay!")
+
+    async def _cmd_tiplb(self, user: User, msg: str, low: str, whisper: bool):
+        for msg in self.get_tips_leaderboard_text():
+            self.outbox.say(msg)
+
+    # ── RANKS & STATS ─────────────────────────────────────────────────
+    async def _cmd_ranks(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(
+            "⭐ RANK SYSTEM ⭐\n"
+            "🌱 ROOKIE: 0-49 pts\n"
+            "🥉 BRONZE: 50-149 pts\n"
+            "🥈 SILVER: 150-299 pts\n"
+            "⭐ GOLD: 300-499 pts\n"
+            "👑 PLATINUM: 500-749 pts\n"
+            "💎 DIAMOND: 750-999 pts\n"
+            "🔥 LEGEND: 1000+ pts"
+        )
+
+    async def _cmd_rank(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        target = parts[1].lstrip('@') if len(parts) > 1 else user.username
+        rating = self.user_ratings.get(target, 0)
+        vip_status = " 👑 [VIP]" if self.has_vip_access(target) else ""
+        position = self.rank_position_text(target)
+        self.outbox.say(
+            f"🏅 @{target}{vip_status}\n"
+            f"Rating: {rating} pts\nRank: {self.get_rank_name(rating)}"
+            + (f"\n📈 {position}" if position else "")
+        )
+
+    async def _cmd_stats(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        target = parts[1].lstrip('@') if len(parts) > 1 else user.username
+        if target in self.user_stats:
+            stats = self.user_stats[target]
+            pts = self.user_ratings.get(target, 0)
+            self.outbox.say(
+                f"📊 @{target}:\n"
+                f"💬 {stats['messages']} msgs|🎭 {stats['emotes']} emotes\n"
+                f"⏰ {self.format_time(self.user_total_time.get(target, 0))}\n"
+                f"🏅 {self.get_rank_name(pts)} ({pts} pts) {self.rank_position_text(target)}".rstrip()
+            )
+        else:
+            self.outbox.say(f"No stats for @{target}")
 
-        # ── RESET ALL STATS ──────────────────────────────────
-        if low == '!resetstats':
-            self.user_stats = {}
-            self.user_ratings = {}
-            self.tip_totals = {}
-            self.user_total_time = {}
-            self._persist()
-            await self._w(user, "⚠️ ALL user stats reset!", whisper)
-            return True
+    # ── TIME LEADERBOARD ──────────────────────────────────────────────
+    async def _cmd_time(self, user: User, msg: str, low: str, whisper: bool):
+        # Include current session time for users still in room. Live time only
+        # adds, so the top 10 is within (stored top 10+live) ∪ (live users).
+        now = time.time()
+        live = {u.username: now - self.user_join_times[u.id]
+                for u, _ in self.room.users() if u.id in self.user_join_times}
+        candidates = dict(self.lb_time.top(10 + len(live), exclude=self._is_excluded_from_lb))
+        for uname, secs in live.items():
+            if not self._is_excluded_from_lb(uname):
+                candidates[uname] = self.user_total_time.get(uname, 0) + secs
+        filtered = {u: t for u, t in candidates.items() if t > 0}
+        if not filtered:
+            self.outbox.say("⏰ No time data yet!")
+            return
+        sorted_users = sorted(filtered.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Time colors per position
+        time_colors = {1:"f1c40f", 2:"c0c0c0", 3:"ff8c00", 4:"ff69b4", 5:"bf00ff",
+                       6:"00cfff", 7:"00e676", 8:"ff4500", 9:"aaaaaa", 10:"ffffff"}
+        # Part 1: ranks 1-5
+        lines1 = ["<#f1c40f>⏰ TOP 10 TIME SPENDERS ⏰"]
+        for i, (uname, secs) in enumerate(sorted_users[:5], 1):
+            color = time_colors.get(i, "ffffff")
+            lines1.append(f"<#{color}>{self.get_rank_emoji(i)} {uname} — {self.format_time(secs)}")
+        self.outbox.say("\n".join(lines1))
+        # Part 2: ranks 6-10
+        if len(sorted_users) > 5:
+            lines2 = ["<#00cfff>⏰ TOP TIME — Part 2/2 ⏰"]
+            for i, (uname, secs) in enumerate(sorted_users[5:], 6):
+                color = time_colors.get(i, "ffffff")
+                lines2.append(f"<#{color}>{self.get_rank_emoji(i)} {uname} — {self.format_time(secs)}")
+            self.outbox.say("\n".join(lines2))
+
+    # ── PLAYER TIME (!tt @user or !tt for self) ───────────────────────
+    async def _cmd_tt(self, user: User, msg: str, low: str, whisper: bool):
+        parts = msg.split()
+        target = parts[1].lstrip('@') if len(parts) > 1 else user.username
+        total = self.user_total_time.get(target, 0)
+        # Add live session if still in room
+        entry = self.room.find(target)
+        if entry and entry[0].id in self.user_join_times:
+            total += time.time() - self.user_join_times[entry[0].id]
+        if total == 0:
+            self.outbox.say(f"<#aaaaaa>⏰ No time recorded for @{target} yet!")
+        else:
+            self.outbox.say(f"<#00cfff>⏰ @{target} spent {self.format_time(total)} in the room! 🏠")
+
+    # ── SOCIAL ────────────────────────────────────────────────────────
+    async def _cmd_truth(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(f"🤔 TRUTH l @{user.username}: {random.choice(self.truths)}")
+
+    async def _cmd_dare(self, user: User, msg: str, low: str, whisper: bool):
+        dare = random.choice(self.dares)
+        self.outbox.say(f"😈 DARE l @{user.username}:\n{dare}")
+
+    async def _cmd_joke(self, user: User, msg: str, low: str, whisper: bool):
+        if not self.jokes:
+            self.outbox.say("😅 Jokes not loaded — add nokat.json!")
+            return
+        joke = random.choice(self.jokes)
+        self.outbox.say(joke)
+
+    async def _cmd_riddle(self, user: User, msg: str, low: str, whisper: bool):
+        if not self.riddles:
+            self.outbox.say("😅 Riddles not loaded — add swalouat.json!", priority=GAME)
+            return
+        # Only one active riddle per user at a time
+        if user.id in self.active_riddles:
+            self.outbox.say(f"@{user.username} — 3endek riddle mazal! Jaweb wla kteb !skip!", priority=GAME)
+            return
+        idx = random.randrange(len(self.riddles))
+        riddle  = self.riddles[idx]
+        answer  = self.riddle_answers[idx]
+        self.outbox.say(f"{riddle}\n⏳ 3endek 25 sec!", priority=GAME)
+        # Store active riddle state — auto-reveal after 25 seconds
+        self.active_riddles[user.id] = {
+            "answer": answer, "username": user.username,
+            "timer": self.scheduler.after(25, self._riddle_timeout, user.id, name="riddle_timeout"),
+        }
 
-        # ── HEARTS ───────────────────────────────────────────
-        if low == '!hearts':
-            room_users = await self.safe_get_room_users()
-            targets = [u for u, _ in room_users if u.id != self.highrise.my_id]
-            if not targets:
-                await self._w(user, "❌ No users in room!", whisper)
-                return True
-            await self.highrise.chat(f"💙 Sending blue hearts to everyone! ({len(targets)} users)")
-            for target in targets:
+    def _riddle_timeout(self, uid):
+        state = self.active_riddles.pop(uid, None)
+        if state:
+            self.outbox.say(f"⏰ Waqt sala @{state['username']}!\n{state['answer']}", priority=GAME)
+
+    async def _cmd_skip(self, user: User, msg: str, low: str, whisper: bool):
+        if user.id in self.active_riddles:
+            state = self.active_riddles.pop(user.id)
+            self.scheduler.cancel(state["timer"])
+            ans = state["answer"]
+            self.outbox.say(f"⏭️ @{user.username} skipped!\n{ans}")
+        else:
+            self.outbox.say(f"@{user.username} — ma 3endeksh riddle daba!")
+
+    async def _cmd_roll(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(f"🎲 @{user.username} rolled {random.randint(1, 6)}!")
+
+    async def _cmd_flip(self, user: User, msg: str, low: str, whisper: bool):
+        self.outbox.say(f"🪙 @{user.username}: {random.choice(['Heads', 'Tails'])}!")
+
+    # ── RANDOM EMOTE ──────────────────────────────────────────────────
+    async def _cmd_random(self, user: User, msg: str, low: str, whisper: bool):
+        if not self.emote_loops.start(user.id):
+            self.outbox.say(f"⚠️ @{user.username} rak deja f loop! Kteb '0' bach twaqaf 🛑")
+            return
+        self.outbox.say(f"🎲 @{user.username} random emotes loop! Kteb '0' bach twaqaf 🛑")
+
+    # ── STOP WITH 0 ───────────────────────────────────────────────────
+    async def _cmd_stop_random(self, user: User, msg: str, low: str, whisper: bool):
+        if self.emote_loops.stop(user.id):
+            self.outbox.say(f"🛑 @{user.username} stopped random loop!")
+
+    # ── EMOTE NUMBERS ─────────────────────────────────────────────────
+    async def _cmd_emote_number(self, user: User, msg: str, low: str, whisper: bool):
+        """"12" plays emote #12, "loop 12" loops it."""
+        loop_match = re.fullmatch(r"loop\s+(\d+)", low)
+        if low.startswith("loop") and not loop_match:
+            return
+        is_loop = bool(loop_match)
+        index = int(loop_match.group(1) if loop_match else low) - 1
+
+        emote = self.emotes.number(index + 1)
+        if emote:
+            if not self.emote_access.can_play(user.id, emote):
+                self.outbox.say(f"❌ @{user.username} ma 3ndekch emote #{index + 1}")
+                return
+            if is_loop:
+                if not self.emote_loops.start(user.id, emote.id, emote.duration):
+                    # Already looping — just tell them to stop first, do nothing
+                    self.outbox.say(
+                        f"⚠️ @{user.username} rak deja f loop! Kteb 'stop' awwel, men b3d kteb loop jdid 🛑"
+                    )
+                    return
+                self.outbox.say(f"🔄 @{user.username} looping #{index + 1}")
+            else:
                 try:
-                    await self.highrise.react("heart", target.id)
-                    await asyncio.sleep(0.3)
+                    await self._send_user_emote(emote, user.id)
                 except Exception as e:
-                    print(f"[Hearts] Failed for {target.username}: {e}")
-            return True
-
-        return False  # No owner command matched
+                    # Not owned (now cached) is the user's answer, not a bot error
+                    if self.emote_access.classify(e) == DENIED:
+                        self.outbox.say(f"❌ @{user.username} ma 3ndekch emote #{index + 1}")
+                    else:
+                        print(f"[Emote] #{index + 1} for {user.username} failed: {e}")
+        else:
+            self.outbox.say(f"❌ Invalid. Choose 1-{len(self.emotes)}")
 
     # ─────────────────────────────────────────────────────────────────
     #  MAIN CHAT HANDLER
@@ -1601,15 +2550,11 @@ class MyBot(BaseBot):
             if not self.is_owner_or_mod(user):
                 # Check both original and a stripped version (removes spaces/dots between letters)
                 low_stripped = re.sub(r'[\s\.\-_*]+', '', low)  # e.g. "z a m a l" → "zamal"
-                found_bad = None
-                for bad_word in self.bad_words:
-                    if bad_word in low or bad_word in low_stripped:
-                        found_bad = bad_word
-                        break
+                found_bad = self.bad_words.search(low, low_stripped)
                 if found_bad:
                     print(f"[MODERATION] Bad word detected from {user.username}: '{found_bad}' in: '{msg}'")
                     try:
-                        await self.highrise.chat(f"🚫 @{user.username} m3a salama! Ma kan3tiw liya bad language hna! ⚠️")
+                        self.outbox.say(f"🚫 @{user.username} m3a salama! Ma kan3tiw liya bad language hna! ⚠️", priority=MODERATION)
                     except Exception as e:
                         print(f"[MODERATION] Could not send kick message: {e}")
                     try:
@@ -1618,7 +2563,7 @@ class MyBot(BaseBot):
                     except Exception as e:
                         print(f"[MODERATION] Kick failed for {user.username}: {e}")
                         try:
-                            await self.highrise.chat(f"⚠️ @{user.username} Badlanguage hna! ⚠️ kick 1 📌")
+                            self.outbox.say(f"⚠️ @{user.username} Badlanguage hna! ⚠️ kick 1 📌", priority=MODERATION)
                         except Exception as e2:
                             print(f"[MODERATION] Warning chat also failed: {e2}")
                     return
@@ -1633,10 +2578,12 @@ class MyBot(BaseBot):
                 user_msg_clean = _re.sub(r'[^\w\s]', '', low)
                 if any(kw in user_msg_clean for kw in key_words if len(kw) > 2):
                     del self.active_riddles[user.id]
-                    await self.highrise.chat(
+                    self.scheduler.cancel(state["timer"])
+                    self.outbox.say(
                         f"✅ SA7! @{user.username} jaweb sa7!\n"
                         f"{state['answer']}\n"
-                        f"🏅 +10 nqat!"
+                        f"🏅 +10 nqat!",
+                        priority=GAME
                     )
                     self.add_rating_points(user.username, 10)
                     return
@@ -1645,951 +2592,120 @@ class MyBot(BaseBot):
             if self.dawya_active and not self.dawya_claimed and self.dawya_current_word and low.strip() == self.dawya_current_word:
                 self.dawya_claimed = True
                 self.dawya_active = False
+                self.scheduler.cancel(self._dawya_timer)
                 self.dawya_winner_this_round = user.username
                 self.add_rating_points(user.username, 5)
-                self._persist()
                 winner_text = self.gradient_text(f"🏆 {user.username} WIN!", "gold")
 
                 # 1 in 5 chance to also send 5g — skip silently if bot wallet is empty
                 gold_bonus = False
                 if random.randint(1, 5) == 1:
                     try:
-                        balance = await self.get_wallet_gold()
-                        if balance >= 5:
-                            await self.highrise.tip_user(user.id, self.to_gold_bar(5))
-                            gold_bonus = True
+                        gold_bonus = await self.ledger.tip(user.id, 5)
                     except Exception as e:
                         print(f"[WordGame] Gold bonus failed: {e}")
 
                 if gold_bonus:
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"{winner_text}\n"
                         f"✅ @{user.username} kteb '{self.dawya_current_word}' l'awwel! +5 nqat + 5g 🎉💰\n"
-                        f"📊 Total dyalek: {self.user_ratings.get(user.username, 0)} nqat"
+                        f"📊 Total dyalek: {self.user_ratings.get(user.username, 0)} nqat",
+                        priority=GAME
                     )
                 else:
-                    await self.highrise.chat(
+                    self.outbox.say(
                         f"{winner_text}\n"
                         f"✅ @{user.username} kteb '{self.dawya_current_word}' l'awwel! +5 nqat! 🎉\n"
-                        f"📊 Total dyalek: {self.user_ratings.get(user.username, 0)} nqat"
+                        f"📊 Total dyalek: {self.user_ratings.get(user.username, 0)} nqat",
+                        priority=GAME
                     )
                 self.dawya_current_word = None
                 return
 
-            # ── Auto-responses — only fire if not a command ──────────
-            if not low.startswith('!'):
-                for trigger, responses in self.auto_responses.items():
-                    if trigger in low:
-                        response = random.choice(responses)
-                        await self.highrise.chat(f"@{user.username} {response}")
-                        return
-
-            # ── Custom greeting setter ────────────────────────────────
-            # Method 1: !setgreeting [text] — any VIP user can use this anytime
-            if low.startswith('!setgreeting '):
-                greeting_text = msg[13:].strip()
-                if not self.has_vip_access(user.username):
-                    await self.highrise.chat(f"❌ @{user.username} khssek tkoun VIP bach tdir greeting dyalk! 💎")
-                    return
-                if not greeting_text:
-                    await self.highrise.chat(f"❌ @{user.username} kteb: !setgreeting [message dyalk] 📝")
-                    return
-                if len(greeting_text) > 200:
-                    await self.highrise.chat(f"❌ @{user.username} message twil bzaf! Max 200 characters.")
-                    return
-                self.custom_greetings[user.username] = greeting_text
-                if user.username in self.awaiting_greeting:
-                    self.awaiting_greeting.remove(user.username)
-                self._persist()
-                success_msg = f"✅ {self.gradient_text(f'VIP Greeting t7fad l @{user.username}!', 'green')} 🌟"
-                await self.highrise.chat(success_msg)
-                return
-
-            # Method 2: !set [text] — only for users in awaiting_greeting list (after tipping)
-            if user.username in self.awaiting_greeting and low.startswith('!set '):
-                greeting_text = msg[5:].strip()
-                if not greeting_text:
-                    error_msg = f"❌ {self.gradient_text('Khssek tkteb message! Dir !set [Message dyalk]', 'fire')}"
-                    await self.highrise.chat(error_msg)
-                    return
-                if len(greeting_text) > 200:
-                    error_msg = f"❌ {self.gradient_text('Message twil bzaf! Max 200 characters.', 'fire')}"
-                    await self.highrise.chat(error_msg)
-                    return
-                self.custom_greetings[user.username] = greeting_text
-                self.awaiting_greeting.remove(user.username)
-                self._persist()
-                success_msg = f"✅ {self.gradient_text(f'VIP Greeting t7fad l @{user.username}!', 'green')} 🌟"
-                await self.highrise.chat(success_msg)
-                return
-
-
-            # ── INFO & DATA COMMANDS ──────────────────────────────────
-
-            # !info [username] — anyone sees own info, owner can check others
-            if low == "!info" or low.startswith("!info "):
-                parts = msg.split()
-                target = parts[1] if len(parts) >= 2 and self.is_owner(user) else user.username
-                pts = self.user_ratings.get(target, 0)
-                perm = "💎Yes" if target in self.vip_permanent else "No"
-                timed_str = "No"
-                if target in self.vip_timed:
-                    rem = self.vip_timed[target] - time.time()
-                    if rem > 0:
-                        timed_str = f"{int(rem//86400)}d{int((rem%86400)//3600)}h"
-                is_mod = "Yes" if target in self.moderators else "No"
-                greeting = self.custom_greetings.get(target, "None")[:35]
-                await self.highrise.chat(f"👤{target} ⭐{pts}pts 💎{perm} ⏰{timed_str} 🛡️{is_mod}")
-                await asyncio.sleep(0.4)
-                await self.highrise.chat(f"💬 {greeting}")
+            # ── COMMANDS — one table lookup, see _register_commands ──
+            if await self.commands.dispatch(user, msg):
                 return
 
-            # !infow [username] — same but whispered
-            if low == "!infow" or low.startswith("!infow "):
-                parts = msg.split()
-                target = parts[1] if len(parts) >= 2 and self.is_owner(user) else user.username
-                pts = self.user_ratings.get(target, 0)
-                perm = "💎Yes" if target in self.vip_permanent else "No"
-                timed_str = "No"
-                if target in self.vip_timed:
-                    rem = self.vip_timed[target] - time.time()
-                    if rem > 0:
-                        timed_str = f"{int(rem//86400)}d{int((rem%86400)//3600)}h"
-                is_mod = "Yes" if target in self.moderators else "No"
-                greeting = self.custom_greetings.get(target, "None")[:35]
-                await self.highrise.send_whisper(user.id, f"👤{target} ⭐{pts}pts 💎{perm} ⏰{timed_str} 🛡️{is_mod}")
-                await asyncio.sleep(0.3)
-                await self.highrise.send_whisper(user.id, f"💬 {greeting}")
-                return
-
-            # ── OWNER ONLY COMMANDS ───────────────────────────────────
-            if self.is_owner(user):
-
-                # !data — overview
-                if low == "!data":
-                    await self.highrise.chat(f"📊 VIP💎{len(self.vip_permanent)} Timed⏰{len(self.vip_timed)} Pts⭐{len(self.user_ratings)} Greet💬{len(self.custom_greetings)} Mods🛡️{len(self.moderators)}")
-                    await asyncio.sleep(0.4)
-                    await self.highrise.chat("!viplist !timedvip !pointslist !greetlist")
-                    return
-
-                # !viplist — permanent VIPs
-                if low == "!viplist":
-                    if self.vip_permanent:
-                        vips = list(self.vip_permanent)
-                        chunks = [vips[i:i+5] for i in range(0, len(vips), 5)]
-                        for chunk in chunks:
-                            await self.highrise.chat("💎 " + " | ".join(chunk))
-                            await asyncio.sleep(0.4)
-                    else:
-                        await self.highrise.chat("💎 No permanent VIPs.")
-                    return
-
-                # !timedvip — timed VIPs with time left
-                if low == "!timedvip":
-                    if self.vip_timed:
-                        now = time.time()
-                        lines = []
-                        for u, exp in self.vip_timed.items():
-                            rem = exp - now
-                            lines.append(f"{u}:{int(rem//86400)}d{int((rem%86400)//3600)}h" if rem > 0 else f"{u}:expired")
-                        chunks = [lines[i:i+4] for i in range(0, len(lines), 4)]
-                        for chunk in chunks:
-                            await self.highrise.chat("⏰ " + " | ".join(chunk))
-                            await asyncio.sleep(0.4)
-                    else:
-                        await self.highrise.chat("⏰ No timed VIPs.")
-                    return
-
-                # !pointslist — top 15
-                if low == "!pointslist":
-                    sorted_pts = sorted(self.user_ratings.items(), key=lambda x: x[1], reverse=True)[:15]
-                    lines = [f"{i+1}.{u}:{p}" for i, (u, p) in enumerate(sorted_pts)]
-                    chunks = [lines[i:i+5] for i in range(0, len(lines), 5)]
-                    for chunk in chunks:
-                        await self.highrise.chat("⭐ " + " | ".join(chunk))
-                        await asyncio.sleep(0.4)
-                    return
-
-                # !greetlist — all greetings
-                if low == "!greetlist":
-                    if self.custom_greetings:
-                        lines = [f"{u}: {g[:20]}" for u, g in list(self.custom_greetings.items())[:12]]
-                        chunks = [lines[i:i+3] for i in range(0, len(lines), 3)]
-                        for chunk in chunks:
-                            await self.highrise.chat("💬 " + " | ".join(chunk))
-                            await asyncio.sleep(0.4)
-                    else:
-                        await self.highrise.chat("💬 No greetings.")
-                    return
-
-                # !addvip username hours
-                if low.startswith("!addvip "):
-                    parts = msg.split()
-                    if len(parts) >= 3:
-                        try:
-                            target, hours = parts[1], float(parts[2])
-                            self.vip_timed[target] = time.time() + hours * 3600
-                            self._persist()
-                            await self.highrise.chat(f"✅ @{target} VIP {int(hours//24)}d{int(hours%24)}h!")
-                        except:
-                            await self.highrise.chat("❌ !addvip username hours")
-                    else:
-                        await self.highrise.chat("❌ !addvip username hours")
-                    return
-
-                # !removevip username
-                if low.startswith("!removevip "):
-                    parts = msg.split()
-                    if len(parts) >= 2:
-                        target = parts[1]
-                        removed = False
-                        if target in self.vip_timed:
-                            del self.vip_timed[target]; removed = True
-                        if target in self.vip_permanent:
-                            self.vip_permanent.discard(target); removed = True
-                        if removed:
-                            self._persist()
-                            await self.highrise.chat(f"✅ VIP removed: @{target}")
-                        else:
-                            await self.highrise.chat(f"❌ @{target} has no VIP")
-                    return
-
-                # !addpermvip username
-                if low.startswith("!addpermvip "):
-                    parts = msg.split()
-                    if len(parts) >= 2:
-                        self.vip_permanent.add(parts[1])
-                        self._persist()
-                        await self.highrise.chat(f"💎 @{parts[1]} Permanent VIP!")
-                    return
-
-                # !addpoints username amount
-                if low.startswith("!addpoints "):
-                    parts = msg.split()
-                    if len(parts) >= 3:
-                        try:
-                            target, amount = parts[1], int(parts[2])
-                            self.user_ratings[target] = self.user_ratings.get(target, 0) + amount
-                            self._persist()
-                            await self.highrise.chat(f"✅ +{amount}pts @{target} → {self.user_ratings[target]}")
-                        except:
-                            await self.highrise.chat("❌ !addpoints username amount")
-                    else:
-                        await self.highrise.chat("❌ !addpoints username amount")
-                    return
-
-                # !removepoints username amount
-                if low.startswith("!removepoints "):
-                    parts = msg.split()
-                    if len(parts) >= 3:
-                        try:
-                            target, amount = parts[1], int(parts[2])
-                            self.user_ratings[target] = max(0, self.user_ratings.get(target, 0) - amount)
-                            self._persist()
-                            await self.highrise.chat(f"✅ -{amount}pts @{target} → {self.user_ratings[target]}")
-                        except:
-                            await self.highrise.chat("❌ !removepoints username amount")
-                    else:
-                        await self.highrise.chat("❌ !removepoints username amount")
-                    return
-
-                # !setpoints username amount
-                if low.startswith("!setpoints "):
-                    parts = msg.split()
-                    if len(parts) >= 3:
-                        try:
-                            target, amount = parts[1], int(parts[2])
-                            self.user_ratings[target] = amount
-                            self._persist()
-                            await self.highrise.chat(f"✅ @{target} points = {amount}")
-                        except:
-                            await self.highrise.chat("❌ !setpoints username amount")
-                    return
-
-                # !addgreeting username text
-                if low.startswith("!addgreeting "):
-                    parts = msg.split(None, 2)
-                    if len(parts) >= 3:
-                        self.custom_greetings[parts[1]] = parts[2]
-                        self._persist()
-                        await self.highrise.chat(f"✅ Greeting set: @{parts[1]}")
-                    else:
-                        await self.highrise.chat("❌ !addgreeting username text")
-                    return
-
-                # !removegreeting username
-                if low.startswith("!removegreeting "):
-                    parts = msg.split()
-                    if len(parts) >= 2:
-                        target = parts[1]
-                        if target in self.custom_greetings:
-                            del self.custom_greetings[target]
-                            self._persist()
-                            await self.highrise.chat(f"✅ Greeting removed: @{target}")
-                        else:
-                            await self.highrise.chat(f"❌ No greeting for @{target}")
-                    return
-
-                # !addmod username
-                if low.startswith("!addmod "):
-                    parts = msg.split()
-                    if len(parts) >= 2:
-                        self.moderators.add(parts[1])
-                        self._persist()
-                        await self.highrise.chat(f"🛡️ @{parts[1]} is now a mod!")
-                    return
-
-                # !removemod username
-                if low.startswith("!removemod "):
-                    parts = msg.split()
-                    if len(parts) >= 2:
-                        target = parts[1]
-                        if target in self.moderators:
-                            self.moderators.discard(target)
-                            self._persist()
-                            await self.highrise.chat(f"✅ Mod removed: @{target}")
-                        else:
-                            await self.highrise.chat(f"❌ @{target} is not a mod")
-                    return
-
-            # ═══════════════════════════════════════════════════════════
-            #  OWNER-ONLY COMMANDS (also available via whisper — see on_whisper)
-            # ═══════════════════════════════════════════════════════════
-            if self.is_owner(user):
-                matched = await self._handle_owner_command(user, message, whisper=False)
-                if matched:
-                    return
-
-            # ═══════════════════════════════════════════════════════════
-            #  PUBLIC COMMANDS
-            # ═══════════════════════════════════════════════════════════
-
-            # FIX: owners/mods bypass cooldown — their commands always work
-            if not self.is_owner_or_mod(user):
-                if not await self.check_cooldown(user):
-                    return
-
-            # ── HELP ─────────────────────────────────────────────────
-            if low == '!help':
-                await self.highrise.chat(
-                    "🤖 COMMANDS 1/3\n"
-                    "!tip @u 5g|!tipall 5g\n"
-                    "!autotip 5g 60s|!stopautotip\n"
-                    "👑 30g=1d|100g=7d|500g=dima\n"
-                    "!vipstatus | !help2 for more"
-                )
-                return
-
-            if low == '!help2':
-                await self.highrise.chat(
-                    "🤖 BOT COMMANDS (2/3)\n"
-                    "🎭 EMOTES:\n"
-                    f"1-{len(self.emote_keys)} - Do emote\n"
-                    "loop N - Loop emote\n"
-                    "stop - Stop loop\n\n"
-                    "🗺️ FLOORS:\n"
-                    "!vipfloor - TP to VIP\n"
-                    "!dancefloor - TP to dance\n\n"
-                    "Type !help3 for more"
-                )
-                return
-
-            if low in ('!help3', '!commands'):
-                await self.highrise.chat(
-                    "🤖 COMMANDS 3/3\n"
-                    "!stats|!rank|!ranks|!lb\n"
-                    "!tiplb|!time|!tt @u\n"
-                    "!joke|!riddle(!skip)|!dare\n"
-                    "!truth|!roll|!flip"
-                )
-                return
-
-            # ── VIP STATUS ───────────────────────────────────────────
-            if low == '!vipstatus':
-                status = self.get_vip_status_text(user.username)
-                await self.highrise.chat(f"👑 VIP Status for @{user.username}:\n{status}")
-                return
-
-
-
-            # ── WALLET BALANCE ────────────────────────────────────
-            if low in ('!wallet', '!balance', '!gold', '!flous'):
-                balance = await self.get_wallet_gold()
-                if self.is_owner(user):
-                    await self.highrise.chat(f"💰 Bot wallet: {balance}g")
-                else:
-                    await self.highrise.chat(f"@{user.username} 💰 Bot wallet: {balance}g")
-                return
-
-            # ── TIP @USER ────────────────────────────────────────────
-            # Fix: use exact match prefix '!tip @' to avoid clashing with !tipall
-            if low.startswith('!tip ') and not low.startswith('!tipall'):
-                if not self.is_owner(user):
-                    await self.highrise.chat("❌ Only the owner can use !tip!")
-                    return
-                parts = msg.split()
-                if len(parts) >= 3:
-                    try:
-                        target_username = parts[1].lstrip('@')
-                        # Accept both "5" and "5g"
-                        amount = int(parts[2].replace('g', '').replace('G', ''))
-                        if amount <= 0:
-                            await self.highrise.chat("❌ Amount must be positive!")
-                            return
-                        # Find target in room
-                        room_users = await self.safe_get_room_users()
-                        target_user = next((u for u, _ in room_users
-                                            if u.username.lower() == target_username.lower()), None)
-                        if not target_user:
-                            await self.highrise.chat(f"❌ @{target_username} not found in room!")
-                            return
-                        gold = self.to_gold_bar(amount)
-                        if not gold:
-                            await self.highrise.chat(
-                                f"❌ {amount}g not supported!\nUse: 1, 5, 10, 50, 100, 500, 1000, 5000, 10000"
-                            )
-                            return
-                        # Check wallet balance before tipping
-                        balance = await self.get_wallet_gold()
-                        if balance < amount:
-                            await self.highrise.chat(f"❌ Bot wallet is empty! Can't tip @{target_username}. 💸")
-                            return
-                        await self.highrise.chat(f"💸 Tipping @{target_username} {amount}g... ⏳")
-                        await self.highrise.tip_user(target_user.id, gold)
-                        await self.highrise.chat(f"✅ @{target_username} received {amount}g! 💰")
-                    except ValueError:
-                        await self.highrise.chat("❌ Invalid amount! Use: !tip @user 5")
-                    except Exception as e:
-                        await self.highrise.chat(f"❌ Tip failed: {e}")
-                        print(f"[Tip] Error: {e}")
-                else:
-                    await self.highrise.chat("Usage: !tip @username 5")
-                return
-
-            # ── TIP ALL ──────────────────────────────────────────────
-            if low.startswith('!tipall'):
-                if not self.is_owner(user):
-                    await self.highrise.chat("❌ Only the owner can use !tipall!")
-                    return
-                parts = msg.split()
-                if len(parts) >= 2:
-                    try:
-                        amount = int(parts[1].replace('g', '').replace('G', ''))
-                        if amount <= 0:
-                            await self.highrise.chat("❌ Amount must be positive!")
-                            return
-                        room_users = await self.safe_get_room_users()
-                        eligible = [u for u, _ in room_users
-                                    if u.id != self.highrise.my_id and u.username != user.username]
-                        if not eligible:
-                            await self.highrise.chat("❌ No other users in room!")
-                            return
-                        total = amount * len(eligible)
-                        # Check wallet balance before starting
-                        balance = await self.get_wallet_gold()
-                        if balance < total:
-                            await self.highrise.chat(
-                                f"❌ Bot wallet is empty or insufficient! Need {total}g but only have {balance}g. 💸"
-                            )
-                            return
-                        await self.highrise.chat(
-                            f"💸 Tipping {len(eligible)} users {amount}g each ({total}g total)... ⏳"
-                        )
-                        tipped = 0
-                        failed = 0
-                        for target in eligible:
-                            try:
-                                gold = self.to_gold_bar(amount)
-                                if not gold:
-                                    await self.highrise.chat(f"❌ {amount}g not supported! Use: 1,5,10,50,100,500,1000")
-                                    return
-                                await self.highrise.tip_user(target.id, gold)
-                                tipped += 1
-                                # Show progress for each user
-                                await self.highrise.chat(
-                                    f"✅ [{tipped}/{len(eligible)}] @{target.username} +{amount}g 💰"
-                                )
-                                await asyncio.sleep(0.8)
-                            except Exception as e:
-                                failed += 1
-                                print(f"[TipAll] Failed for {target.username}: {e}")
-                                await self.highrise.chat(f"⚠️ Failed to tip @{target.username}")
-                        await self.highrise.chat(
-                            f"🎉 Done! Tipped {tipped} users {amount}g each!"
-                            + (f" ({failed} failed)" if failed else "")
-                        )
-                    except ValueError:
-                        await self.highrise.chat("❌ Invalid amount! Use: !tipall 5")
-                    except Exception as e:
-                        await self.highrise.chat(f"❌ TipAll failed: {e}")
-                        print(f"[TipAll] Error: {e}")
-                else:
-                    await self.highrise.chat("Usage: !tipall 5")
-                return
-
-            # ── AUTO-TIP ─────────────────────────────────────────────
-            if low.startswith('!autotip '):
-                if not self.is_owner(user):
-                    await self.highrise.chat("❌ Only the owner can use !autotip!")
-                    return
-                parts = msg.split()
-                if len(parts) >= 3:
-                    try:
-                        amount = int(parts[1].replace('g', '').replace('G', ''))
-                        interval_raw = parts[2]
-                        interval = int(interval_raw.replace('s', '').replace('m', ''))
-                        if 'm' in interval_raw:
-                            interval *= 60
-                        if amount <= 0 or interval <= 0:
-                            await self.highrise.chat("❌ Amount and interval must be positive!")
-                            return
-                        if interval < 30:
-                            await self.highrise.chat("❌ Minimum interval is 30 seconds!")
-                            return
-                        # Cancel any existing task first
-                        if user.username in self.auto_tip_tasks:
-                            self.auto_tip_tasks[user.username].cancel()
-                        self.auto_tip_enabled[user.username] = True
-                        self.auto_tip_amount[user.username] = amount
-                        self.auto_tip_interval[user.username] = interval
-                        task = asyncio.create_task(self.auto_tip_loop(user.username))
-                        self.auto_tip_tasks[user.username] = task
-                        await self.highrise.chat(
-                            f"✅ Auto-tip ON! Bot tips {amount}g every {interval}s to random users!"
-                        )
-                    except ValueError:
-                        await self.highrise.chat("❌ Invalid format! Use: !autotip 5 60s")
-                else:
-                    await self.highrise.chat("Usage: !autotip 5 60s (or 1m)")
-                return
-
-            if low == '!stopautotip':
-                if not self.is_owner(user):
-                    await self.highrise.chat("❌ Only the owner can use !stopautotip!")
-                    return
-                if user.username in self.auto_tip_tasks or self.auto_tip_enabled.get(user.username):
-                    # Hard cancel the task
-                    task = self.auto_tip_tasks.pop(user.username, None)
-                    if task and not task.done():
-                        task.cancel()
-                    # Clear all state
-                    self.auto_tip_enabled.pop(user.username, None)
-                    self.auto_tip_amount.pop(user.username, None)
-                    self.auto_tip_interval.pop(user.username, None)
-                    await self.highrise.chat(f"🛑 Auto-tip STOPPED for @{user.username}!")
-                else:
-                    await self.highrise.chat("❌ No active auto-tip found.")
-                return
-
-            if low == '!autostatus':
-                if self.auto_tip_enabled.get(user.username):
-                    amount = self.auto_tip_amount.get(user.username, 0)
-                    interval = self.auto_tip_interval.get(user.username, 0)
-                    await self.highrise.chat(
-                        f"✅ Auto-tip ACTIVE\n"
-                        f"Tipping {amount}g every {interval}s from bot wallet!"
-                    )
-                else:
-                    await self.highrise.chat(f"❌ Auto-tip not active for @{user.username}")
-                return
-
-            # ── FLOORS ───────────────────────────────────────────────
-            if low in ('!vipfloor', 'vip'):
-                if self.has_vip_access(user.username):
-                    if self.vip_floor:
-                        await self.highrise.teleport(
-                            user.id,
-                            Position(self.vip_floor['x'], self.vip_floor['y'], self.vip_floor['z'])
-                        )
-                        await self.highrise.chat(f"👑 @{user.username} → VIP Floor! ✨")
-                    else:
-                        await self.highrise.chat("VIP floor not set yet!")
-                else:
-                    await self.highrise.chat(
-                        f"@{user.username}, VIP access required!\n"
-                        f"💎 30g = 1 day | 100g = 7 days | 500g = Permanent"
-                    )
-                return
-
-            if low == '!dancefloor':
-                if self.dance_floor:
-                    await self.highrise.teleport(
-                        user.id,
-                        Position(self.dance_floor['x'], self.dance_floor['y'], self.dance_floor['z'])
-                    )
-                    await self.highrise.chat(f"🕺 @{user.username} teleported to dance floor!")
-                else:
-                    await self.highrise.chat("Dance floor not set yet!")
-                return
-
-            # ── LEADERBOARD ──────────────────────────────────────────
-            if low in ('!leaderboard', '!top', '!lb'):
-                for msg in self.get_leaderboard_text():
-                    await self.highrise.chat(msg)
-                    await asyncio.sleep(0.5)
-                await asyncio.sleep(0.5)
-                # Contest countdown
-                countdown = get_contest_countdown()
-                if countdown:
-                    await self.highrise.chat(
-                        f"🏆 CONTEST — TOP 3 YRBHO!\n"
-                        f"⏳ Remaining: {countdown}\n"
-                        f"💡 Earn pts: 💬chat|💃dance|🎁tip 1gold = 1point|⏱️stay!"
-                    )
-                else:
-                    await self.highrise.chat("💡 Earn pts: 💬chat|💃dance|🎁tip bot: 1gold=1point|⏱️stay!")
-                return
-
-            if low in ('!tiplb', '!tippers'):
-                for msg in self.get_tips_leaderboard_text():
-                    await self.highrise.chat(msg)
-                    await asyncio.sleep(0.5)
-                return
-
-            # ── RANKS & STATS ────────────────────────────────────────
-            if low == '!ranks':
-                await self.highrise.chat(
-                    "⭐ RANK SYSTEM ⭐\n"
-                    "🌱 ROOKIE: 0-49 pts\n"
-                    "🥉 BRONZE: 50-149 pts\n"
-                    "🥈 SILVER: 150-299 pts\n"
-                    "⭐ GOLD: 300-499 pts\n"
-                    "👑 PLATINUM: 500-749 pts\n"
-                    "💎 DIAMOND: 750-999 pts\n"
-                    "🔥 LEGEND: 1000+ pts"
-                )
-                return
-
-            if low.startswith('!rank'):
-                parts = msg.split()
-                target = parts[1].lstrip('@') if len(parts) > 1 else user.username
-                rating = self.user_ratings.get(target, 0)
-                vip_status = " 👑 [VIP]" if self.has_vip_access(target) else ""
-                await self.highrise.chat(
-                    f"🏅 @{target}{vip_status}\n"
-                    f"Rating: {rating} pts\nRank: {self.get_rank_name(rating)}"
-                )
-                return
-
-            if low.startswith('!stats'):
-                parts = msg.split()
-                target = parts[1].lstrip('@') if len(parts) > 1 else user.username
-                if target in self.user_stats:
-                    stats = self.user_stats[target]
-                    pts = self.user_ratings.get(target, 0)
-                    await self.highrise.chat(
-                        f"📊 @{target}:\n"
-                        f"💬 {stats['messages']} msgs|🎭 {stats['emotes']} emotes\n"
-                        f"⏰ {self.format_time(self.user_total_time.get(target, 0))}\n"
-                        f"🏅 {self.get_rank_name(pts)} ({pts} pts)"
-                    )
-                else:
-                    await self.highrise.chat(f"No stats for @{target}")
-                return
-
-            # ── TIME LEADERBOARD ──────────────────────────────────────
-            if low in ('!time', '!timelb'):
-                # Include current session time for users still in room
-                combined = dict(self.user_total_time)
-                now = time.time()
-                try:
-                    room_users = await self.safe_get_room_users()
-                    for u, _ in room_users:
-                        if u.id in self.user_join_times:
-                            live = now - self.user_join_times[u.id]
-                            combined[u.username] = combined.get(u.username, 0) + live
-                except Exception:
-                    pass
-                # Exclude bots/owners
-                filtered = {u: t for u, t in combined.items() if not self._is_excluded_from_lb(u) and t > 0}
-                if not filtered:
-                    await self.highrise.chat("⏰ No time data yet!")
-                    return
-                sorted_users = sorted(filtered.items(), key=lambda x: x[1], reverse=True)[:10]
-                # Time colors per position
-                time_colors = {1:"f1c40f", 2:"c0c0c0", 3:"ff8c00", 4:"ff69b4", 5:"bf00ff",
-                               6:"00cfff", 7:"00e676", 8:"ff4500", 9:"aaaaaa", 10:"ffffff"}
-                # Part 1: ranks 1-5
-                lines1 = ["<#f1c40f>⏰ TOP 10 TIME SPENDERS ⏰"]
-                for i, (uname, secs) in enumerate(sorted_users[:5], 1):
-                    color = time_colors.get(i, "ffffff")
-                    lines1.append(f"<#{color}>{self.get_rank_emoji(i)} {uname} — {self.format_time(secs)}")
-                await self.highrise.chat("\n".join(lines1))
-                # Part 2: ranks 6-10
-                if len(sorted_users) > 5:
-                    await asyncio.sleep(0.5)
-                    lines2 = ["<#00cfff>⏰ TOP TIME — Part 2/2 ⏰"]
-                    for i, (uname, secs) in enumerate(sorted_users[5:], 6):
-                        color = time_colors.get(i, "ffffff")
-                        lines2.append(f"<#{color}>{self.get_rank_emoji(i)} {uname} — {self.format_time(secs)}")
-                    await self.highrise.chat("\n".join(lines2))
-                return
-
-            # ── PLAYER TIME (!tt @user or !tt for self) ───────────────
-            if low.startswith('!tt'):
-                parts = msg.split()
-                target = parts[1].lstrip('@') if len(parts) > 1 else user.username
-                total = self.user_total_time.get(target, 0)
-                # Add live session if still in room
-                now = time.time()
-                try:
-                    room_users = await self.safe_get_room_users()
-                    for u, _ in room_users:
-                        if u.username.lower() == target.lower() and u.id in self.user_join_times:
-                            total += now - self.user_join_times[u.id]
-                            break
-                except Exception:
-                    pass
-                if total == 0:
-                    await self.highrise.chat(f"<#aaaaaa>⏰ No time recorded for @{target} yet!")
-                else:
-                    await self.highrise.chat(f"<#00cfff>⏰ @{target} spent {self.format_time(total)} in the room! 🏠")
-                return
-
-
-
-            # ── SOCIAL ───────────────────────────────────────────────
-
-            if low == '!truth':
-                await self.highrise.chat(f"🤔 TRUTH l @{user.username}: {random.choice(self.truths)}")
-                return
-
-            if low == '!dare':
-                dare = random.choice(self.dares)
-                await self.highrise.chat(f"😈 DARE l @{user.username}:\n{dare}")
-                return
-
-            if low == '!joke':
-                if not self.jokes:
-                    await self.highrise.chat("😅 Jokes not loaded — add nokat.json!")
-                    return
-                joke = random.choice(self.jokes)
-                await self.highrise.chat(joke)
-                return
-
-            if low == '!riddle':
-                if not self.riddles:
-                    await self.highrise.chat("😅 Riddles not loaded — add swalouat.json!")
-                    return
-                # Only one active riddle per user at a time
-                if user.id in self.active_riddles:
-                    await self.highrise.chat(f"@{user.username} — 3endek riddle mazal! Jaweb wla kteb !skip!")
-                    return
-                idx = random.randrange(len(self.riddles))
-                riddle  = self.riddles[idx]
-                answer  = self.riddle_answers[idx]
-                await self.highrise.chat(f"{riddle}\n⏳ 3endek 25 sec!")
-                # Store active riddle state
-                self.active_riddles[user.id] = {"answer": answer, "username": user.username}
-                # Auto-reveal after 25 seconds
-                async def _reveal(uid=user.id, ans=answer, uname=user.username):
-                    await asyncio.sleep(25)
-                    if uid in self.active_riddles:
-                        del self.active_riddles[uid]
-                        try:
-                            await self.highrise.chat(f"⏰ Waqt sala @{uname}!\n{ans}")
-                        except Exception:
-                            pass
-                asyncio.create_task(_reveal())
-                return
-
-            if low == '!skip':
-                if user.id in self.active_riddles:
-                    ans = self.active_riddles.pop(user.id)["answer"]
-                    await self.highrise.chat(f"⏭️ @{user.username} skipped!\n{ans}")
-                else:
-                    await self.highrise.chat(f"@{user.username} — ma 3endeksh riddle daba!")
-                return
-
-            if low == '!roll':
-                await self.highrise.chat(f"🎲 @{user.username} rolled {random.randint(1, 6)}!")
-                return
-
-            if low == '!flip':
-                await self.highrise.chat(f"🪙 @{user.username}: {random.choice(['Heads', 'Tails'])}!")
-                return
-
-            # ── STOP (non-owner stops their own emote loop) ───────────
-            if low == 'stop' and not self.is_owner(user):
-                if user.id in self.looping_users:
-                    self.looping_users[user.id] = False
-                    await asyncio.sleep(0.3)
-                    if user.id in self.looping_users:
-                        del self.looping_users[user.id]
-                await self.highrise.chat(f"🛑 @{user.username} stopped.")
-                return
-
-            # ── RANDOM EMOTE ──────────────────────────────────────────
-            if low == 'random':
-                if user.id in self.looping_users:
-                    await self.highrise.chat(f"⚠️ @{user.username} rak deja f loop! Kteb '0' bach twaqaf 🛑")
+            # ── Auto-responses — only fire if no command matched ─────
+            if not low.startswith('!'):
+                trigger = self.auto_response_triggers.best(low)
+                if trigger:
+                    response = random.choice(self.auto_responses[trigger])
+                    self.outbox.say(f"@{user.username} {response}")
                     return
-                self.looping_users[user.id] = True
-                await self.highrise.chat(f"🎲 @{user.username} random emotes loop! Kteb '0' bach twaqaf 🛑")
-                asyncio.create_task(self.loop_random_emote(user.id))
-                return
-
-            # ── STOP WITH 0 ───────────────────────────────────────────
-            if low == '0':
-                if user.id in self.looping_users:
-                    self.looping_users[user.id] = False
-                    await asyncio.sleep(0.3)
-                    if user.id in self.looping_users:
-                        del self.looping_users[user.id]
-                    await self.highrise.chat(f"🛑 @{user.username} stopped random loop!")
-                return
-
-            # ── EMOTE NUMBERS ─────────────────────────────────────────
-            loop_match   = re.fullmatch(r"loop\s+(\d+)", low)
-            number_match = re.fullmatch(r"(\d+)", low)
-
-            if loop_match or number_match:
-                is_loop = bool(loop_match)
-                index = int(loop_match.group(1) if loop_match else number_match.group(1)) - 1
-
-                if 0 <= index < len(self.emote_keys):
-                    emote_name = self.emote_keys[index]
-                    emote_data = self.emote_dict[emote_name]
-                    emote_id   = emote_data[0]
-                    duration   = float(emote_data[1])
-
-                    if is_loop:
-                        if user.id in self.looping_users:
-                            # Already looping — just tell them to stop first, do nothing
-                            await self.highrise.chat(
-                                f"⚠️ @{user.username} rak deja f loop! Kteb 'stop' awwel, men b3d kteb loop jdid 🛑"
-                            )
-                            return
-                        # No active loop — start fresh
-                        self.looping_users[user.id] = True
-                        await self.highrise.chat(f"🔄 @{user.username} looping #{index + 1}")
-                        asyncio.create_task(self.loop_emote(user.id, emote_id, duration))
-                    else:
-                        await self.highrise.send_emote(emote_id, user.id)
-                else:
-                    await self.highrise.chat(f"❌ Invalid. Choose 1-{len(self.emote_keys)}")
-                return
 
         except Exception as e:
             print(f"Error in on_chat: {e}")
-
-    # ─────────────────────────────────────────────────────────────────
-    #  EMOTE LOOP
-    # ─────────────────────────────────────────────────────────────────
-    # Emotes that have a visible stand-up/reset at the end — re-trigger aggressively early
-    FLOOR_EMOTES = {
-        "idle-floorsleeping",   # Cozy Nap
-        "idle-floorsleeping2",  # Relaxing
-        "idle_layingdown",      # Attentive
-        "sit-relaxed",          # Relaxed
-        "idle-loop-sitfloor",   # Sit
-        "idle-toilet",          # Toilet
-        "idle_zombie",          # Zombie
-        "idle-nervous",         # Nervous
-        "idle_singing",         # Singing
-        "idle-loop-sad",        # Bummed
-        "idle-loop-happy",      # Chillin'
-        "idle-loop-annoyed",    # Annoyed
-        "idle-loop-aerobics",   # Aerobics
-        "idle-loop-tired",      # Sleepy
-        "idle-loop-tapdance",   # Tap Loop
-        "idle-dance-casual",    # Casual Dance
-        "idle-guitar",          # Air Guitar
-        "idle-uwu",             # UwU
-        "idle-dance-tiktok4",   # TikTok Dance 4
-        "idle-wild",            # Scritchy
-    }
+            self.m_errors.inc(subsystem="on_chat")
 
     # ─────────────────────────────────────────────────────────────────
     #  DAWYA WORD GAME
     # ─────────────────────────────────────────────────────────────────
-    async def dawya_game_loop(self):
-        """Every 1-8 minutes, challenge the room to type a random Moroccan word first."""
-        await asyncio.sleep(60)  # Initial delay — let the room settle
-        while True:
-            try:
-                # Wait a random interval between rounds (1–8 minutes)
-                wait = random.randint(60, 480)
-                await asyncio.sleep(wait)
-                if not self.is_connected:
-                    continue
-
-                # Pick a random word
-                word = random.choice(self.dawya_words)
-                self.dawya_current_word = word
-                self.dawya_active = True
-                self.dawya_claimed = False
-                self.dawya_winner_this_round = None
-
-                announce = self.gradient_text("⚡ WORD CHALLENGE! ⚡", "fire")
-                await self.highrise.chat(
-                    f"{announce}\n"
-                    f"🏃 Awwel wa7ed ykteb '{word}' f chat "
-                    f"ywl +5 nqat f leaderboard! 🏆"
-                )
-
-                # Give players 20 seconds to respond
-                await asyncio.sleep(20)
-
-                # Time's up — if nobody claimed it
-                if self.dawya_active and not self.dawya_claimed:
-                    self.dawya_active = False
-                    self.dawya_current_word = None
-                    await self.highrise.chat(f"⏰ Waqt sala! Ma7ad kteb '{word}'... 😅")
-
-            except Exception as e:
-                print(f"[WordGame] Error: {e}")
-                await asyncio.sleep(30)
+    def dawya_round(self):
+        """Every 1-8 minutes, challenge the room to type a random Moroccan word first.
+        Returns the delay until the next round (a random 1–8 minutes)."""
+        wait = random.randint(60, 480)
+        if not self.is_connected or self.dawya_active:
+            return wait
+        self.start_dawya_round()
+        return 20 + wait
+
+    def start_dawya_round(self):
+        """Announce a word; the first to type it wins. Expires after 20 seconds."""
+        word = random.choice(self.dawya_words)
+        self.dawya_current_word = word
+        self.dawya_active = True
+        self.dawya_claimed = False
+        self.dawya_winner_this_round = None
+
+        announce = self.gradient_text("⚡ WORD CHALLENGE! ⚡", "fire")
+        self.outbox.say(
+            f"{announce}\n"
+            f"🏃 Awwel wa7ed ykteb '{word}' f chat "
+            f"ywl +5 nqat f leaderboard! 🏆",
+            priority=GAME
+        )
+        # Give players 20 seconds to respond
+        self._dawya_timer = self.scheduler.after(20, self._dawya_expire, word, name="dawya_expire")
+
+    def _dawya_expire(self, word):
+        # Time's up — if nobody claimed it
+        if self.dawya_active and not self.dawya_claimed and self.dawya_current_word == word:
+            self.dawya_active = False
+            self.dawya_current_word = None
+            self.outbox.say(f"⏰ Waqt sala! Ma7ad kteb '{word}'... 😅", priority=GAME)
 
     async def on_disconnect(self) -> None:
         """Called when the WebSocket drops — wait and let the SDK reconnect naturally."""
         self.is_connected = False
         print("[DISCONNECT] Bot disconnected — waiting for SDK to reconnect...")
-
-    async def loop_emote(self, user_id, emote_id, duration):
+        await self.persist.flush()
+
+    # Emote loops themselves are driven by self.emote_loops (emote_loops.py)
+    async def _send_loop_emote(self, emote_id, user_id):
+        emote = self.emotes.by_id.get(emote_id)
+        if emote is not None:
+            await self._send_user_emote(emote, user_id)
+            return
+        result = await self.highrise.send_emote(emote_id, user_id)
+        if isinstance(result, Error):
+            raise RuntimeError(result.message)
+
+    async def _send_user_emote(self, emote, user_id):
+        """send_emote to a user; the outcome feeds self.emote_access. Raises on failure."""
         try:
-            while self.looping_users.get(user_id, False):
-                if not self.is_connected:
-                    await asyncio.sleep(2)
-                    continue
-                await self.highrise.send_emote(emote_id, user_id)
-                # Floor/idle emotes have a visible stand-up at the end —
-                # re-trigger 2.5s early to cut off the reset animation.
-                # Regular emotes just need a small 0.4s overlap.
-                if emote_id in self.FLOOR_EMOTES:
-                    sleep_time = max(duration - 2.5, 0.8)
-                else:
-                    sleep_time = max(duration - 0.4, 0.8)
-                await asyncio.sleep(sleep_time)
+            result = await self.highrise.send_emote(emote.id, user_id)
+            if isinstance(result, Error):
+                raise RuntimeError(result.message)
         except Exception as e:
-            print(f"Error in loop_emote: {e}")
-        finally:
-            if user_id in self.looping_users:
-                del self.looping_users[user_id]
+            self.emote_access.record_failure(user_id, emote, e)
+            raise
+        self.emote_access.record_success(user_id, emote)
 
-    async def loop_random_emote(self, user_id):
-        """Keep playing random emotes for a user until they type '0'."""
-        try:
-            while self.looping_users.get(user_id, False):
-                if not self.is_connected:
-                    await asyncio.sleep(2)
-                    continue
-                emote_name = random.choice(self.emote_keys)
-                emote_data = self.emote_dict[emote_name]
-                emote_id   = emote_data[0]
-                duration   = float(emote_data[1])
-                try:
-                    await self.highrise.send_emote(emote_id, user_id)
-                except Exception:
-                    # User doesn't own this emote — skip it silently
-                    continue
-                if emote_id in self.FLOOR_EMOTES:
-                    sleep_time = max(duration - 2.5, 0.8)
-                else:
-                    sleep_time = max(duration - 0.4, 0.8)
-                await asyncio.sleep(sleep_time)
-        except Exception as e:
-            print(f"Error in loop_random_emote: {e}")
-        finally:
-            if user_id in self.looping_users:
-                del self.looping_users[user_id]
+    def _pick_random_emote(self, user_id):
+        emote = self.emote_access.pick(user_id, self.emotes.all) or random.choice(self.emotes.free)
+        return emote.id, emote.duration
+
+    def _emote_loop_delay(self, emote_id, duration: float) -> float:
+        emote = self.emotes.by_id.get(emote_id)
+        return emote.loop_delay if emote else loop_delay(emote_id, duration)
@@ -0,0 +1,188 @@
+"""
+metrics.py — In-process metrics rendered in Prometheus text format.
+
+webserver.py serves Registry.render() on /metrics. Three kinds:
+
+  counter    monotonically increasing; inc() from the bot, or fn=callback
+             for counts a component already keeps (Outbox.sent, ...)
+  gauge      current value; set() or fn=callback read at scrape time
+  histogram  fixed buckets; observe() / time() for latencies
+
+Callbacks return a number, or {label values tuple: number} for labelled
+metrics. Callbacks only read, and a callback that raises just drops that
+metric from the scrape. MyBot serves /metrics from its own event loop.
+
+LoopLagProbe measures event-loop lag: it sleeps `interval` seconds and
+records how late it woke up.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds — handlers and API calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=(), fn=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+        self._values = {}         # {label values tuple: value}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def _collect(self) -> dict:
+        values = dict(self._values)
+        if self.fn is not None:
+            got = self.fn()
+            if isinstance(got, dict):
+                for key, value in got.items():
+                    key = key if isinstance(key, tuple) else (key,)
+                    values[key] = values.get(key, 0) + value
+            else:
+                values[()] = values.get((), 0) + got
+        return values
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}         # {label values: [bucket counts..., +Inf count, sum]}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} registered twice")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=(), fn=None) -> Counter:
+        return self._add(Counter(name, help, labels, fn))
+
+    def gauge(self, name, help, labels=(), fn=None) -> Gauge:
+        return self._add(Gauge(name, help, labels, fn))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def timed(self, histogram: Histogram, fn, **labels):
+        """Wrap an async callable so every call is observed in `histogram`."""
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        wrapper.__name__ = getattr(fn, "__name__", "handler")
+        wrapper.__qualname__ = getattr(fn, "__qualname__", wrapper.__name__)  # Shows up in stall reports
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines += metric.render()
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+class LoopLagProbe:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        """Sleep `interval`, record how late the wake-up was — start once as a task."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.monotonic() - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
@@ -0,0 +1,204 @@
+"""
+outbound.py — Rate-limited outbound queue for chat, whispers and reactions.
+
+Handlers used to space their own sends with hand-placed asyncio.sleep()
+calls, while concurrent handlers could still burst past the server's
+limits together. Every chat / whisper / react now goes through one Outbox:
+
+  * say() / whisper() / react() enqueue and return immediately
+  * one worker drains the queue through a global token bucket
+    (`rate` sends per second, bursts up to `burst`)
+  * higher priority goes first; FIFO within a priority:
+        MODERATION > GAME > COMMAND > GREETING > ANNOUNCE
+  * low-priority items (greetings, announcements) carry a TTL and are
+    dropped if they wait too long, and are refused outright when the
+    queue is deeper than `max_depth`
+  * items enqueued with the same `key` merge — the newer one replaces the
+    still-pending older one (progress lines, repeated reactions)
+
+deliver() enqueues like the others but waits until the item is actually
+sent, so a bulk job can feed the queue a few items at a time instead of
+flooding it.
+
+stats() exposes queue depth per priority, sent / dropped / merged
+counters and wait times for the metrics endpoint and !outbox.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+# Priorities — lower number is sent first
+MODERATION, GAME, COMMAND, GREETING, ANNOUNCE = range(5)
+PRIORITY_NAMES = ("moderation", "game", "command", "greeting", "announce")
+
+# Default time-to-live (seconds) per priority; None = never expires
+DEFAULT_TTL = {MODERATION: None, GAME: None, COMMAND: 60.0, GREETING: 30.0, ANNOUNCE: 60.0}
+
+
+class QueueFull(Exception):
+    """deliver() item refused or expired before it could be sent."""
+
+
+class _Item:
+    __slots__ = ("kind", "args", "priority", "key", "enqueued", "expires", "cancelled", "future")
+
+    def __init__(self, kind, args, priority, key, ttl, future=None):
+        now = time.monotonic()
+        self.kind = kind
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.enqueued = now
+        self.expires = now + ttl if ttl is not None else None
+        self.cancelled = False
+        self.future = future          # Resolved once sent, for deliver()
+
+    def settle(self, error=None):
+        if self.future is not None and not self.future.done():
+            if error is None:
+                self.future.set_result(None)
+            else:
+                self.future.set_exception(error)
+
+
+class Outbox:
+    def __init__(self, highrise_fn, rate: float = 2.5, burst: int = 4, max_depth: int = 60):
+        self._highrise = highrise_fn   # () -> current BotAPI (it is replaced on reconnect)
+        self.rate = rate
+        self.burst = burst
+        self.max_depth = max_depth
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._heap = []                # [(priority, seq, _Item)]
+        self._seq = itertools.count()
+        self._keyed = {}               # {key: pending _Item}
+        self._wakeup = asyncio.Event()
+        self.depth = [0] * len(PRIORITY_NAMES)
+        self.sent = 0
+        self.sent_by_kind = {"chat": 0, "whisper": 0, "react": 0}
+        self.last_sent_at = 0.0        # time.monotonic() of the last successful send
+        self.dropped = 0
+        self.merged = 0
+        self.failed = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+
+    # ── Enqueue ─────────────────────────────────────────────────────
+    def _put(self, kind, args, priority, key, ttl, future=None):
+        if ttl is None:
+            ttl = DEFAULT_TTL.get(priority)
+        if priority >= GREETING and sum(self.depth) >= self.max_depth:
+            self.dropped += 1
+            if future is not None:
+                future.set_exception(QueueFull(f"outbox depth {sum(self.depth)}"))
+            return
+        if key is not None:
+            old = self._keyed.get(key)
+            if old is not None and not old.cancelled:
+                old.cancelled = True
+                old.settle()
+                self.depth[old.priority] -= 1
+                self.merged += 1
+        item = _Item(kind, args, priority, key, ttl, future)
+        if key is not None:
+            self._keyed[key] = item
+        heapq.heappush(self._heap, (priority, next(self._seq), item))
+        self.depth[priority] += 1
+        self._wakeup.set()
+
+    def say(self, text: str, priority: int = COMMAND, key=None, ttl=None):
+        """Queue a public chat message."""
+        self._put("chat", (text,), priority, key, ttl)
+
+    def whisper(self, user_id: str, text: str, priority: int = COMMAND, key=None, ttl=None):
+        """Queue a whisper to one user."""
+        self._put("whisper", (user_id, text), priority, key, ttl)
+
+    def react(self, reaction: str, user_id: str, priority: int = GREETING, key=None, ttl=None):
+        """Queue a reaction."""
+        self._put("react", (reaction, user_id), priority, key, ttl)
+
+    async def deliver(self, kind: str, *args, priority: int = COMMAND):
+        """Queue a "chat" / "whisper" / "react" and wait until it is sent.
+        Raises whatever the API call raised, or QueueFull."""
+        future = asyncio.get_running_loop().create_future()
+        self._put(kind, args, priority, None, None, future)
+        await future
+
+    # ── Worker ──────────────────────────────────────────────────────
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _pop(self):
+        """Next live item, discarding merged and expired ones."""
+        now = time.monotonic()
+        while self._heap:
+            _, _, item = heapq.heappop(self._heap)
+            if item.cancelled:
+                continue
+            self.depth[item.priority] -= 1
+            if item.key is not None and self._keyed.get(item.key) is item:
+                del self._keyed[item.key]
+            if item.expires is not None and now > item.expires:
+                self.dropped += 1
+                item.settle(QueueFull("expired before sending"))
+                continue
+            return item
+        return None
+
+    async def _send(self, item: _Item):
+        api = self._highrise()
+        if item.kind == "chat":
+            await api.chat(*item.args)
+        elif item.kind == "whisper":
+            await api.send_whisper(*item.args)
+        elif item.kind == "react":
+            await api.react(*item.args)
+
+    async def run(self):
+        """Drain the queue forever — start once as a background task."""
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await self._take_token()
+            item = self._pop()
+            if item is None:
+                self._tokens = min(self.burst, self._tokens + 1)  # Nothing sent — refund
+                continue
+            wait = time.monotonic() - item.enqueued
+            self.last_wait = wait
+            self.max_wait = max(self.max_wait, wait)
+            try:
+                await self._send(item)
+                self.sent += 1
+                self.sent_by_kind[item.kind] += 1
+                self.last_sent_at = time.monotonic()
+                item.settle()
+            except Exception as e:
+                self.failed += 1
+                item.settle(e)
+                print(f"[Outbox] {item.kind} failed: {e}")
+
+    # ── Metrics ─────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        return {
+            "depth": sum(self.depth),
+            "depth_by_priority": dict(zip(PRIORITY_NAMES, self.depth)),
+            "sent": self.sent,
+            "sent_by_kind": dict(self.sent_by_kind),
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "failed": self.failed,
+            "last_wait": self.last_wait,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,373 @@
+"""
+persistence.py — Disk persistence for chikha_data.json.
+
+Writing the whole data file synchronously on every join/leave/tip stalled the
+event loop once user_stats and user_ratings grew to thousands of entries.
+Two layers keep writes cheap:
+
+  * Journal — every mutation of a JournaledDict / JournaledSet is appended as
+    one small JSON line to chikha_data.journal, so the cost of a save scales
+    with the change (one point, one message), not with the dataset.
+  * PersistenceWriter — periodically compacts the journal into a full
+    snapshot (the same chikha_data.json load_data() reads). The snapshot is
+    copied on the event loop; serialization and the file write run in a
+    worker thread. flush_sync() is used at shutdown.
+
+At startup replay_journal() applies any journal records newer than the
+snapshot's "_journal_seq", so nothing written since the last compaction is lost.
+"""
+
+import asyncio
+import glob
+import heapq
+import json
+import os
+import threading
+import time
+
+DATA_FILE = "chikha_data.json"  # ChikhatraX own file — separate from Sikiriti
+JOURNAL_FILE = "chikha_data.journal"
+
+
+def load_data(path: str = DATA_FILE) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[Persistence] Could not load {path}: {e}")
+    return {}
+
+
+def save_data(data: dict, path: str = DATA_FILE):
+    """Write `data` atomically (temp file + os.replace). Raises on failure —
+    callers decide what a lost write means (keep the journal, pause a job)."""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  JOURNAL
+# ─────────────────────────────────────────────────────────────────────
+class Journal:
+    """Append-only JSON-lines log of table mutations.
+
+    Record format: {"s": seq, "op": op, "t": table, "k": key, "v": value, "f": field}
+    ops: set / incr / del / clear (dicts), add / discard / clear (sets).
+    Compaction rotates the active file to `<path>.<seq>`; segments are deleted
+    once a snapshot containing them has been written.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, seq: int = 0):
+        self.path = path
+        self.seq = seq
+        self.pending = 0  # Records appended since the last rotation
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, op: str, table: str, key=None, value=None, field=None) -> int:
+        self.seq += 1
+        rec = {"s": self.seq, "op": op, "t": table}
+        if key is not None:
+            rec["k"] = key
+        if value is not None:
+            rec["v"] = value
+        if field is not None:
+            rec["f"] = field
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._open().write(line)
+        self.pending += 1
+        return self.seq
+
+    def flush(self):
+        """Push buffered records to the OS — cheap, called every writer tick."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def rotate(self) -> int:
+        """Seal the active file as a segment ending at the current seq."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                os.replace(self.path, f"{self.path}.{self.seq}")
+        self.pending = 0
+        return self.seq
+
+    def drop_segments(self, upto: int):
+        """Delete sealed segments whose records are all <= `upto`."""
+        for seg, last in _segments(self.path):
+            if last is not None and last <= upto:
+                try:
+                    os.remove(seg)
+                except OSError as e:
+                    print(f"[Journal] Could not remove {seg}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _segments(path: str) -> list:
+    """[(file, last_seq)] — sealed segments in order, then the active file (last_seq None)."""
+    sealed = []
+    for seg in glob.glob(glob.escape(path) + ".*"):
+        suffix = seg.rsplit(".", 1)[1]
+        if suffix.isdigit():
+            sealed.append((seg, int(suffix)))
+    sealed.sort(key=lambda item: item[1])
+    if os.path.exists(path):
+        sealed.append((path, None))
+    return sealed
+
+
+def _apply(data: dict, rec: dict):
+    op, table = rec["op"], rec["t"]
+    if op in ("add", "discard"):
+        members = data.setdefault(table, [])
+        if op == "add" and rec["k"] not in members:
+            members.append(rec["k"])
+        elif op == "discard" and rec["k"] in members:
+            members.remove(rec["k"])
+        return
+    target = data.get(table)
+    if op == "clear":
+        if target is not None:
+            target.clear()
+        return
+    if target is None:
+        target = data[table] = {}
+    key, field = rec.get("k"), rec.get("f")
+    if field is not None:
+        target = target.setdefault(key, {})
+        key = field
+    if op == "set":
+        target[key] = rec.get("v")
+    elif op == "incr":
+        target[key] = target.get(key, 0) + rec.get("v", 0)
+    elif op == "del":
+        target.pop(key, None)
+
+
+def replay_journal(data: dict, path: str = JOURNAL_FILE) -> int:
+    """Apply journal records newer than data["_journal_seq"] in place.
+    Returns the last sequence number seen so a new Journal can continue it."""
+    base = data.get("_journal_seq", 0)
+    last = base
+    applied = 0
+    for seg, _ in _segments(path):
+        try:
+            with open(seg, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # Torn final line from a crash mid-write
+                    last = max(last, rec["s"])
+                    if rec["s"] > base:
+                        _apply(data, rec)
+                        applied += 1
+        except OSError as e:
+            print(f"[Journal] Could not read {seg}: {e}")
+    if applied:
+        print(f"[Journal] Replayed {applied} records after snapshot seq {base}")
+    return last
+
+
+class JournaledDict(dict):
+    """dict whose writes are recorded in the journal. Reads are plain dict reads."""
+
+    def __init__(self, name: str, journal: Journal, data=None):
+        super().__init__(data or {})
+        self.name = name
+        self.journal = journal
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.journal.append("set", self.name, key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.journal.append("del", self.name, key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = super().pop(key)
+            self.journal.append("del", self.name, key)
+            return value
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.journal.append("clear", self.name)
+
+    def incr(self, key, amount=1):
+        """self[key] += amount, journaled as a tiny increment record."""
+        value = self.get(key, 0) + amount
+        super().__setitem__(key, value)
+        self.journal.append("incr", self.name, key, amount)
+        return value
+
+    def incr_field(self, key, field, amount=1, default_row=None):
+        """self[key][field] += amount for nested rows (e.g. user_stats)."""
+        if key not in self:
+            self[key] = dict(default_row or {})
+        row = dict.__getitem__(self, key)
+        row[field] = row.get(field, 0) + amount
+        self.journal.append("incr", self.name, key, amount, field=field)
+        return row[field]
+
+    def top(self, k: int, field=None, exclude=None) -> list:
+        """k largest (key, value) pairs, by a nested row `field` if given.
+        `exclude(key)` filters keys out. O(n log k) over the in-memory dict."""
+        if field is None:
+            pairs = self.items()
+        else:
+            pairs = ((key, row.get(field, 0)) for key, row in self.items())
+        if exclude is not None:
+            pairs = ((key, value) for key, value in pairs if not exclude(key))
+        return heapq.nlargest(k, pairs, key=lambda kv: kv[1])
+
+
+class JournaledSet(set):
+    """set whose add/discard/remove/clear are recorded in the journal."""
+
+    def __init__(self, name: str, journal: Journal, data=None):
+        super().__init__(data or ())
+        self.name = name
+        self.journal = journal
+
+    def add(self, item):
+        if item not in self:
+            super().add(item)
+            self.journal.append("add", self.name, item)
+
+    def discard(self, item):
+        if item in self:
+            super().discard(item)
+            self.journal.append("discard", self.name, item)
+
+    def remove(self, item):
+        super().remove(item)
+        self.journal.append("discard", self.name, item)
+
+    def clear(self):
+        super().clear()
+        self.journal.append("clear", self.name)
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  SNAPSHOT WRITER
+# ─────────────────────────────────────────────────────────────────────
+class PersistenceWriter:
+    """Flushes the journal every tick and compacts it into a snapshot when
+    something un-journaled changed (mark_dirty), when the journal gets long,
+    or every `compact_interval` seconds.
+
+    `snapshot_fn` is called on the event loop and must return a dict that is
+    safe to serialize from another thread (i.e. copies of anything mutable).
+    """
+
+    def __init__(self, snapshot_fn, journal: Journal, interval: float = 5.0,
+                 path: str = DATA_FILE, compact_every: int = 5000,
+                 compact_interval: float = 600.0):
+        self._snapshot_fn = snapshot_fn
+        self.journal = journal
+        self.interval = interval
+        self.path = path
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self.dirty = False
+        self._lock = asyncio.Lock()
+        self._write_lock = threading.Lock()  # Shutdown flush vs worker thread
+        self.flush_count = 0
+        self.last_flush_duration = 0.0
+        self.last_flush_at = 0.0
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def _due(self) -> bool:
+        if self.dirty or self.journal.pending >= self.compact_every:
+            return True
+        return (self.journal.pending > 0 and
+                time.time() - self.last_flush_at >= self.compact_interval)
+
+    def _take_snapshot(self) -> dict:
+        """Seal the journal and copy state in one synchronous step, so the
+        snapshot contains exactly the records up to the sealed seq."""
+        self.dirty = False
+        seq = self.journal.rotate()
+        data = self._snapshot_fn()
+        data["_journal_seq"] = seq
+        return data
+
+    def _write(self, data: dict):
+        start = time.perf_counter()
+        with self._write_lock:
+            save_data(data, self.path)  # Raises — the segments are only dropped once it is on disk
+            self.journal.drop_segments(data["_journal_seq"])
+        self.last_flush_duration = time.perf_counter() - start
+        self.last_flush_at = time.time()
+        self.flush_count += 1
+
+    async def flush(self, force: bool = False):
+        """Flush the journal and compact if due, without blocking the loop."""
+        async with self._lock:
+            self.journal.flush()
+            if not (force or self._due()):
+                return
+            data = self._take_snapshot()
+            try:
+                await asyncio.to_thread(self._write, data)
+            except Exception as e:
+                self.dirty = True  # Retry on the next tick — journal still has the records
+                print(f"[Persistence] Compaction failed: {e}")
+
+    def flush_sync(self):
+        """Blocking flush for shutdown paths (atexit / signal handlers)."""
+        self.journal.flush()
+        if not self._due():
+            return
+        try:
+            self._write(self._take_snapshot())
+        except Exception as e:
+            self.dirty = True
+            print(f"[Persistence] Shutdown compaction failed — journal kept for replay: {e}")
+            return
+        print("[Persistence] Compacted pending state on shutdown")
+
+    async def run(self):
+        """Background loop — flush the journal every `interval` seconds."""
+        self.last_flush_at = time.time()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
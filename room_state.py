@@ -0,0 +1,99 @@
+"""
+room_state.py — Shared in-memory view of who is in the room and where they stand.
+
+Every loop and command used to call get_room_users() on its own, which in a
+busy room meant dozens of full room snapshots per minute and rate-limit
+disconnects. RoomState keeps one map of user id → (User, Position) that is:
+
+  * updated live from on_user_join / on_user_leave / on_user_move
+  * reconciled against a real get_room_users() snapshot on a slow interval
+    (the keep-alive ping doubles as the reconcile call)
+
+Readers get the same (User, Position) tuples the API returns, so callers
+that used to iterate `await self.safe_get_room_users()` can iterate
+`self.room.users()` instead — no API call, no await.
+"""
+
+import time
+
+
+class RoomState:
+    def __init__(self):
+        self._users = {}     # {user_id: (User, Position | AnchorPosition)}
+        self._by_name = {}   # {username.lower(): user_id}
+        self._touched = {}   # {user_id: monotonic time of last live event}
+        self._gone = {}      # {user_id: monotonic time of leave event}
+        self.last_sync = 0.0  # monotonic time of last successful reconcile
+
+    # ── Live events ─────────────────────────────────────────────────
+    def join(self, user, position):
+        """Add or refresh a user from a join/move event."""
+        old = self._users.get(user.id)
+        if old and old[0].username.lower() != user.username.lower():
+            self._by_name.pop(old[0].username.lower(), None)
+        self._users[user.id] = (user, position)
+        self._by_name[user.username.lower()] = user.id
+        self._touched[user.id] = time.monotonic()
+        self._gone.pop(user.id, None)
+
+    move = join
+
+    def leave(self, user_id: str):
+        """Drop a user from a leave event."""
+        entry = self._users.pop(user_id, None)
+        if entry:
+            name = entry[0].username.lower()
+            if self._by_name.get(name) == user_id:
+                del self._by_name[name]
+        self._touched.pop(user_id, None)
+        self._gone[user_id] = time.monotonic()
+
+    # ── Reconcile ───────────────────────────────────────────────────
+    def reconcile(self, room_users, started_at: float):
+        """Replace the map with an API snapshot taken at `started_at` (monotonic).
+        Live events that arrived after the request went out win over the snapshot,
+        so a join/leave racing the reconcile call is not undone."""
+        fresh = {}
+        for user, pos in room_users:
+            if self._gone.get(user.id, 0.0) > started_at:
+                continue  # Left while the snapshot was in flight
+            if self._touched.get(user.id, 0.0) > started_at and user.id in self._users:
+                fresh[user.id] = self._users[user.id]
+            else:
+                fresh[user.id] = (user, pos)
+        for uid, entry in self._users.items():
+            if uid not in fresh and self._touched.get(uid, 0.0) > started_at:
+                fresh[uid] = entry  # Joined while the snapshot was in flight
+
+        self._users = fresh
+        self._by_name = {u.username.lower(): uid for uid, (u, _) in fresh.items()}
+        self._touched = {uid: t for uid, t in self._touched.items() if uid in fresh}
+        self._gone = {}
+        self.last_sync = time.monotonic()
+
+    # ── Reads ───────────────────────────────────────────────────────
+    def users(self) -> list:
+        """All (User, Position) pairs — same shape as get_room_users().content."""
+        return list(self._users.values())
+
+    def get(self, user_id: str):
+        """(User, Position) for a user id, or None if not in the room."""
+        return self._users.get(user_id)
+
+    def position(self, user_id: str):
+        entry = self._users.get(user_id)
+        return entry[1] if entry else None
+
+    def find(self, username: str):
+        """(User, Position) for a username (case-insensitive), or None."""
+        uid = self._by_name.get(username.lower())
+        return self._users.get(uid) if uid else None
+
+    def ids(self) -> set:
+        return set(self._users)
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
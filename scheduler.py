@@ -0,0 +1,226 @@
+"""
+scheduler.py — One heap-based scheduler for periodic loops and one-shot timers.
+
+on_start used to launch eight `while True: sleep` loops, and every !riddle,
+!dawya and dance-floor entry spawned its own throwaway sleeping task. All of
+them are now entries in one Scheduler:
+
+  * every(name, interval, fn) — recurring job; fn may return a number to
+    override the delay before its next run (emote-length beats)
+  * after(delay, fn, *args) — one-shot timer; a heap entry, not a task, so
+    thousands of pending riddle timeouts cost a tuple each
+  * both return a Handle; handle.cancel() is O(1) (the heap entry is skipped
+    when it comes up, and the heap is compacted once most of it is dead)
+  * `jitter` spreads a recurring job by ±jitter seconds per run, `when`
+    skips runs while a condition is false (e.g. disconnected)
+  * synchronous callbacks run inline; coroutines run as tasks, and a
+    recurring job is not rescheduled until its previous run finished
+
+Per-job runs / errors / skips and run-time (avg, max) are kept by name;
+jobs() lists what is scheduled for !sched and the metrics endpoint.
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import random
+import time
+
+
+class Handle:
+    __slots__ = ("name", "fn", "args", "interval", "jitter", "when", "due",
+                 "cancelled", "running", "_seq")
+
+    def __init__(self, name, fn, args, interval=None, jitter=0.0, when=None):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.interval = interval    # None = one-shot
+        self.jitter = jitter
+        self.when = when
+        self.due = 0.0              # time.monotonic() of the next run
+        self.cancelled = False
+        self.running = False
+        self._seq = 0
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval is not None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class JobStats:
+    __slots__ = ("runs", "errors", "skipped", "total_time", "max_time", "last_run")
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_run = 0.0
+
+    def record(self, elapsed: float):
+        self.runs += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_run = time.time()
+
+    @property
+    def avg_ms(self) -> float:
+        return 1000 * self.total_time / self.runs if self.runs else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return 1000 * self.max_time
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap = []               # [(due, seq, Handle)]
+        self._seq = itertools.count()
+        self._recurring = {}          # {name: Handle}
+        self._dead = 0                # Cancelled entries still in the heap
+        self._wakeup = asyncio.Event()
+        self.stats = {}               # {name: JobStats}
+
+    # ── Scheduling ──────────────────────────────────────────────────
+    def _push(self, handle: Handle, delay: float):
+        handle.due = time.monotonic() + max(0.0, delay)
+        handle._seq = next(self._seq)
+        heapq.heappush(self._heap, (handle.due, handle._seq, handle))
+        if self._heap[0][2] is handle:
+            self._wakeup.set()        # New earliest entry — re-arm the sleep
+
+    def every(self, name: str, interval: float, fn, first=None, jitter: float = 0.0,
+              when=None) -> Handle:
+        """Run fn() every `interval` seconds (first run after `first`, default
+        one interval). Replaces any recurring job with the same name."""
+        if name in self._recurring:
+            self.cancel(self._recurring[name])
+        handle = Handle(name, fn, (), interval, jitter, when)
+        self._recurring[name] = handle
+        self.stats.setdefault(name, JobStats())
+        self._push(handle, interval if first is None else first)
+        return handle
+
+    def after(self, delay: float, fn, *args, name: str = None) -> Handle:
+        """Run fn(*args) once after `delay` seconds."""
+        handle = Handle(name or getattr(fn, "__name__", "timer"), fn, args)
+        self.stats.setdefault(handle.name, JobStats())
+        self._push(handle, delay)
+        return handle
+
+    def cancel(self, handle):
+        if handle is None or handle.cancelled:
+            return
+        handle.cancel()
+        self._dead += 1
+        if self._recurring.get(handle.name) is handle:
+            del self._recurring[handle.name]
+        if self._dead > 64 and self._dead > len(self._heap) // 2:
+            self._heap = [e for e in self._heap if not e[2].cancelled]
+            heapq.heapify(self._heap)
+            self._dead = 0
+
+    def wake(self, handle: Handle):
+        """Run a recurring job now instead of at its scheduled time."""
+        if handle.cancelled or handle.running or handle.due <= time.monotonic():
+            return
+        handle._seq = -1              # Orphan the current heap entry
+        self._dead += 1
+        self._push(handle, 0.0)
+
+    # ── Execution ───────────────────────────────────────────────────
+    def _next_delay(self, handle: Handle, result) -> float:
+        delay = result if isinstance(result, (int, float)) and not isinstance(result, bool) \
+            else handle.interval
+        if handle.jitter:
+            delay += random.uniform(-handle.jitter, handle.jitter)
+        return max(0.0, delay)
+
+    def _finish(self, handle: Handle, start: float, result=None, error=None):
+        stats = self.stats[handle.name]
+        stats.record(time.perf_counter() - start)
+        if error is not None:
+            stats.errors += 1
+            print(f"[Scheduler] {handle.name} failed: {error}")
+        handle.running = False
+        if handle.recurring and not handle.cancelled:
+            self._push(handle, self._next_delay(handle, result))
+
+    async def _run_async(self, handle: Handle, coro, start: float):
+        try:
+            result = await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._finish(handle, start, error=e)
+        else:
+            self._finish(handle, start, result)
+
+    def _fire(self, handle: Handle):
+        if handle.when is not None and not handle.when():
+            self.stats[handle.name].skipped += 1
+            if handle.recurring:
+                self._push(handle, self._next_delay(handle, None))
+            return
+        handle.running = True
+        start = time.perf_counter()
+        try:
+            result = handle.fn(*handle.args)
+        except Exception as e:
+            self._finish(handle, start, error=e)
+            return
+        if inspect.isawaitable(result):
+            asyncio.create_task(self._run_async(handle, result, start))
+        else:
+            self._finish(handle, start, result)
+
+    async def run(self):
+        """Fire due jobs forever — start once as a background task."""
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, seq, handle = heapq.heappop(self._heap)
+            if handle.cancelled or seq != handle._seq:
+                self._dead = max(0, self._dead - 1)
+                continue
+            if not handle.recurring:
+                handle.cancelled = True   # Fired — a late cancel() is a no-op
+            self._fire(handle)
+
+    # ── Listing ─────────────────────────────────────────────────────
+    def overdue(self, grace: float) -> list:
+        """Recurring jobs that should have started more than `grace` seconds ago."""
+        now = time.monotonic()
+        return [h.name for h in list(self._recurring.values())
+                if not h.running and now - h.due > grace]
+
+    def jobs(self) -> list:
+        """(name, seconds until next run or None, JobStats, pending one-shots) per job name."""
+        now = time.monotonic()
+        pending = {}
+        for _, seq, handle in self._heap:
+            if not handle.cancelled and seq == handle._seq and not handle.recurring:
+                pending[handle.name] = pending.get(handle.name, 0) + 1
+        out = []
+        for name, stats in self.stats.items():
+            handle = self._recurring.get(name)
+            due = None
+            if handle is not None and not handle.running:
+                due = max(0.0, handle.due - now)
+            out.append((name, due, stats, pending.get(name, 0)))
+        return out
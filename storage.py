@@ -0,0 +1,392 @@
+"""
+storage.py — Pluggable storage backends for the bot's persistent tables.
+
+Select the backend at startup with the STORAGE_BACKEND env var:
+
+  json   (default) chikha_data.json snapshot + append-only journal (persistence.py).
+         Every table is held in memory as a JournaledDict / JournaledSet.
+  sqlite chikha_data.db in WAL mode. Tables live on disk with an index on the
+         value column, so leaderboards are indexed top-k queries and memory
+         no longer grows with every visitor ever seen.
+
+Both backends hand out the same table interface, so MyBot code is identical:
+  table(name)  → mapping with .incr(), .incr_field(), .top(k, ...), .clear()
+  set(name)    → set-like with add/discard
+  extra(key)   → small non-table state (zones, bot position)
+  writer(fn)   → background flusher with mark_dirty/flush/flush_sync/run
+
+On first start with the sqlite backend, an existing chikha_data.json (plus its
+journal tail) is imported automatically.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections.abc import MutableMapping, MutableSet
+
+from persistence import (DATA_FILE, JOURNAL_FILE, Journal, JournaledDict, JournaledSet,
+                         PersistenceWriter, load_data, replay_journal)
+
+DB_FILE = "chikha_data.db"
+
+# Persistent dict tables: name → (value column, SQL type, index the value?)
+TABLES = {
+    "user_ratings":     ("points",   "INTEGER NOT NULL DEFAULT 0", True),
+    "tip_totals":       ("total",    "INTEGER NOT NULL DEFAULT 0", True),
+    "user_total_time":  ("seconds",  "REAL NOT NULL DEFAULT 0",    True),
+    "user_sessions":    ("count",    "INTEGER NOT NULL DEFAULT 0", False),
+    "vip_timed":        ("expiry",   "REAL NOT NULL",              True),
+    "custom_greetings": ("greeting", "TEXT NOT NULL",              False),
+}
+STATS_TABLE = "user_stats"
+STATS_FIELDS = ("messages", "emotes", "tips_given")
+SETS = ("moderators", "vip_permanent")
+
+
+def open_storage(kind: str | None = None):
+    """Build the backend named by `kind` or $STORAGE_BACKEND (default json)."""
+    kind = (kind or os.environ.get("STORAGE_BACKEND", "json")).strip().lower()
+    if kind == "sqlite":
+        return SqliteStorage(os.environ.get("STORAGE_PATH", DB_FILE))
+    if kind != "json":
+        print(f"[Storage] Unknown STORAGE_BACKEND '{kind}' — using json")
+    return JsonStorage()
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  JSON SNAPSHOT + JOURNAL
+# ─────────────────────────────────────────────────────────────────────
+class JsonStorage:
+    name = "json"
+
+    def __init__(self, path: str = DATA_FILE, journal_path: str = JOURNAL_FILE):
+        self.path = path
+        self._saved = load_data(path)
+        snapshot_seq = self._saved.get("_journal_seq", 0)
+        self.journal = Journal(journal_path, seq=replay_journal(self._saved, journal_path))
+        self._replayed = self.journal.seq > snapshot_seq
+        self._tables = {}
+        self._sets = {}
+
+    def table(self, name: str) -> JournaledDict:
+        if name not in self._tables:
+            self._tables[name] = JournaledDict(name, self.journal, self._saved.pop(name, {}))
+        return self._tables[name]
+
+    def set(self, name: str) -> JournaledSet:
+        if name not in self._sets:
+            self._sets[name] = JournaledSet(name, self.journal, self._saved.pop(name, []))
+        return self._sets[name]
+
+    def extra(self, key: str, default=None):
+        return self._saved.get(key, default)
+
+    def snapshot(self, extras: dict) -> dict:
+        """Copy of every table + extras — safe to serialize off the loop."""
+        data = {name: list(members) for name, members in self._sets.items()}
+        for name, table in self._tables.items():
+            if name == STATS_TABLE:
+                data[name] = {k: dict(row) for k, row in table.items()}
+            else:
+                data[name] = dict(table)
+        data.update(extras)
+        return data
+
+    def writer(self, extras_fn, interval: float = 5.0) -> PersistenceWriter:
+        writer = PersistenceWriter(lambda: self.snapshot(extras_fn()), self.journal,
+                                   interval=interval, path=self.path)
+        if self._replayed:
+            writer.mark_dirty()  # Fold the replayed tail into a fresh snapshot
+        return writer
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  SQLITE (WAL)
+# ─────────────────────────────────────────────────────────────────────
+def _top_query(conn, sql: str, k: int, exclude=None) -> list:
+    """Run an ORDER BY … DESC query page by page until k rows survive `exclude`."""
+    out = []
+    offset = 0
+    page = max(k, 16)
+    while len(out) < k:
+        rows = conn.execute(f"{sql} LIMIT ? OFFSET ?", (page, offset)).fetchall()
+        for key, value in rows:
+            if exclude is None or not exclude(key):
+                out.append((key, value))
+                if len(out) == k:
+                    break
+        if len(rows) < page:
+            break
+        offset += page
+    return out
+
+
+class SqliteTable(MutableMapping):
+    """username → single value column."""
+
+    def __init__(self, conn: sqlite3.Connection, name: str, column: str):
+        self._conn = conn
+        self.name = name
+        self.column = column
+
+    def __getitem__(self, key):
+        row = self._conn.execute(
+            f"SELECT {self.column} FROM {self.name} WHERE username = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def __contains__(self, key):
+        return self._conn.execute(
+            f"SELECT 1 FROM {self.name} WHERE username = ?", (key,)).fetchone() is not None
+
+    def __setitem__(self, key, value):
+        self._conn.execute(
+            f"INSERT INTO {self.name} (username, {self.column}) VALUES (?, ?) "
+            f"ON CONFLICT(username) DO UPDATE SET {self.column} = excluded.{self.column}",
+            (key, value))
+
+    def __delitem__(self, key):
+        cur = self._conn.execute(f"DELETE FROM {self.name} WHERE username = ?", (key,))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter([r[0] for r in self._conn.execute(f"SELECT username FROM {self.name}")])
+
+    def __len__(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def items(self):
+        """(username, value) rows streamed from a cursor — never the whole table at once."""
+        return self._conn.execute(f"SELECT username, {self.column} FROM {self.name}")
+
+    def clear(self):
+        self._conn.execute(f"DELETE FROM {self.name}")
+
+    def incr(self, key, amount=1):
+        self._conn.execute(
+            f"INSERT INTO {self.name} (username, {self.column}) VALUES (?, ?) "
+            f"ON CONFLICT(username) DO UPDATE SET {self.column} = {self.column} + excluded.{self.column}",
+            (key, amount))
+        return self[key]
+
+    def top(self, k: int, exclude=None) -> list:
+        """k largest (username, value) pairs — walks the value index, no full sort."""
+        return _top_query(
+            self._conn,
+            f"SELECT username, {self.column} FROM {self.name} ORDER BY {self.column} DESC",
+            k, exclude)
+
+
+class SqliteStatsTable(MutableMapping):
+    """user_stats — username → {'messages', 'emotes', 'tips_given'} row."""
+
+    name = STATS_TABLE
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._cols = ", ".join(STATS_FIELDS)
+
+    def __getitem__(self, key):
+        row = self._conn.execute(
+            f"SELECT {self._cols} FROM {self.name} WHERE username = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return dict(zip(STATS_FIELDS, row))
+
+    def __contains__(self, key):
+        return self._conn.execute(
+            f"SELECT 1 FROM {self.name} WHERE username = ?", (key,)).fetchone() is not None
+
+    def __setitem__(self, key, row: dict):
+        values = [int(row.get(f, 0)) for f in STATS_FIELDS]
+        updates = ", ".join(f"{f} = excluded.{f}" for f in STATS_FIELDS)
+        self._conn.execute(
+            f"INSERT INTO {self.name} (username, {self._cols}) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT(username) DO UPDATE SET {updates}", (key, *values))
+
+    def __delitem__(self, key):
+        cur = self._conn.execute(f"DELETE FROM {self.name} WHERE username = ?", (key,))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter([r[0] for r in self._conn.execute(f"SELECT username FROM {self.name}")])
+
+    def __len__(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def items(self):
+        rows = self._conn.execute(f"SELECT username, {self._cols} FROM {self.name}").fetchall()
+        return [(r[0], dict(zip(STATS_FIELDS, r[1:]))) for r in rows]
+
+    def clear(self):
+        self._conn.execute(f"DELETE FROM {self.name}")
+
+    def incr_field(self, key, field, amount=1, default_row=None):
+        if field not in STATS_FIELDS:
+            raise KeyError(field)
+        self._conn.execute(
+            f"INSERT INTO {self.name} (username, {field}) VALUES (?, ?) "
+            f"ON CONFLICT(username) DO UPDATE SET {field} = {field} + excluded.{field}",
+            (key, amount))
+        return self[key][field]
+
+    def top(self, k: int, field: str = "tips_given", exclude=None) -> list:
+        if field not in STATS_FIELDS:
+            raise KeyError(field)
+        return _top_query(
+            self._conn,
+            f"SELECT username, {field} FROM {self.name} ORDER BY {field} DESC",
+            k, exclude)
+
+
+class SqliteSet(MutableSet):
+    def __init__(self, conn: sqlite3.Connection, name: str):
+        self._conn = conn
+        self.name = name
+
+    def __contains__(self, item):
+        return self._conn.execute(
+            f"SELECT 1 FROM {self.name} WHERE username = ?", (item,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([r[0] for r in self._conn.execute(f"SELECT username FROM {self.name}")])
+
+    def __len__(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def add(self, item):
+        self._conn.execute(f"INSERT OR IGNORE INTO {self.name} (username) VALUES (?)", (item,))
+
+    def discard(self, item):
+        self._conn.execute(f"DELETE FROM {self.name} WHERE username = ?", (item,))
+
+    def clear(self):
+        self._conn.execute(f"DELETE FROM {self.name}")
+
+
+class SqliteStorage:
+    name = "sqlite"
+
+    def __init__(self, path: str = DB_FILE):
+        self.path = path
+        # Writes accumulate in one open transaction and are committed by the
+        # writer tick — one WAL commit every few seconds instead of per event.
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._tables = {}
+        self._sets = {}
+        if self.extra("_migrated") is None:
+            self._import_json()
+
+    def _create_schema(self):
+        c = self.conn
+        for name, (column, sqltype, indexed) in TABLES.items():
+            c.execute(f"CREATE TABLE IF NOT EXISTS {name} (username TEXT PRIMARY KEY, {column} {sqltype})")
+            if indexed:
+                c.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{column} ON {name} ({column} DESC)")
+        cols = ", ".join(f"{f} INTEGER NOT NULL DEFAULT 0" for f in STATS_FIELDS)
+        c.execute(f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} (username TEXT PRIMARY KEY, {cols})")
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{STATS_TABLE}_tips ON {STATS_TABLE} (tips_given DESC)")
+        for name in SETS:
+            c.execute(f"CREATE TABLE IF NOT EXISTS {name} (username TEXT PRIMARY KEY)")
+        c.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+        c.commit()
+
+    def _import_json(self):
+        """One-time import of chikha_data.json (+ journal tail) into the database."""
+        saved = load_data()
+        if saved:
+            replay_journal(saved)
+            for name in TABLES:
+                table = self.table(name)
+                for key, value in (saved.get(name) or {}).items():
+                    table[key] = value
+            stats = self.table(STATS_TABLE)
+            for key, row in (saved.get(STATS_TABLE) or {}).items():
+                stats[key] = row
+            for name in SETS:
+                members = self.set(name)
+                for item in saved.get(name) or []:
+                    members.add(item)
+            for key in ("zones", "vip_floor", "dance_floor", "bot_last_position"):
+                if saved.get(key) is not None:
+                    self.put_extra(key, saved[key])
+            print(f"[Storage] Imported {DATA_FILE} into {self.path}")
+        self.put_extra("_migrated", time.time())
+        self.conn.commit()
+
+    def table(self, name: str):
+        if name not in self._tables:
+            if name == STATS_TABLE:
+                self._tables[name] = SqliteStatsTable(self.conn)
+            else:
+                self._tables[name] = SqliteTable(self.conn, name, TABLES[name][0])
+        return self._tables[name]
+
+    def set(self, name: str) -> SqliteSet:
+        if name not in self._sets:
+            self._sets[name] = SqliteSet(self.conn, name)
+        return self._sets[name]
+
+    def extra(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def put_extra(self, key: str, value):
+        self.conn.execute(
+            "INSERT INTO kv (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False)))
+
+    def writer(self, extras_fn, interval: float = 5.0):
+        return SqliteWriter(self, extras_fn, interval)
+
+
+class SqliteWriter:
+    """Same interface as PersistenceWriter: commits the open transaction every
+    tick and rewrites the small extras (zones, bot position) when dirty."""
+
+    def __init__(self, storage: SqliteStorage, extras_fn, interval: float = 5.0):
+        self.storage = storage
+        self._extras_fn = extras_fn
+        self.interval = interval
+        self.dirty = False
+        self.flush_count = 0
+        self.last_flush_duration = 0.0
+        self.last_flush_at = 0.0
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def _commit(self):
+        start = time.perf_counter()
+        if self.dirty:
+            self.dirty = False
+            for key, value in self._extras_fn().items():
+                self.storage.put_extra(key, value)
+        if self.storage.conn.in_transaction:
+            self.storage.conn.commit()
+            self.flush_count += 1
+        self.last_flush_duration = time.perf_counter() - start
+        self.last_flush_at = time.time()
+
+    async def flush(self, force: bool = False):
+        try:
+            self._commit()
+        except sqlite3.Error as e:
+            print(f"[Storage] Commit failed: {e}")
+
+    def flush_sync(self):
+        self._commit()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
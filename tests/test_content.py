@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from content import PACKS, build_bundle, open_bundle  # noqa: E402
+
+
+def test_riddles_and_answers_stay_aligned(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    riddles = [
+        {"riddle": "r1", "answer": "a1"},
+        {"riddle": "r2"},                   # No answer — would shift every later answer
+        {"answer": "orphan"},
+        {"riddle": "r3", "answer": "a3"},
+    ]
+    (tmp_path / "swalouat.json").write_text(json.dumps(riddles), encoding="utf-8")
+    (tmp_path / "nokat.json").write_text(json.dumps([{"joke": "j1"}]), encoding="utf-8")
+
+    counts = build_bundle("content.bin", PACKS)
+    assert counts["riddles"] == counts["answers"] == 2
+
+    packs = open_bundle("content.bin", PACKS)
+    assert list(packs["riddles"]) == ["r1", "r3"]
+    assert list(packs["answers"]) == ["a1", "a3"]
+    assert list(packs["jokes"]) == ["j1"]
+    assert len(packs["dares"]) == 0         # Missing source
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from emote_access import DENIED, GONE, TRANSIENT, EmoteAccess  # noqa: E402
+from emotes import Emote  # noqa: E402
+
+PAID = Emote(1, "Paid", "emote-paid", 3.0, False, frozenset(), 0.0)
+
+
+def test_unknown_errors_are_not_recorded():
+    access = EmoteAccess()
+    for error in ("Internal server error", "Invalid request", "Mock failure for EmoteRequest",
+                  "Rate limited"):
+        assert access.record_failure("u1", PAID, RuntimeError(error)) == TRANSIENT
+    assert access.can_play("u1", PAID)
+    assert access.chance("u1", PAID) == 0.5             # Estimate untouched
+    assert access.denied == 0
+
+
+def test_denied_and_gone():
+    access = EmoteAccess()
+    assert access.record_failure("u1", PAID, RuntimeError("Emote not owned")) == DENIED
+    assert not access.can_play("u1", PAID)
+    assert access.classify(RuntimeError("Target user not in room")) == GONE
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from emote_loops import RETRY_DELAY, EmoteLoops  # noqa: E402
+
+
+def _loops(error):
+    async def send(emote_id, user_id):
+        raise RuntimeError(error)
+
+    return EmoteLoops(send, lambda uid: ("emote-wave", 2.0), lambda eid, d: d)
+
+
+def _fire_once(loops, user_id):
+    loop = loops._loops[user_id]
+    loops._wheel[loop.slot].pop(user_id)
+    asyncio.run(loops._fire([loop]))
+    return loops._loops.get(user_id)
+
+
+def test_transient_failure_backs_off():
+    loops = _loops("Rate limited")
+    loops.start("u1")
+    loop = _fire_once(loops, "u1")
+    assert loop is not None
+    ticks = round(RETRY_DELAY / loops.tick)
+    assert loop.slot == (loops._cursor + ticks) % len(loops._wheel)
+
+
+def test_denied_random_loop_retries_next_tick():
+    loops = _loops("Emote not owned")
+    loops.start("u1")
+    loop = _fire_once(loops, "u1")
+    assert loop.slot == (loops._cursor + 1) % len(loops._wheel)
+
+
+def test_denied_fixed_loop_and_gone_user_stop():
+    loops = _loops("Emote not owned")
+    loops.start("u1", "emote-paid", 3.0)
+    assert _fire_once(loops, "u1") is None
+
+    loops = _loops("Target user not in room")
+    loops.start("u2")
+    assert _fire_once(loops, "u2") is None
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jobs import ABORTED, DONE, JobRunner  # noqa: E402
+
+TARGETS = [("u1", "joe"), ("u2", "sam"), ("u3", "ali")]
+
+
+async def _run(path, exactly_once):
+    runner = JobRunner(path=str(path))
+    stepped = []
+
+    async def step(job, uid, uname):
+        stepped.append(uid)
+
+    runner.register("tip", step, lambda job, final: None, exactly_once=exactly_once)
+    job = runner.start("tip", "owner", TARGETS)
+    await job.task
+    return job, stepped
+
+
+def test_exactly_once_aborts_when_checkpoint_fails(tmp_path):
+    job, stepped = asyncio.run(_run(tmp_path / "missing_dir" / "jobs.json", exactly_once=True))
+
+    assert stepped == []                    # Nothing paid without a durable record
+    assert job.status == ABORTED
+    assert "checkpoint" in job.error
+    assert job.pending == [list(t) for t in TARGETS]
+    assert not job.inflight
+
+
+def test_checkpoint_failure_does_not_stop_other_jobs(tmp_path):
+    job, stepped = asyncio.run(_run(tmp_path / "missing_dir" / "jobs.json", exactly_once=False))
+
+    assert stepped == ["u1", "u2", "u3"]
+    assert job.status == DONE
+
+
+def test_exactly_once_checkpoints_and_finishes(tmp_path):
+    job, stepped = asyncio.run(_run(tmp_path / "jobs.json", exactly_once=True))
+
+    assert stepped == ["u1", "u2", "u3"]
+    assert job.status == DONE
+    assert (tmp_path / "jobs.json").exists()
+
+
+def test_failure_count_survives_pruning(tmp_path):
+    async def scenario():
+        runner = JobRunner(path=str(tmp_path / "jobs.json"), history=1)
+
+        async def step(job, uid, uname):
+            raise RuntimeError("api down")
+
+        runner.register("hearts", step, lambda job, final: None)
+        for _ in range(3):
+            await runner.start("hearts", "owner", TARGETS).task
+        return runner
+
+    runner = asyncio.run(scenario())
+    assert len(list(runner)) == 1           # Older jobs pruned
+    assert runner.failures == 9
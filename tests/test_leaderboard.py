@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from leaderboard import RankIndex  # noqa: E402
+
+
+def _set(index, table, key, score):
+    old = table.get(key)
+    table[key] = score
+    index.update(key, score, old)
+
+
+def _expected_rank(table, key, exclude=lambda k: False):
+    mine = table[key]
+    return 1 + sum(1 for k, v in table.items() if not exclude(k) and v > mine)
+
+
+def test_rank_and_ties():
+    table = {}
+    index = RankIndex(table, limit=8)
+    for key, score in (("a", 5), ("b", 3), ("c", 5), ("d", 0)):
+        _set(index, table, key, score)
+
+    assert len(index) == 4
+    assert index.rank("a") == index.rank("c") == 1    # Ties share the best position
+    assert index.rank("b") == 3
+    assert index.rank("d") == 4
+    assert index.percentile("d") == 100.0
+    assert index.rank("nobody") is None
+
+    _set(index, table, "b", 6)
+    assert index.rank("b") == 1 and index.rank("a") == 2
+
+
+def test_scores_at_or_above_limit():
+    table = {}
+    index = RankIndex(table, limit=8)
+    for key, score in (("low", 7), ("edge", 8), ("high", 50), ("tie", 50)):
+        _set(index, table, key, score)
+
+    assert index.rank("high") == index.rank("tie") == 1
+    assert index.rank("edge") == 3
+    assert index.rank("low") == 4
+
+    _set(index, table, "edge", 2)                     # Moves from the list into the tree
+    assert index.rank("low") == 3 and index.rank("edge") == 4
+    _set(index, table, "low", 100)                    # And the other way
+    assert index.rank("low") == 1 and index.rank("high") == 2
+    assert len(index) == 4
+
+
+def test_remove_and_exclude():
+    table = {}
+    index = RankIndex(table, limit=8, exclude=lambda k: k == "bot")
+    for key, score in (("a", 3), ("b", 9), ("bot", 99)):
+        _set(index, table, key, score)
+
+    assert len(index) == 2
+    assert index.rank("bot") is None
+    assert index.rank("a") == 2
+
+    index.remove("b", table.pop("b"))
+    assert len(index) == 1
+    assert index.rank("a") == 1
+
+
+def test_load_matches_incremental_updates():
+    rng = random.Random(7)
+    table = {}
+    incremental = RankIndex(table, limit=16)
+    for _ in range(500):
+        key = f"u{rng.randrange(60)}"
+        if key in table and rng.random() < 0.1:
+            incremental.remove(key, table.pop(key))
+        else:
+            _set(incremental, table, key, rng.choice((0, 1, 3, 15, 16, 40, rng.randrange(30))))
+
+    loaded = RankIndex(table, limit=16)
+    loaded.load(table.items())
+
+    assert len(loaded) == len(incremental) == len(table)
+    for key in table:
+        assert loaded.rank(key) == incremental.rank(key) == _expected_rank(table, key)
@@ -0,0 +1,63 @@
+import asyncio
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from persistence import (  # noqa: E402
+    Journal, JournaledDict, PersistenceWriter, load_data, replay_journal, save_data,
+)
+
+
+def _writer(tmp_path, data_path):
+    journal = Journal(str(tmp_path / "data.journal"))
+    stats = JournaledDict("stats", journal)
+    writer = PersistenceWriter(lambda: {"stats": dict(stats)}, journal, path=str(data_path))
+    return journal, stats, writer
+
+
+def test_save_data_raises_on_unwritable_path(tmp_path):
+    path = tmp_path / "missing_dir" / "data.json"
+    try:
+        save_data({"a": 1}, str(path))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("save_data swallowed the failure")
+    assert not path.exists()
+
+
+def test_failed_compaction_keeps_journal(tmp_path):
+    data_path = tmp_path / "missing_dir" / "data.json"
+    journal, stats, writer = _writer(tmp_path, data_path)
+    stats["joe"] = 5
+    stats.incr("joe", 2)
+
+    asyncio.run(writer.flush(force=True))
+
+    assert writer.dirty                     # Retried on the next tick
+    assert glob.glob(journal.path + ".*")   # Sealed segment not deleted
+    recovered = {}
+    replay_journal(recovered, journal.path)
+    assert recovered == {"stats": {"joe": 7}}
+
+    # flush_sync must not raise either, and must keep the records too
+    writer.flush_sync()
+    recovered = {}
+    replay_journal(recovered, journal.path)
+    assert recovered == {"stats": {"joe": 7}}
+
+
+def test_compaction_drops_segments_after_write(tmp_path):
+    data_path = tmp_path / "data.json"
+    journal, stats, writer = _writer(tmp_path, data_path)
+    stats["joe"] = 5
+
+    asyncio.run(writer.flush(force=True))
+
+    assert not writer.dirty
+    assert not glob.glob(journal.path + ".*")
+    data = load_data(str(data_path))
+    replay_journal(data, journal.path)
+    assert data["stats"] == {"joe": 5}
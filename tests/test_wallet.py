@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from wallet import GoldLedger  # noqa: E402
+
+
+def test_stale_reserve_waits_for_inflight_payout():
+    async def scenario():
+        wallet = {"gold": 100}
+        gate = asyncio.Event()
+
+        async def fetch():
+            return wallet["gold"]
+
+        async def pay(user_id, amount):
+            await gate.wait()
+            wallet["gold"] -= amount
+
+        ledger = GoldLedger(fetch, pay)
+        payout = asyncio.create_task(ledger.tip("u1", 10))
+        await asyncio.sleep(0)
+        assert ledger._inflight == 1
+
+        wallet["gold"] += 400                 # Topped up outside the bot
+        ledger.stale = True
+        hold = asyncio.create_task(ledger.reserve(200))
+        await asyncio.sleep(0)
+        assert not hold.done()                # Waits instead of judging the stale figure
+
+        gate.set()
+        assert await payout
+        reservation = await hold
+        assert reservation is not None
+        assert ledger.balance == 490 and not ledger.stale
+        reservation.release()
+
+    asyncio.run(scenario())
+
+
+def test_ensure_returns_when_fetch_fails():
+    async def scenario():
+        async def fetch():
+            return None
+
+        async def pay(user_id, amount):
+            pass
+
+        ledger = GoldLedger(fetch, pay)
+        assert await ledger.reserve(5) is None
+        assert ledger.balance is None
+
+    asyncio.run(scenario())
+
+
+def test_refresh_drops_figure_fetched_across_a_payout():
+    async def scenario():
+        wallet = {"gold": 100}
+        reply = asyncio.Event()
+        slow = {"on": False}
+
+        async def fetch():
+            gold = wallet["gold"]             # Read before the payout lands
+            if slow["on"]:
+                await reply.wait()
+            return gold
+
+        async def pay(user_id, amount):
+            wallet["gold"] -= amount
+
+        ledger = GoldLedger(fetch, pay)
+        assert await ledger.refresh()
+        slow["on"] = True
+        reconcile = asyncio.create_task(ledger.refresh())
+        await asyncio.sleep(0)
+        assert await ledger.tip("u", 50)
+        reply.set()
+        assert not await reconcile            # Fetched 100g before the tip — dropped
+        assert ledger.balance == 50 == wallet["gold"]
+        assert ledger.available == 50
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+"""
+textstyle.py — Colored chat text (per-character gradients).
+
+gradient_text() used to rebuild its palette dict and grow the result with
+`result +=` on every call, and it sits on hot paths (tip announcements,
+word-game winners, greeting confirmations). Here the palettes are built
+once at import as tuples of ready-made "<#rrggbb>" tags, output is
+assembled with a single join, and results are memoized in an LRU cache —
+the same few strings ("⚡ WORD CHALLENGE! ⚡", "MEGA TIP") come back
+constantly.
+
+benchmarks/bench_gradient.py compares this against the old implementation.
+"""
+
+from functools import lru_cache
+from itertools import cycle
+
+GRADIENTS = {
+    "rainbow": ("ff0000", "ff7f00", "ffff00", "00ff00", "0000ff", "4b0082", "9400d3"),
+    "fire":    ("ff0e3c", "ff2a4e", "ff2e51", "ff526f", "ff6347", "ff7f50"),
+    "ocean":   ("00affe", "00c0fe", "3ccffe", "72d7f8", "80ddfb", "a5e4f9"),
+    "pink":    ("ff1493", "ff69b4", "ff00ff", "ba55d3", "9370db", "dda0dd"),
+    "green":   ("00ff7f", "00ff00", "00dd00", "00bb00", "009900", "007700"),
+    "purple":  ("9400d3", "8a2be2", "9370db", "ba55d3", "dda0dd", "ee82ee"),
+    "sunset":  ("ff6b35", "ff8c42", "ffaa5c", "ffd97d", "fff5ba", "fffacd"),
+    "cyan":    ("00ffff", "00e5e5", "00cccc", "00b2b2", "009999", "008080"),
+    "gold":    ("ffd700", "ffed4e", "ffff00", "ffed4e", "ffd700", "ffcc00"),
+}
+GRADIENT_NAMES = tuple(GRADIENTS)
+
+# Color tags per gradient, ready to prepend to a character
+_TAGS = {name: tuple(f"<#{color}>" for color in colors) for name, colors in GRADIENTS.items()}
+
+
+@lru_cache(maxsize=512)
+def _render(text: str, gradient: str) -> str:
+    next_tag = cycle(_TAGS[gradient]).__next__
+    # Spaces stay uncolored and don't advance the gradient
+    return "".join(" " if ch == " " else next_tag() + ch for ch in text)
+
+
+def gradient_text(text: str, gradient: str = "rainbow") -> str:
+    """Color `text` character by character. Unknown gradients fall back to rainbow."""
+    if gradient not in _TAGS:
+        gradient = "rainbow"
+    return _render(text, gradient)
+
+
+def cache_info():
+    return _render.cache_info()
@@ -0,0 +1,166 @@
+"""
+wallet.py — Locally tracked gold balance for payouts.
+
+Every payout (welcome tip, word-game bonus, !tip, !tipall, auto-tip) used to
+call get_wallet() first, doubling the API traffic of each tip, and two
+payouts running at once could both pass the balance check and overspend.
+GoldLedger keeps the balance locally instead:
+
+  * credit() on every gold tip the bot receives (on_tip)
+  * a successful payout debits the ledger; nothing is fetched
+  * refresh() reconciles with the real wallet — on first use, after any
+    failed payout (a failure means the local figure may be wrong), and on a
+    slow schedule: the caller runs refresh() every `reconcile_interval`
+  * payouts reserve funds before the API call, so concurrent payouts see
+    `available` (balance minus reservations) and cannot overspend.
+    reserve(amount) holds a block for a multi-tip job (!tipall)
+
+The ledger knows nothing about gold bars or the Highrise API: it is given
+`fetch()` → int | None (None on failure) and `pay(user_id, amount)`, which
+raises on anything but success.
+"""
+
+import asyncio
+import time
+
+
+class InsufficientFunds(Exception):
+    """pay() reported the real wallet could not cover the tip."""
+
+
+class Reservation:
+    """Gold held back for one payout or one bulk job."""
+
+    def __init__(self, ledger: "GoldLedger", amount: int):
+        self._ledger = ledger
+        self.remaining = amount
+
+    async def tip(self, user_id: str, amount: int) -> bool:
+        """Pay `amount` out of this reservation (or the free balance once it
+        is used up). False if the funds are not there; raises on API failure."""
+        if amount > self.remaining:
+            return await self._ledger.tip(user_id, amount)
+        self.remaining -= amount
+        try:
+            await self._ledger._pay_reserved(user_id, amount)
+        except Exception:
+            self.remaining += amount   # Still held — release() or the next tip decides
+            raise
+        self._ledger.reserved -= amount
+        return True
+
+    def release(self):
+        """Give back whatever was not spent."""
+        self._ledger.reserved -= self.remaining
+        self.remaining = 0
+
+
+class GoldLedger:
+    def __init__(self, fetch, pay, reconcile_interval: float = 600.0):
+        self._fetch = fetch          # async () → int | None
+        self._pay = pay              # async (user_id, amount) → None, raises on failure
+        self.reconcile_interval = reconcile_interval
+        self.balance = None          # Last known gold; None until the first fetch
+        self.reserved = 0            # Held by pending payouts / bulk jobs
+        self.stale = True            # Reconcile before the next payout
+        self.last_sync = 0.0
+        self.syncs = 0
+        self.paid_out = 0
+        self.received = 0
+        self._inflight = 0           # Payouts between API call and reply
+        self._moves = 0              # Bumped by every payout start / end and credit
+        self._idle = asyncio.Event()  # Set while no payout is in flight
+        self._idle.set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> int:
+        return max(0, (self.balance or 0) - self.reserved)
+
+    # ── Reconcile ───────────────────────────────────────────────────
+    async def refresh(self) -> bool:
+        """Replace the local balance with the real wallet. Skipped while a
+        payout is in flight, and the fetched figure is dropped if gold moved
+        while it was on the way — it may predate that movement."""
+        async with self._lock:
+            if self._inflight:
+                return False
+            moves = self._moves
+            gold = await self._fetch()
+            if gold is None or self._moves != moves:
+                return False
+            if self.balance is not None and gold != self.balance:
+                print(f"[Wallet] Reconciled {self.balance}g → {gold}g")
+            self.balance = gold
+            self.stale = False
+            self.last_sync = time.time()
+            self.syncs += 1
+            return True
+
+    async def ensure(self):
+        """Fetch once if the balance is unknown or was marked stale. Waits for
+        payouts in flight first — refresh() would skip the fetch and the caller
+        would be left judging funds on an unknown or stale figure."""
+        while self.stale or self.balance is None:
+            await self._idle.wait()
+            moves = self._moves
+            if await self.refresh():
+                return
+            if self._moves == moves and not self._inflight:
+                return               # The fetch itself failed
+
+    # ── Movements ───────────────────────────────────────────────────
+    def credit(self, amount: int):
+        """Gold received (a tip to the bot)."""
+        self.received += amount
+        self._moves += 1
+        if self.balance is not None:
+            self.balance += amount
+
+    async def reserve(self, amount: int):
+        """Hold `amount` for later payouts; None if not available."""
+        await self.ensure()
+        if self.available < amount:
+            return None
+        self.reserved += amount
+        return Reservation(self, amount)
+
+    async def tip(self, user_id: str, amount: int) -> bool:
+        """Reserve and pay in one go. False if the ledger says the funds are
+        not there; raises (and marks the ledger stale) if the API call fails."""
+        hold = await self.reserve(amount)
+        if hold is None:
+            return False
+        try:
+            return await hold.tip(user_id, amount)
+        finally:
+            hold.release()
+
+    async def _pay_reserved(self, user_id: str, amount: int):
+        self._inflight += 1
+        self._moves += 1
+        self._idle.clear()
+        try:
+            await self._pay(user_id, amount)
+        except Exception:
+            self.stale = True
+            raise
+        finally:
+            self._inflight -= 1
+            self._moves += 1
+            if not self._inflight:
+                self._idle.set()
+        self.balance = max(0, (self.balance or 0) - amount)
+        self.paid_out += amount
+
+    def stats(self) -> dict:
+        return {
+            "balance": self.balance,
+            "reserved": self.reserved,
+            "available": self.available,
+            "stale": self.stale,
+            "last_sync": self.last_sync,
+            "syncs": self.syncs,
+            "paid_out": self.paid_out,
+            "received": self.received,
+        }
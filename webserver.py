@@ -15,17 +15,37 @@ HOW TO USE:
 
 The server runs on port 8080 (or PORT env var) and responds to any
 GET request with a 200 OK — enough to satisfy Wyspbytes' uptime checks.
+
+MyBot itself uses start_async_webserver(): the same endpoints served by
+asyncio on the bot's own event loop, so concurrent probes never block one
+another and route handlers read bot state from the loop that owns it:
+
+  /healthz   process up — always 200
+  /readyz    200 when MyBot.readiness() passes, 503 otherwise (JSON body)
+  /metrics   Prometheus text
+  anything else — the "Bot alive" ping, as before
 """
 
+import asyncio
+import inspect
 import threading
 import os
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from datetime import datetime
 
+REQUEST_TIMEOUT = 5.0   # Seconds to receive the request head
+MAX_HEADER_LINES = 100
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def alive_text() -> str:
+    return f"✅ Bot alive — {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC"
+
 
 class PingHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        body = f"✅ Bot alive — {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC".encode()
+        body = alive_text().encode()
         self.send_response(200)
         self.send_header("Content-Type", "text/plain; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
@@ -45,3 +65,62 @@ def start_webserver():
     thread.start()
     print(f"[WebServer] Keep-alive server running on port {port}")
     return server
+
+
+# ─────────────────────────────────────────────────────────────────────
+#  ASYNCIO SERVER (runs on the bot's event loop)
+# ─────────────────────────────────────────────────────────────────────
+async def _read_request(reader: asyncio.StreamReader):
+    """(method, path) of one HTTP request; the headers are read and ignored."""
+    line = await reader.readline()
+    for _ in range(MAX_HEADER_LINES):
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    return method, target.split("?", 1)[0]
+
+
+async def _handle(reader, writer, routes: dict):
+    status, content_type, body = 400, "text/plain; charset=utf-8", b"bad request"
+    method = "GET"
+    try:
+        try:
+            method, path = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT)
+        except (asyncio.TimeoutError, ValueError):
+            pass
+        else:
+            route = routes.get(path) or routes.get("*")
+            if method not in ("GET", "HEAD"):
+                status, body = 405, b"method not allowed"
+            elif route is None:
+                status, body = 404, b"not found"
+            else:
+                try:
+                    result = route()
+                    if inspect.isawaitable(result):
+                        result = await result
+                    status, content_type, text = result
+                    body = text.encode()
+                except Exception as e:
+                    status, body = 500, f"error: {e}".encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n").encode("latin-1")
+        writer.write(head if method == "HEAD" else head + body)
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_async_webserver(routes: dict, port: int | None = None, host: str = "0.0.0.0"):
+    """Serve `routes` on the running event loop. Each route is a callable
+    (sync or async) returning (status, content type, text); "*" is the
+    fallback for unknown paths. Returns the asyncio server."""
+    port = port or int(os.environ.get("PORT", 8080))
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, routes), host, port)
+    print(f"[WebServer] Health server running on port {port} (asyncio)")
+    return server
@@ -0,0 +1,123 @@
+"""
+wordmatch.py — Multi-phrase matcher (Aho-Corasick automaton).
+
+The moderation filter used to run `bad_word in low` for every entry of
+bad_words, twice per message. PhraseMatcher compiles all phrases into one
+automaton, so a message is scanned once per normalized form no matter how
+many phrases there are, and every hit is reported with the phrase that matched.
+
+The automaton is compiled lazily on first use and again only after the
+phrase list changes (add / discard), so editing the list stays cheap.
+
+With whole_words=True a hit only counts when it is not glued to other
+letters or digits ("bot" matches "hey bot!" but not "robot"), which is
+what the auto-response triggers need. best() picks the most specific hit
+(longest phrase, then earliest) in the same single scan.
+"""
+
+from collections import deque
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class PhraseMatcher:
+    def __init__(self, phrases=(), whole_words: bool = False):
+        self._phrases = list(dict.fromkeys(p.lower() for p in phrases if p))
+        self.whole_words = whole_words
+        self._goto = None   # [{char: state}] — None until compiled
+        self._fail = None   # [state]
+        self._out = None    # [(phrase, ...)] phrases ending at each state
+
+    # ── Phrase list ─────────────────────────────────────────────────
+    def add(self, phrase: str):
+        phrase = phrase.lower()
+        if phrase and phrase not in self._phrases:
+            self._phrases.append(phrase)
+            self._goto = None
+
+    def discard(self, phrase: str):
+        phrase = phrase.lower()
+        if phrase in self._phrases:
+            self._phrases.remove(phrase)
+            self._goto = None
+
+    def __iter__(self):
+        return iter(list(self._phrases))
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def __contains__(self, phrase) -> bool:
+        return phrase.lower() in self._phrases
+
+    # ── Automaton ───────────────────────────────────────────────────
+    def _compile(self):
+        goto, out = [{}], [()]
+        for phrase in self._phrases:
+            state = 0
+            for ch in phrase:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append(())
+                    nxt = goto[state][ch] = len(goto) - 1
+                state = nxt
+            out[state] += (phrase,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def _scan(self, text: str):
+        """Yield (end index, phrase) for every occurrence, in text order."""
+        if self._goto is None:
+            self._compile()
+        goto, fail, out = self._goto, self._fail, self._out
+        whole_words = self.whole_words
+        last = len(text) - 1
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for phrase in out[state]:
+                    if whole_words:
+                        start = i - len(phrase) + 1
+                        if start > 0 and _is_word_char(text[start - 1]):
+                            continue
+                        if i < last and _is_word_char(text[i + 1]):
+                            continue
+                    yield i, phrase
+
+    # ── Queries ─────────────────────────────────────────────────────
+    def find_all(self, text: str) -> list:
+        """Every phrase occurrence in `text` (lowercase input expected)."""
+        return [phrase for _, phrase in self._scan(text)]
+
+    def best(self, text: str):
+        """Most specific phrase in `text` — longest, then earliest — or None."""
+        best, best_key = None, None
+        for end, phrase in self._scan(text):
+            key = (len(phrase), -end)
+            if best_key is None or key > best_key:
+                best, best_key = phrase, key
+        return best
+
+    def search(self, *texts):
+        """First phrase found in any of `texts`, or None. Stops at the first hit."""
+        for text in texts:
+            for _, phrase in self._scan(text):
+                return phrase
+        return None
@@ -0,0 +1,152 @@
+"""
+zones.py — Named box zones (VIP floor, dance floors, stage, AFK corners, no-go areas)
+with a uniform-grid spatial index.
+
+A zone is the same center/radius box the old vip_floor / dance_floor dicts used:
+    {'x', 'y', 'z', 'rx', 'ry', 'rz'}  (+ 'kind')
+
+ZoneIndex buckets every zone into the grid cells its x/z footprint covers, so
+finding the zones under a position is one dict lookup plus a box test against
+the handful of zones sharing that cell — independent of how many zones exist.
+"""
+
+import math
+
+# Zone kinds the bot knows how to react to. Anything else is just tracked.
+ZONE_KINDS = ("vip", "dance", "stage", "afk", "nogo", "custom")
+
+
+class Zone:
+    __slots__ = ("name", "kind", "x", "y", "z", "rx", "ry", "rz")
+
+    def __init__(self, name, kind, x, y, z, rx=2.0, ry=0.6, rz=2.0):
+        self.name = name
+        self.kind = kind
+        self.x, self.y, self.z = float(x), float(y), float(z)
+        self.rx, self.ry, self.rz = float(rx), float(ry), float(rz)
+
+    @classmethod
+    def from_corners(cls, name, kind, p1: dict, p2: dict):
+        """Build a zone from two opposite corners — same padding the old
+        two-point floor wizard used."""
+        return cls(
+            name, kind,
+            x=(p1['x'] + p2['x']) / 2,
+            y=(p1['y'] + p2['y']) / 2,
+            z=(p1['z'] + p2['z']) / 2,
+            rx=abs(p1['x'] - p2['x']) / 2 + 0.5,
+            ry=max(abs(p1['y'] - p2['y']) / 2, 0.6),
+            rz=abs(p1['z'] - p2['z']) / 2 + 0.5,
+        )
+
+    @classmethod
+    def from_dict(cls, name, data: dict, kind=None):
+        return cls(
+            name, kind or data.get('kind', 'custom'),
+            data['x'], data['y'], data['z'],
+            data.get('rx', 2), data.get('ry', 0.6), data.get('rz', 2),
+        )
+
+    def to_dict(self) -> dict:
+        return {'kind': self.kind, 'x': self.x, 'y': self.y, 'z': self.z,
+                'rx': self.rx, 'ry': self.ry, 'rz': self.rz}
+
+    def contains(self, pos) -> bool:
+        """Box test. AnchorPosition (seated users) has no x/y/z and is never inside."""
+        try:
+            x, y, z = pos.x, pos.y, pos.z
+        except AttributeError:
+            return False
+        return (abs(x - self.x) <= self.rx and
+                abs(y - self.y) <= self.ry and
+                abs(z - self.z) <= self.rz)
+
+    def __repr__(self):
+        return f"Zone({self.name!r}, {self.kind!r}, ({self.x:.1f}, {self.y:.1f}, {self.z:.1f}))"
+
+
+class ZoneIndex:
+    """Registry of zones by name, plus a uniform grid over the x/z floor plane."""
+
+    def __init__(self, cell_size: float = 2.0):
+        self.cell_size = cell_size
+        self._zones = {}   # {name: Zone}
+        self._grid = {}    # {(cx, cz): [Zone, ...]}
+
+    # ── Registry ────────────────────────────────────────────────────
+    def add(self, zone: Zone):
+        """Add or replace a zone by name."""
+        self.remove(zone.name)
+        self._zones[zone.name] = zone
+        for cell in self._cells(zone):
+            self._grid.setdefault(cell, []).append(zone)
+
+    def remove(self, name: str):
+        zone = self._zones.pop(name, None)
+        if zone is None:
+            return None
+        for cell in self._cells(zone):
+            bucket = self._grid.get(cell)
+            if bucket:
+                bucket.remove(zone)
+                if not bucket:
+                    del self._grid[cell]
+        return zone
+
+    def remove_kind(self, kind: str) -> list:
+        return [self.remove(z.name) for z in self.of_kind(kind)]
+
+    def get(self, name: str):
+        return self._zones.get(name)
+
+    def of_kind(self, kind: str) -> list:
+        return [z for z in self._zones.values() if z.kind == kind]
+
+    def first_of_kind(self, kind: str):
+        return next((z for z in self._zones.values() if z.kind == kind), None)
+
+    def has_kind(self, kind: str) -> bool:
+        return any(z.kind == kind for z in self._zones.values())
+
+    def __iter__(self):
+        return iter(list(self._zones.values()))
+
+    def __len__(self):
+        return len(self._zones)
+
+    # ── Lookup ──────────────────────────────────────────────────────
+    def zones_at(self, pos) -> list:
+        """All zones containing `pos` — one grid cell lookup, no scan over every zone."""
+        try:
+            x, z = pos.x, pos.z
+        except AttributeError:
+            return []
+        bucket = self._grid.get(self._cell(x, z))
+        if not bucket:
+            return []
+        return [zone for zone in bucket if zone.contains(pos)]
+
+    # ── Persistence ─────────────────────────────────────────────────
+    def to_dict(self) -> dict:
+        return {name: zone.to_dict() for name, zone in self._zones.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        index = cls()
+        for name, zd in (data or {}).items():
+            try:
+                index.add(Zone.from_dict(name, zd))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[Zones] Skipping bad zone {name!r}: {e}")
+        return index
+
+    # ── Grid helpers ────────────────────────────────────────────────
+    def _cell(self, x: float, z: float):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def _cells(self, zone: Zone):
+        x0, z0 = self._cell(zone.x - zone.rx, zone.z - zone.rz)
+        x1, z1 = self._cell(zone.x + zone.rx, zone.z + zone.rz)
+        for cx in range(x0, x1 + 1):
+            for cz in range(z0, z1 + 1):
+                yield (cx, cz)